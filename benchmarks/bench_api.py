@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Load benchmark for GET /api/products: legacy per-request event loops vs ASGI.
+
+The legacy mode reproduces what the old Flask handlers did for every request:
+``asyncio.run(service.list(...))`` followed by ``asyncio.run(close_db())`` from
+the teardown hook. Those requests are served one at a time, like a sync worker,
+because the shared Tortoise client cannot be driven from several loops at once.
+The ASGI mode sends the same requests through the Quart app running on a single
+event loop with ``--concurrency`` requests in flight and Tortoise initialized
+once, with the response cache disabled so both modes query the database on
+every request. Point ``--database-url`` at the docker-compose Postgres to
+include the cost of reconnecting that the legacy mode pays on every request.
+
+Usage:
+    python benchmarks/bench_api.py --requests 2000 --concurrency 16 --products 200
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from backend.app import create_app  # noqa: E402
+from backend.db import init_db, close_db  # noqa: E402
+from backend.models import Brand, Category, Product  # noqa: E402
+from backend.repositories.product_repository import ProductRepository  # noqa: E402
+from backend.services.product_service import ProductService  # noqa: E402
+
+
+async def seed(count: int) -> None:
+    await init_db()
+    category = await Category.create(name='Brinquedos')
+    brand = await Brand.create(name='Pet Shop')
+    await Product.bulk_create([
+        Product(name=f'Produto {i}', price=float(i % 50) + 0.9, stock=i % 25,
+                category_id=category.id, brand_id=brand.id)
+        for i in range(count)
+    ])
+    await close_db()
+
+
+def summarize(name: str, latencies: list, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return {
+        'mode': name,
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': p99 * 1000,
+    }
+
+
+def run_legacy(total: int) -> dict:
+    service = ProductService(ProductRepository())
+    latencies = []
+
+    asyncio.run(init_db())
+    asyncio.run(close_db())
+    start = time.perf_counter()
+    for _ in range(total):
+        req_start = time.perf_counter()
+        asyncio.run(service.list({}))
+        asyncio.run(close_db())
+        latencies.append(time.perf_counter() - req_start)
+    return summarize('legacy asyncio.run', latencies, time.perf_counter() - start)
+
+
+async def run_asgi(total: int, concurrency: int) -> dict:
+    app = create_app()
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+
+        async def handle():
+            async with semaphore:
+                start = time.perf_counter()
+                resp = await client.get('/api/products/')
+                await resp.get_data()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(handle() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+    return summarize('asgi single loop', latencies, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--products', type=int, default=100)
+    parser.add_argument('--database-url', help='defaults to a temporary SQLite file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = args.database_url or f"sqlite://{os.path.join(tmp, 'bench.db')}"
+        # The legacy mode has no cache; in the ASGI mode it would turn every
+        # request after the first into a hit and hide the cost being measured
+        os.environ['CACHE_MAX_ENTRIES'] = '0'
+        asyncio.run(seed(args.products))
+        results = [
+            run_legacy(args.requests),
+            asyncio.run(run_asgi(args.requests, args.concurrency)),
+        ]
+
+    print(f"{'mode':<20} {'requests':>8} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for r in results:
+        print(f"{r['mode']:<20} {r['requests']:>8} {r['rps']:>10.1f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""TTFB, total time and peak memory of a full-catalog response: buffered vs streamed.
+
+``buffered`` reproduces the old approach: every row is loaded into a list of
+dicts and handed to ``jsonify``. ``json`` and ``ndjson`` use
+``GET /api/products/export``, which encodes keyset batches as they are
+fetched. Each mode runs in a fresh process against the same seeded SQLite
+file (or ``--database-url``), so its peak RSS is measured in isolation.
+
+Usage:
+    python benchmarks/bench_stream.py --products 100000
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+MODES = {
+    'buffered': ('/bench/buffered', {}),
+    'json': ('/api/products/export', {}),
+    'ndjson': ('/api/products/export', {'Accept': 'application/x-ndjson'}),
+}
+
+
+def rss_mib() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def seed(count: int, batch_size: int = 10000) -> None:
+    from backend.db import init_db, close_db
+    from backend.models import Brand, Category, Product
+
+    await init_db()
+    categories = [await Category.create(name=f'Categoria {i}') for i in range(20)]
+    brands = [await Brand.create(name=f'Marca {i}') for i in range(10)]
+    for start in range(0, count, batch_size):
+        await Product.bulk_create([
+            Product(name=f'Produto {i}', description=f'Descrição do produto {i} para o pet',
+                    price=float(i % 200) + 0.9, stock=i % 25, sku=f'SKU{i:08d}',
+                    category_id=categories[i % 20].id, brand_id=brands[i % 10].id)
+            for i in range(start, min(start + batch_size, count))
+        ])
+    await close_db()
+
+
+async def measure(mode: str) -> dict:
+    from quart import jsonify
+    from backend.app import create_app
+    from backend.models import Product
+    from backend.repositories.product_repository import PRODUCT_FIELDS
+
+    app = create_app()
+
+    @app.get('/bench/buffered')
+    async def buffered():
+        return jsonify(await Product.all().order_by('id').values(**PRODUCT_FIELDS))
+
+    path, headers = MODES[mode]
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        baseline = rss_mib()
+        start = time.perf_counter()
+        ttfb = None
+        size = 0
+        async with client.request(path, method='GET', headers=headers) as connection:
+            await connection.send_complete()
+            while True:
+                chunk = await connection.receive()
+                if ttfb is None:
+                    ttfb = time.perf_counter() - start
+                if not chunk:
+                    break
+                size += len(chunk)
+        total = time.perf_counter() - start
+    return {'mode': mode, 'ttfb_ms': ttfb * 1000, 'total_s': total, 'mib': size / 2**20,
+            'baseline_mib': baseline, 'peak_mib': rss_mib()}
+
+
+def run_mode(mode: str, queue) -> None:
+    queue.put(asyncio.run(measure(mode)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--database-url', help='defaults to a temporary SQLite file; '
+                        'a Postgres database must be empty')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = args.database_url or f"sqlite://{os.path.join(tmp, 'bench.db')}"
+        # The cache would only hide the cost being measured
+        os.environ['CACHE_MAX_ENTRIES'] = '0'
+        start = time.perf_counter()
+        asyncio.run(seed(args.products))
+        print(f'seeded {args.products} products in {time.perf_counter() - start:.1f}s')
+
+        print(f"{'mode':<10} {'TTFB ms':>9} {'total s':>8} {'body MiB':>9} {'base MiB':>9} {'peak MiB':>9}")
+        queue = multiprocessing.Queue()
+        for mode in args.modes.split(','):
+            proc = multiprocessing.Process(target=run_mode, args=(mode, queue))
+            proc.start()
+            r = queue.get()
+            proc.join()
+            print(f"{r['mode']:<10} {r['ttfb_ms']:>9.1f} {r['total_s']:>8.2f} {r['mib']:>9.1f} "
+                  f"{r['baseline_mib']:>9.1f} {r['peak_mib']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
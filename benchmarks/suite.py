@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""Benchmark suite: converters, importer, repository listing and HTTP endpoints.
+
+Every case runs on deterministic synthetic data (benchmarks/synthetic.py) of
+``--rows`` rows, so two runs with the same arguments measure the same work.
+Results are written as JSON together with the commit, Python version and
+machine they were taken on; ``--compare`` prints the change against an
+earlier results file and exits with status 1 when a case got slower than
+``--threshold``.
+
+Groups:
+    converter   process_products (rows and vectorized engines),
+                process_products_simple and process_catalogs (both layouts)
+    importer    backend.utils.importer insert and no-op upsert of a catalog sheet
+    repository  ProductRepository.list with each filter and sort
+    http        list, detail, facets, search, suggest and export endpoints
+
+Usage:
+    python benchmarks/suite.py --rows 100000 --output results/main.json
+    python benchmarks/suite.py --rows 100000 --groups repository,http --compare results/main.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCH_DIR, '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import write_acessorios_csv, write_catalog_csv, write_injetados_csv  # noqa: E402
+
+GROUPS = ('converter', 'importer', 'repository', 'http')
+
+LIST_CASES = {
+    'list': ({}, {}),
+    'list sort=price': ({}, {'sort': 'price'}),
+    'list sort=name desc': ({}, {'sort': 'name', 'order': 'desc'}),
+    'list sort=category': ({}, {'sort': 'category'}),
+    'list sort=brand': ({}, {'sort': 'brand'}),
+    'list name': ({'name': 'coleira'}, {}),
+    'list category_id': ({'category_id': '3'}, {'sort': 'price'}),
+    'list brand_id': ({'brand_id': '2'}, {'sort': 'price', 'order': 'desc'}),
+    'list name+category_id+brand_id': ({'name': 'bola', 'category_id': '3', 'brand_id': '2'}, {}),
+}
+
+HTTP_CASES = {
+    'GET /api/products/': '/api/products/',
+    'GET /api/products/?sort=price&category_id=3': '/api/products/?sort=price&category_id=3',
+    'GET /api/products/<id>': '/api/products/1',
+    'GET /api/products/facets': '/api/products/facets',
+    'GET /api/products/facets?name=bola': '/api/products/facets?name=bola',
+    'GET /api/products/search?q=coleira nylon': '/api/products/search?q=coleira%20nylon',
+    'GET /api/products/suggest?q=co': '/api/products/suggest?q=co',
+}
+
+
+def timing(group: str, name: str, seconds: float, rows: int | None = None, **extra) -> dict:
+    result = {'group': group, 'name': name, 'seconds': seconds}
+    if rows is not None:
+        result.update(rows=rows, rows_per_s=rows / seconds if seconds else 0.0)
+    result.update(extra)
+    return result
+
+
+def latency(group: str, name: str, samples: list, **extra) -> dict:
+    samples = sorted(samples)
+
+    def pct(p: float) -> float:
+        return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+
+    return {'group': group, 'name': name, 'runs': len(samples),
+            'mean_ms': statistics.fmean(samples) * 1000, 'p50_ms': statistics.median(samples) * 1000,
+            'p95_ms': pct(0.95), 'p99_ms': pct(0.99), **extra}
+
+
+def primary(result: dict) -> float:
+    """The lower-is-better figure compared between runs."""
+    return result['p50_ms'] if 'p50_ms' in result else result['seconds']
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    value = fn(*args, **kwargs)
+    return value, time.perf_counter() - start
+
+
+async def atimed(awaitable):
+    start = time.perf_counter()
+    value = await awaitable
+    return value, time.perf_counter() - start
+
+
+def run_converter(sheets: dict, rows: int) -> list:
+    import process_catalogs
+    import process_products
+    import process_products_simple
+
+    results = []
+    for engine in ('rows', 'vectorized'):
+        products, seconds = timed(process_products.process_csv_to_products, sheets['injetados'], engine)
+        results.append(timing('converter', f'process_products {engine}', seconds, rows, products=len(products)))
+    # The simple variant prints every product it reads
+    with contextlib.redirect_stdout(io.StringIO()):
+        products, seconds = timed(process_products_simple.process_csv_to_products, sheets['injetados'])
+    results.append(timing('converter', 'process_products_simple', seconds, rows, products=len(products)))
+    layouts = process_catalogs.load_layouts()
+    for name in ('injetados', 'acessorios'):
+        (products, _), seconds = timed(process_catalogs.process_files, [sheets[name]], layouts)
+        results.append(timing('converter', f'process_catalogs {name}', seconds, rows, products=len(products)))
+    (products, _), seconds = timed(process_catalogs.process_files,
+                                   [sheets['injetados'], sheets['acessorios']], layouts)
+    results.append(timing('converter', 'process_catalogs both', seconds, 2 * rows, products=len(products)))
+    return results
+
+
+async def run_database(sheets: dict, rows: int, repeat: int, groups: set) -> list:
+    from backend.db import init_db, close_db
+    from backend.models import Product
+    from backend.repositories.product_repository import ProductRepository
+    from backend.services.product_service import ProductService
+    from backend.utils.importer import import_excel
+
+    results = []
+    await init_db()
+    try:
+        repo = ProductRepository()
+        service = ProductService(repo)
+        report, seconds = await atimed(import_excel(sheets['catalog'], service))
+        if 'importer' in groups:
+            results.append(timing('importer', 'import insert', seconds, rows, created=report.created))
+            report, seconds = await atimed(import_excel(sheets['catalog'], service, upsert=True))
+            results.append(timing('importer', 'import upsert unchanged', seconds, rows,
+                                  unchanged=report.unchanged))
+        if 'repository' in groups:
+            for name, (filters, page_args) in LIST_CASES.items():
+                samples = []
+                for _ in range(repeat):
+                    _, seconds = await atimed(repo.list(filters, **page_args))
+                    samples.append(seconds)
+                results.append(latency('repository', name, samples))
+            samples, cursor = [], None
+            for _ in range(repeat):
+                page, seconds = await atimed(repo.list({}, sort='name', cursor=cursor))
+                samples.append(seconds)
+                cursor = page.next_cursor
+            results.append(latency('repository', 'list sort=name next pages', samples))
+        assert await Product.all().count() == rows
+    finally:
+        await close_db()
+    return results
+
+
+async def run_http(rows: int, repeat: int) -> list:
+    from backend.app import create_app
+
+    results = []
+    app = create_app()
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        for name, path in HTTP_CASES.items():
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                resp = await client.get(path)
+                await resp.get_data()
+                samples.append(time.perf_counter() - start)
+                assert resp.status_code == 200, (path, resp.status_code)
+            results.append(latency('http', name, samples))
+        start = time.perf_counter()
+        resp = await client.get('/api/products/export?format=ndjson')
+        body = await resp.get_data()
+        results.append(timing('http', 'GET /api/products/export?format=ndjson',
+                              time.perf_counter() - start, rows, bytes=len(body)))
+    return results
+
+
+def metadata(args) -> dict:
+    def git(*cmd):
+        try:
+            return subprocess.run(['git', *cmd], cwd=ROOT, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'rows': args.rows,
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'database': 'sqlite' if not args.database_url else args.database_url.split(':', 1)[0],
+    }
+
+
+def print_results(results: list) -> None:
+    print(f"{'group':<11} {'case':<46} {'seconds':>9} {'rows/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for r in results:
+        seconds = f"{r['seconds']:.3f}" if 'seconds' in r else ''
+        rate = f"{r['rows_per_s']:.0f}" if 'rows_per_s' in r else ''
+        p50 = f"{r['p50_ms']:.2f}" if 'p50_ms' in r else ''
+        p99 = f"{r['p99_ms']:.2f}" if 'p99_ms' in r else ''
+        print(f"{r['group']:<11} {r['name'][:46]:<46} {seconds:>9} {rate:>10} {p50:>8} {p99:>8}")
+
+
+def compare(results: list, rows: int, baseline_path: str, threshold: float) -> int:
+    """Print each case against the baseline; returns how many regressed."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    before = {(r['group'], r['name']): r for r in baseline['results']}
+    commit = (baseline['meta'].get('commit') or '?')[:10]
+    print(f"\ncompared with {baseline_path} ({commit}, {baseline['meta']['rows']} rows)")
+    if baseline['meta']['rows'] != rows:
+        print(f'warning: this run used {rows} rows, the figures are not comparable')
+    regressions = 0
+    for r in results:
+        old = before.get((r['group'], r['name']))
+        if old is None:
+            continue
+        change = primary(r) / primary(old) - 1 if primary(old) else 0.0
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f"{r['group']:<11} {r['name'][:46]:<46} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000, help='rows per synthetic sheet (10k to 1M)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=50, help='runs per latency case')
+    parser.add_argument('--groups', default=','.join(GROUPS))
+    parser.add_argument('--output', help='results JSON (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', metavar='BASELINE', help='results JSON of an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='slowdown reported as a regression (default: 0.25 = 25%%; '
+                        'millisecond cases vary by 10-20%% between runs)')
+    parser.add_argument('--database-url', help='defaults to a temporary SQLite file; '
+                        'a Postgres database must be empty')
+    args = parser.parse_args(argv)
+    groups = set(args.groups.split(','))
+    unknown = groups - set(GROUPS)
+    if unknown:
+        parser.error(f"unknown groups: {', '.join(sorted(unknown))}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        sheets = {name: os.path.join(tmp, f'{name}.csv') for name in ('injetados', 'acessorios', 'catalog')}
+        write_injetados_csv(sheets['injetados'], args.rows, args.seed)
+        write_acessorios_csv(sheets['acessorios'], args.rows, args.seed)
+        write_catalog_csv(sheets['catalog'], args.rows, args.seed)
+        if 'converter' in groups:
+            results += run_converter(sheets, args.rows)
+
+        if groups & {'importer', 'repository', 'http'}:
+            os.environ['DATABASE_URL'] = args.database_url or f"sqlite://{os.path.join(tmp, 'bench.db')}"
+            # The response cache would only hide the cost being measured
+            os.environ['CACHE_MAX_ENTRIES'] = '0'
+            results += asyncio.run(run_database(sheets, args.rows, args.repeat, groups))
+            if 'http' in groups:
+                results += asyncio.run(run_http(args.rows, args.repeat))
+
+    meta = metadata(args)
+    output = args.output or os.path.join(BENCH_DIR, 'results', f"{(meta['commit'] or 'unknown')[:10]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2, ensure_ascii=False)
+
+    print_results(results)
+    print(f'\nresults written to {output}')
+    if args.compare and compare(results, args.rows, args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
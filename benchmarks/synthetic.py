@@ -0,0 +1,154 @@
+"""Deterministic synthetic supplier sheets and catalogs for the benchmarks.
+
+The generated sheets follow the column layouts of the files in ``data/``
+(INJETADOS and ACESSÓRIOS), including section header rows, empty cells,
+repeated barcodes and the ``R$`` price format. ``catalog_records`` produces
+the normalized records the backend importer works with. The same seed always
+yields the same rows.
+
+Usage:
+    python benchmarks/synthetic.py injetados /tmp/injetados.csv --rows 100000
+    python benchmarks/synthetic.py acessorios /tmp/acessorios.csv --rows 1000000
+"""
+
+import argparse
+import csv
+import random
+
+INJETADOS_COLUMNS = ['id', 'NCM', 'description', 'cadastro', 'status', 'promo_price',
+                     'unit_price', 'tax', 'net_after_commission', 'cost', 'lucro', 'margin', 'product']
+
+# The real sheet has two PRODUTO columns; the second one holds the product name.
+ACESSORIOS_COLUMNS = ['CÓD. INTERNO', 'PRODUTO', 'CÓD. DE BARRAS', 'NCM', 'PRODUTO', 'UTL', 'FYEL',
+                      'TAMANHO', 'EMBALAGEM', 'PESO COM EMBALAGEM gm', 'CUSTO', 'VENDA SHOPEE LOJA UTL',
+                      'VALOR QUE SOBRA APÓS COMISSÃO E TAXAS SHOPEE – IMPOSTO',
+                      'VALOR LUCRO – IMPOSTO 6%', 'IMPOSTO', 'MARGEM EM %', 'FERNANDO PET MERCADO LIVRE']
+
+# Columns of the generic layout read by backend.utils.importer.
+CATALOG_COLUMNS = ['sku', 'name', 'description', 'category', 'brand', 'price', 'stock']
+
+PRODUCT_WORDS = ['COMEDOURO', 'BEBEDOURO', 'RATINHO', 'VARINHA', 'BOLA', 'ESCOVA', 'PENTE',
+                 'BANDEJA', 'PÁ', 'KIT', 'CAIXA', 'TRANSPORTE', 'MAMADEIRA', 'REFIL', 'LUVA',
+                 'COLEIRA', 'GUIA', 'ARRANHADOR', 'SANITÁRIO', 'TRILHO']
+QUALIFIERS = ['GATO', 'CÃO', 'AF', 'MMA', 'FERPLAST', 'XIXI DOG', 'ANTI-FORMIGA', 'LUXO', 'PLUS']
+SECTIONS = ['COMEDOURO / BEBEDOURO ANTI-FORMIGA', 'BRINQUEDOS', 'HIGIENE', 'CAIXAS DE TRANSPORTE']
+ACESSORIOS_SECTIONS = ['COLEIRA DE NYLON COM FORRO DE EVA PARA CÃES', 'GUIAS E PEITORAIS',
+                       'BRINQUEDOS DE CORDA', 'CAMAS E ALMOFADAS']
+MATERIALS = ['NYLON', 'EVA', 'CORDA', 'COURO', 'PELÚCIA', 'INOX']
+CATEGORIES = ['Comedouros', 'Bebedouros', 'Brinquedos', 'Higiene', 'Transporte', 'Acessórios',
+              'Coleiras', 'Camas', 'Rações', 'Petiscos']
+BRANDS = ['Pet Shop', 'Ferplast', 'MMA', 'Chalesco', 'Premier', 'Furacão Pet', 'São Pet', 'Zee.Dog']
+
+
+def brl(value: float) -> str:
+    return f'R$ {value:.2f}'
+
+
+def injetados_rows(rows: int, seed: int = 42):
+    """Yield ``rows`` data rows (plus a section header every 25 rows)."""
+    rng = random.Random(seed)
+    for i in range(rows):
+        if i % 25 == 0:
+            yield {'id': SECTIONS[(i // 25) % len(SECTIONS)]}
+        cost = round(rng.uniform(0.5, 60), 2)
+        unit_price = round(cost * rng.uniform(1.5, 4), 2)
+        promo = round(unit_price * 0.9, 2) if rng.random() < 0.7 else None
+        yield {
+            'id': f'{10000 + i:06d}',
+            'NCM': '3926.90.90',
+            'description': (f'{rng.choice(PRODUCT_WORDS)} {rng.choice(QUALIFIERS)} '
+                            f'N°{rng.randint(1, 5)} - {rng.choice([150, 300, 600, 1000])} mL'),
+            'cadastro': 'ok' if rng.random() < 0.9 else '',
+            'promo_price': brl(promo) if promo else '',
+            'unit_price': brl(unit_price),
+            'tax': brl(unit_price * 0.06),
+            'net_after_commission': brl(unit_price * 0.7),
+            'cost': brl(cost),
+            'lucro': brl(unit_price * 0.7 - cost),
+            'margin': f'{round((unit_price - cost) / cost * 100)}%',
+        }
+
+
+def write_injetados_csv(path: str, rows: int, seed: int = 42) -> None:
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=INJETADOS_COLUMNS)
+        writer.writeheader()
+        writer.writerows(injetados_rows(rows, seed))
+
+
+def acessorios_rows(rows: int, seed: int = 42):
+    """Yield ``rows`` data rows as lists (plus a section title every 30 rows).
+
+    About 1% of the rows repeat an earlier barcode, and some codes are
+    written without the space ("CÓD.0001"), as in the real sheet.
+    """
+    rng = random.Random(seed)
+    width = len(ACESSORIOS_COLUMNS)
+    barcodes = []
+    for i in range(rows):
+        if i % 30 == 0:
+            yield [ACESSORIOS_SECTIONS[(i // 30) % len(ACESSORIOS_SECTIONS)]] + [''] * (width - 1)
+        if barcodes and rng.random() < 0.01:
+            barcode = rng.choice(barcodes)
+        else:
+            barcode = f'789{rng.randrange(10**10):010d}'
+            barcodes.append(barcode)
+        cost = round(rng.uniform(1, 80), 2)
+        price = round(cost * rng.uniform(2, 6), 2) + 0.9
+        net = price * 0.49
+        size = rng.randint(0, 5)
+        yield [
+            f"CÓD.{' ' if rng.random() < 0.9 else ''}{i:04d}", '', barcode, '5206.32.00',
+            f'{rng.choice(PRODUCT_WORDS)} {rng.choice(MATERIALS)} {rng.choice([10, 15, 20, 25])}MM '
+            f'Nº{size} {rng.choice(QUALIFIERS)}',
+            '', '', str(size), 'UNITÁRIO', f'{rng.randint(10, 900)}gm',
+            brl(cost), brl(price), brl(net), brl(net - cost), brl(price * 0.06),
+            f'{round((net - cost) / cost * 100)}%', brl(price * 1.2),
+        ]
+
+
+def write_acessorios_csv(path: str, rows: int, seed: int = 42) -> None:
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(ACESSORIOS_COLUMNS)
+        writer.writerows(acessorios_rows(rows, seed))
+
+
+def catalog_records(rows: int, seed: int = 42):
+    """Yield import records (``CATALOG_COLUMNS``) with unique skus."""
+    rng = random.Random(seed)
+    for i in range(rows):
+        word, qualifier = rng.choice(PRODUCT_WORDS), rng.choice(QUALIFIERS)
+        yield {
+            'sku': f'SKU{i:08d}',
+            'name': f'{word.title()} {qualifier.title()} {rng.choice(MATERIALS).title()} Nº{rng.randint(1, 5)}',
+            'description': f'{word.capitalize()} para pets, linha {qualifier.lower()}',
+            'category': rng.choice(CATEGORIES),
+            'brand': rng.choice(BRANDS),
+            'price': round(rng.uniform(2, 250), 2),
+            'stock': rng.randint(0, 60),
+        }
+
+
+def write_catalog_csv(path: str, rows: int, seed: int = 42) -> None:
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CATALOG_COLUMNS)
+        writer.writeheader()
+        writer.writerows(catalog_records(rows, seed))
+
+
+WRITERS = {
+    'injetados': write_injetados_csv,
+    'acessorios': write_acessorios_csv,
+    'catalog': write_catalog_csv,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a deterministic synthetic sheet')
+    parser.add_argument('layout', choices=WRITERS)
+    parser.add_argument('output')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    WRITERS[args.layout](args.output, args.rows, args.seed)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Classificação de produtos em categoria e marca por palavras-chave.
+
+As regras ficam em ``data/classification_rules.json``: listas ordenadas de
+categorias e marcas, cada uma com suas palavras-chave. Vence a primeira regra
+(na ordem do arquivo) que tenha alguma palavra-chave contida na descrição.
+
+O classificador monta uma única vez um autômato Aho-Corasick com todas as
+palavras-chave e percorre cada descrição uma só vez, encontrando categoria e
+marca juntas, com custo proporcional ao tamanho do texto e não ao número de
+regras. Para o motor vetorizado as mesmas regras também viram uma alternância
+compilada por regra (``category_patterns``/``brand_patterns``), aplicada a uma
+coluna inteira de uma vez.
+"""
+
+import json
+import os
+import re
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_RULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'classification_rules.json')
+
+Rules = Sequence[Tuple[str, Sequence[str]]]
+
+NO_MATCH = 1 << 30
+
+class KeywordClassifier:
+    """Autômato Aho-Corasick que devolve (categoria, marca) de uma descrição"""
+
+    def __init__(self, categories: Rules, brands: Rules,
+                 default_category: str = 'Geral', default_brand: str = 'Pet Shop'):
+        self.categories = [(name, [k.lower() for k in keywords]) for name, keywords in categories]
+        self.brands = [(name, [k.lower() for k in keywords]) for name, keywords in brands]
+        self.default_category = default_category
+        self.default_brand = default_brand
+        self._build()
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_RULES) -> 'KeywordClassifier':
+        with open(path, 'r', encoding='utf-8') as f:
+            rules = json.load(f)
+        return cls(
+            [(r['name'], r['keywords']) for r in rules['categories']],
+            [(r['name'], r['keywords']) for r in rules.get('brands', [])],
+            rules.get('default_category', 'Geral'),
+            rules.get('default_brand', 'Pet Shop'),
+        )
+
+    def _build(self) -> None:
+        # Trie das palavras-chave. Cada nó guarda a menor prioridade (índice da
+        # regra) de categoria e de marca que termina nele.
+        goto: List[Dict[str, int]] = [{}]
+        best_category: List[int] = [NO_MATCH]
+        best_brand: List[int] = [NO_MATCH]
+
+        def insert(keyword: str, priority: int, best: List[int]) -> None:
+            node = 0
+            for ch in keyword:
+                if ch not in goto[node]:
+                    goto.append({})
+                    best_category.append(NO_MATCH)
+                    best_brand.append(NO_MATCH)
+                    goto[node][ch] = len(goto) - 1
+                node = goto[node][ch]
+            best[node] = min(best[node], priority)
+
+        for priority, (_, keywords) in enumerate(self.categories):
+            for keyword in keywords:
+                insert(keyword, priority, best_category)
+        for priority, (_, keywords) in enumerate(self.brands):
+            for keyword in keywords:
+                insert(keyword, priority, best_brand)
+
+        # Links de falha em BFS; cada nó herda o melhor resultado do seu sufixo
+        # e a tabela de transições fica completa para o alfabeto das regras.
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            suffix = fail[node]
+            best_category[node] = min(best_category[node], best_category[suffix])
+            best_brand[node] = min(best_brand[node], best_brand[suffix])
+            delta[node] = dict(delta[suffix])
+            for ch, child in goto[node].items():
+                fail[child] = delta[suffix].get(ch, 0) if node else 0
+                delta[node][ch] = child
+                queue.append(child)
+
+        self._delta = delta
+        self._best_category = best_category
+        self._best_brand = best_brand
+        self.category_patterns = compile_rules(self.categories)
+        self.brand_patterns = compile_rules(self.brands)
+
+    def classify(self, description: Optional[str]) -> Tuple[str, str]:
+        """Retorna (categoria, marca) em uma única passada pela descrição"""
+        if not description:
+            return self.default_category, self.default_brand
+        delta, best_category, best_brand = self._delta, self._best_category, self._best_brand
+        category = brand = NO_MATCH
+        node = 0
+        for ch in description.lower():
+            node = delta[node].get(ch, 0)
+            if best_category[node] < category:
+                category = best_category[node]
+            if best_brand[node] < brand:
+                brand = best_brand[node]
+        return (self.categories[category][0] if category != NO_MATCH else self.default_category,
+                self.brands[brand][0] if brand != NO_MATCH else self.default_brand)
+
+    def category(self, description: Optional[str]) -> str:
+        return self.classify(description)[0]
+
+    def brand(self, description: Optional[str]) -> str:
+        return self.classify(description)[1]
+
+def compile_rules(rules: Sequence[Tuple[str, Sequence[str]]]) -> List[Tuple[str, 're.Pattern']]:
+    """Uma alternância pré-compilada por regra, na ordem de prioridade"""
+    # Regras sem palavras-chave nunca casam (o padrão vazio casaria com tudo)
+    return [(name, re.compile('|'.join(map(re.escape, keywords))))
+            for name, keywords in rules if keywords]
+
+_default: Optional[KeywordClassifier] = None
+
+def default_classifier() -> KeywordClassifier:
+    """Classificador com as regras padrão, carregado uma vez por processo"""
+    global _default
+    if _default is None:
+        _default = KeywordClassifier.from_file()
+    return _default
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Saída colunar (Parquet / Arrow IPC) do catálogo de produtos.
+
+Os produtos gerados pelos conversores são gravados com um schema tipado:
+preços em float64, estoque em int32, ``dimensions`` e ``seo`` como structs,
+``images``/``tags``/``seo.keywords`` como listas de strings e as datas como
+timestamps UTC. Categoria e marca usam dicionário, já que se repetem muito.
+
+A gravação é feita em lotes (row groups), então funciona também com os
+iteradores do modo ``--stream``. Com ``partition_by`` o Parquet vira um
+diretório no layout Hive (``category=Brinquedos/part-0.parquet``), que
+``pyarrow.dataset`` e DuckDB leem filtrando só as partições necessárias.
+
+O ``pyarrow`` é opcional: só é importado quando uma saída colunar é pedida.
+"""
+
+import os
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import quote
+
+FORMATS = ('parquet', 'arrow')
+PARTITION_COLUMNS = ('category', 'brand')
+DEFAULT_COMPRESSION = 'snappy'  # o leitor do frontend (parquetjs-lite) não lê zstd
+IPC_COMPRESSIONS = ('lz4', 'zstd')  # únicas aceitas pelo Arrow IPC; as demais gravam sem compressão
+BATCH_SIZE = 10000
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError("A saída Parquet/Arrow requer o pacote pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+@lru_cache(maxsize=None)
+def product_schema():
+    """Schema Arrow dos produtos do catálogo"""
+    pa = _pyarrow()
+    text = pa.string()
+    label = pa.dictionary(pa.int32(), pa.string())
+    timestamp = pa.timestamp('s', tz='UTC')
+    return pa.schema([
+        ('id', pa.int64()),
+        ('name', text),
+        ('slug', text),
+        ('price', pa.float64()),
+        ('originalPrice', pa.float64()),
+        ('cost', pa.float64()),
+        ('margin', pa.float64()),
+        ('image', text),
+        ('images', pa.list_(text)),
+        ('description', text),
+        ('shortDescription', text),
+        ('category', label),
+        ('brand', label),
+        ('stock', pa.int32()),
+        ('inStock', pa.bool_()),
+        ('featured', pa.bool_()),
+        ('active', pa.bool_()),
+        ('weight', pa.float64()),
+        ('dimensions', pa.struct([('width', pa.int32()), ('height', pa.int32()), ('depth', pa.int32())])),
+        ('tags', pa.list_(text)),
+        ('seo', pa.struct([('title', text), ('description', text), ('keywords', pa.list_(text))])),
+        ('createdAt', timestamp),
+        ('updatedAt', timestamp),
+    ])
+
+@lru_cache(maxsize=64)
+def _timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def _row(product: Dict[str, Any]) -> Dict[str, Any]:
+    row = dict(product)
+    for key in ('createdAt', 'updatedAt'):
+        if row.get(key):
+            row[key] = _timestamp(row[key])
+    return row
+
+def _partition_dir(root: str, column: str, value: Any) -> str:
+    return os.path.join(root, f"{column}={quote(str(value), safe='')}")
+
+class ColumnarWriter:
+    """Grava produtos em Parquet ou Arrow IPC em lotes, opcionalmente particionados"""
+
+    def __init__(self, path: str, fmt: str = 'parquet', partition_by: Optional[str] = None,
+                 compression: Optional[str] = DEFAULT_COMPRESSION, batch_size: int = BATCH_SIZE):
+        if fmt not in FORMATS:
+            raise ValueError(f"Formato colunar inválido: {fmt}")
+        if partition_by is not None and (fmt != 'parquet' or partition_by not in PARTITION_COLUMNS):
+            raise ValueError(f"Particionamento suportado apenas em Parquet por {', '.join(PARTITION_COLUMNS)}")
+        self.pa = _pyarrow()
+        self.path = path
+        self.fmt = fmt
+        self.partition_by = partition_by
+        self.compression = compression
+        self.batch_size = batch_size
+        self.schema = product_schema()
+        if partition_by:
+            self.file_schema = self.schema.remove(self.schema.get_field_index(partition_by))
+        else:
+            self.file_schema = self.schema
+        self.count = 0
+        # Os dicionários só crescem, mantendo os códigos estáveis entre lotes
+        self._labels = {field.name: {} for field in self.schema
+                        if self.pa.types.is_dictionary(field.type)}
+        self._plain_schema = self.pa.schema([
+            field.with_type(field.type.value_type) if field.name in self._labels else field
+            for field in self.schema
+        ])
+        self._pending: Dict[Any, List[Dict[str, Any]]] = {}
+        self._writers: Dict[Any, Any] = {}
+
+    def write(self, product: Dict[str, Any]) -> None:
+        key = product[self.partition_by] if self.partition_by else None
+        pending = self._pending.setdefault(key, [])
+        pending.append(_row(product))
+        self.count += 1
+        if len(pending) >= self.batch_size:
+            self._flush(key)
+
+    def track(self, products: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Repassa os produtos gravando cada um, para compartilhar uma única leitura do CSV"""
+        for product in products:
+            self.write(product)
+            yield product
+
+    def _open(self, key: Any):
+        if self.fmt == 'arrow':
+            # Categorias novas em lotes seguintes viram deltas do mesmo dicionário
+            compression = self.compression if self.compression in IPC_COMPRESSIONS else None
+            options = self.pa.ipc.IpcWriteOptions(compression=compression, emit_dictionary_deltas=True)
+            return self.pa.ipc.new_file(self.path, self.schema, options=options)
+        path = self.path
+        if self.partition_by:
+            directory = _partition_dir(self.path, self.partition_by, key)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, 'part-0.parquet')
+        return self.pa.parquet.ParquetWriter(path, self.file_schema, compression=self.compression)
+
+    def _flush(self, key: Any) -> None:
+        rows = self._pending.pop(key, None)
+        if not rows:
+            return
+        table = self.pa.Table.from_pylist(rows, schema=self._plain_schema)
+        for name, labels in self._labels.items():
+            codes = [None if value is None else labels.setdefault(value, len(labels))
+                     for value in table.column(name).to_pylist()]
+            encoded = self.pa.DictionaryArray.from_arrays(
+                self.pa.array(codes, self.pa.int32()), self.pa.array(list(labels), self.pa.string()))
+            index = table.schema.get_field_index(name)
+            table = table.set_column(index, self.schema.field(name), encoded)
+        if self.partition_by:
+            table = table.drop_columns([self.partition_by])
+        if key not in self._writers:
+            self._writers[key] = self._open(key)
+        self._writers[key].write_table(table)
+
+    def close(self) -> int:
+        for key in list(self._pending):
+            self._flush(key)
+        if not self._writers:
+            # Catálogo vazio ainda gera um arquivo válido com o schema
+            if self.partition_by:
+                os.makedirs(self.path, exist_ok=True)
+            else:
+                self._writers[None] = self._open(None)
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+        return self.count
+
+    def __enter__(self) -> 'ColumnarWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def save_products_columnar(products: Iterable[Dict[str, Any]], path: str, fmt: str = 'parquet',
+                           partition_by: Optional[str] = None,
+                           compression: Optional[str] = DEFAULT_COMPRESSION) -> int:
+    """Grava a lista (ou iterador) de produtos em Parquet/Arrow e devolve a quantidade"""
+    with ColumnarWriter(path, fmt, partition_by, compression) as writer:
+        for product in products:
+            writer.write(product)
+    return writer.count
+
+def read_products_columnar(path: str, fmt: str = 'parquet', columns: Optional[List[str]] = None):
+    """Lê o catálogo colunar (arquivo ou diretório particionado) como tabela Arrow"""
+    pa = _pyarrow()
+    if fmt == 'arrow':
+        table = pa.ipc.open_file(path).read_all()
+        return table.select(columns) if columns else table
+    if os.path.isdir(path):
+        import pyarrow.dataset as ds
+        return ds.dataset(path, format='parquet', partitioning='hive').to_table(columns=columns)
+    return pa.parquet.read_table(path, columns=columns)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Converte várias planilhas de fornecedores em um único catálogo JSON.
+
+Cada planilha é reconhecida por um layout de ``data/sheet_layouts.json``
+(coluna marcadora + mapeamento das colunas da planilha para os campos usados
+por ``process_products.transform_row``). As linhas são lidas no processo
+principal e transformadas em lotes por um pool de processos, com um número
+limitado de lotes em andamento; os resultados são reunidos na ordem dos
+arquivos e das linhas, de modo que os ids são sempre os mesmos para as mesmas
+entradas, independentemente de quantos processos forem usados. Produtos
+repetidos (mesmo código de barras ou, na falta dele, mesmo código do
+fornecedor em planilhas do mesmo layout) ficam só com a primeira ocorrência.
+
+Uso:
+    python process_catalogs.py saida.json planilha1.csv planilha2.csv --workers 4
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from process_products import (BASE_DIR, CatalogSummary, columnar_outputs, save_products_columnar,
+                              save_products_json, transform_row)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LAYOUTS = os.path.join(BASE_DIR, 'data', 'sheet_layouts.json')
+CHUNK_SIZE = 5000
+
+Row = Dict[str, Optional[str]]
+
+def load_layouts(path: str = DEFAULT_LAYOUTS) -> Dict[str, Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def detect_layout(columns: List[str], layouts: Dict[str, Dict[str, Any]]) -> str:
+    """Nome do primeiro layout cuja coluna marcadora está na planilha"""
+    for name, layout in layouts.items():
+        if layout['marker'] in columns:
+            return name
+    raise ValueError(f"Layout de planilha desconhecido, colunas: {columns}")
+
+def read_columns(path: str) -> List[str]:
+    """Cabeçalho do CSV, com colunas repetidas renomeadas como no pandas (PRODUTO, PRODUTO.1)"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        header = next(csv.reader(f), [])
+    columns, counts = [], {}
+    for name in header:
+        if name in counts:
+            counts[name] += 1
+            name = f'{name}.{counts[name]}'
+        else:
+            counts[name] = 0
+        columns.append(name)
+    return columns
+
+def read_sheet_rows(path: str, columns: List[str]) -> Iterator[Row]:
+    """Linhas do CSV depois do cabeçalho; o arquivo só fica aberto enquanto o gerador é consumido"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for values in reader:
+            yield {k: (v if v != '' else None) for k, v in zip(columns, values)}
+
+def map_row(row: Row, layout: Dict[str, Any]) -> Row:
+    """Traduz a linha da planilha para os campos de transform_row"""
+    mapped = dict(layout.get('defaults', {}))
+    for field, column in layout['columns'].items():
+        if column is not None:
+            mapped[field] = row.get(column)
+        else:
+            mapped.setdefault(field, None)
+    return mapped
+
+def is_layout_product(row: Row, layout: Dict[str, Any]) -> bool:
+    code, name = (row['id'] or '').strip(), (row['description'] or '').strip()
+    if not code or not name:
+        return False
+    # Em algumas planilhas os cabeçalhos de seção são as linhas em maiúsculas
+    return not (layout.get('header_uppercase') and name.isupper())
+
+def normalize_code(value: Optional[str]) -> Optional[str]:
+    # "CÓD. 0000" e "CÓD.0000" aparecem para o mesmo código
+    value = re.sub(r'\s+', '', value or '')
+    return value or None
+
+def transform_chunk(rows: List[Row], layout: Dict[str, Any]) -> Tuple[List[Tuple], float]:
+    """Executado nos processos do pool: (código, código de barras, produto) de cada linha válida"""
+    start = time.process_time()
+    results = []
+    for row in rows:
+        row = map_row(row, layout)
+        if not is_layout_product(row, layout):
+            continue
+        product = transform_row(row, 0)
+        if product is not None:
+            results.append((normalize_code(row['id']), normalize_code(row['barcode']), product))
+    return results, time.process_time() - start
+
+class FileStats:
+    """Vazão de uma planilha: linhas lidas, produtos gerados e tempo gasto"""
+
+    def __init__(self, path: str, layout: str):
+        self.path = path
+        self.layout = layout
+        self.rows = 0
+        self.products = 0
+        self.duplicates = 0
+        self.read_seconds = 0.0
+        self.transform_seconds = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        seconds = self.read_seconds + self.transform_seconds
+        return self.rows / seconds if seconds else 0.0
+
+def iter_chunks(paths: List[str], layouts: Dict[str, Dict[str, Any]],
+                chunk_size: int) -> Iterator[Tuple[FileStats, List[Row], bool]]:
+    """Lê as planilhas em ordem, em lotes: (estatísticas do arquivo, linhas, último lote do arquivo)"""
+    for path in paths:
+        start = time.perf_counter()
+        columns = read_columns(path)
+        stats = FileStats(path, detect_layout(columns, layouts))
+        chunk: List[Row] = []
+        # Fecha a planilha mesmo se quem consome os lotes parar no meio
+        with closing(read_sheet_rows(path, columns)) as rows:
+            for row in rows:
+                chunk.append(row)
+                stats.rows += 1
+                if len(chunk) >= chunk_size:
+                    stats.read_seconds += time.perf_counter() - start
+                    yield stats, chunk, False
+                    start = time.perf_counter()
+                    chunk = []
+        stats.read_seconds += time.perf_counter() - start
+        yield stats, chunk, True
+
+def process_files(paths: List[str], layouts: Dict[str, Dict[str, Any]], workers: Optional[int] = None,
+                  chunk_size: int = CHUNK_SIZE,
+                  max_pending: Optional[int] = None) -> Tuple[List[Dict[str, Any]], List[FileStats]]:
+    """Transforma as planilhas em paralelo e junta os produtos com ids determinísticos.
+
+    No máximo ``max_pending`` lotes (padrão: dois por processo) ficam no pool
+    ao mesmo tempo; a leitura espera o lote mais antigo ser consumido, então a
+    memória não cresce com o tamanho total das planilhas.
+    """
+    products: List[Dict[str, Any]] = []
+    all_stats: List[FileStats] = []
+    seen = set()
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    pending: deque = deque()
+
+    def collect(stats: FileStats, future: Any, last: bool) -> None:
+        results, seconds = future.result()
+        stats.transform_seconds += seconds
+        for code, barcode, product in results:
+            # Códigos internos só identificam o produto dentro do mesmo fornecedor
+            key = ('barcode', barcode) if barcode else ('code', stats.layout, code)
+            if key in seen:
+                stats.duplicates += 1
+                continue
+            seen.add(key)
+            product['id'] = len(products) + 1
+            products.append(product)
+            stats.products += 1
+        if last:
+            logger.info("%s: %d linhas, %d produtos", stats.path, stats.rows, stats.products)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            closing(iter_chunks(paths, layouts, chunk_size)) as chunks:
+        for stats, chunk, last in chunks:
+            if not all_stats or all_stats[-1] is not stats:
+                all_stats.append(stats)
+            pending.append((stats, pool.submit(transform_chunk, chunk, layouts[stats.layout]), last))
+            # A junção segue a ordem dos arquivos e dos lotes, não a de conclusão
+            if len(pending) >= max_pending:
+                collect(*pending.popleft())
+        while pending:
+            collect(*pending.popleft())
+    return products, all_stats
+
+def print_stats(stats: List[FileStats]) -> None:
+    print(f"\n{'arquivo':<50} {'layout':<12} {'linhas':>8} {'produtos':>8} {'repetidos':>9} {'linhas/s':>10}")
+    for s in stats:
+        name = os.path.basename(s.path)
+        print(f"{name[:50]:<50} {s.layout:<12} {s.rows:>8} {s.products:>8} {s.duplicates:>9} "
+              f"{s.rows_per_second:>10.0f}")
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Converte várias planilhas de fornecedores em um catálogo JSON')
+    parser.add_argument('output_file')
+    parser.add_argument('csv_files', nargs='+')
+    parser.add_argument('--layouts', default=DEFAULT_LAYOUTS,
+                        help='JSON com os layouts de planilha (padrão: data/sheet_layouts.json)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='processos no pool (padrão: número de CPUs)')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help=f'linhas por lote enviado ao pool (padrão: {CHUNK_SIZE})')
+    parser.add_argument('--parquet', metavar='CAMINHO',
+                        help='também grava o catálogo em Parquet (requer pyarrow)')
+    parser.add_argument('--arrow', metavar='CAMINHO',
+                        help='também grava o catálogo em Arrow IPC (requer pyarrow)')
+    parser.add_argument('--partition-by', choices=('category', 'brand'),
+                        help='grava o Parquet como diretório particionado por esta coluna')
+    parser.add_argument('--compression', default='snappy')
+    parser.add_argument('--no-summary', action='store_true', help='não imprime o resumo')
+    parser.add_argument('-v', '--verbose', action='count', default=0)
+    args = parser.parse_args(argv)
+    if args.partition_by and not args.parquet:
+        parser.error('--partition-by requer --parquet')
+    return args
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format='%(message)s')
+
+    try:
+        start = time.perf_counter()
+        products, stats = process_files(args.csv_files, load_layouts(args.layouts),
+                                        args.workers, args.chunk_size)
+        if not products:
+            print("Nenhum produto foi processado. Verifique as planilhas.")
+            return 1
+        save_products_json(products, args.output_file)
+        for output in columnar_outputs(args):
+            save_products_columnar(products, *output)
+
+        print_stats(stats)
+        total_rows = sum(s.rows for s in stats)
+        elapsed = time.perf_counter() - start
+        print(f"\nTotal: {total_rows} linhas, {len(products)} produtos em {elapsed:.2f}s "
+              f"({total_rows / elapsed:.0f} linhas/s)")
+        if not args.no_summary:
+            summary = CatalogSummary()
+            for product in products:
+                summary.add(product)
+            summary.print()
+        print(f"📁 Arquivo gerado: {args.output_file}")
+        return 0
+
+    except Exception as e:
+        print(f"❌ Erro durante o processamento: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,42 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import pandas as pd
+import argparse
+import csv
+import hashlib
 import json
+import logging
+import os
 import re
-from typing import Dict, Any, List, Optional
+import sys
+from typing import Dict, Any, Iterable, Iterator, List, Mapping, Optional, TextIO
+
+import numpy as np
+import pandas as pd
+
+from catalog_classifier import DEFAULT_RULES, default_classifier
+from catalog_columnar import ColumnarWriter, PARTITION_COLUMNS, save_products_columnar
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV = os.path.join(BASE_DIR, 'data', 'TABELA INJETADOS SHOPEE UTL.xlsx - produtos.csv')
+DEFAULT_JSON = os.path.join(BASE_DIR, 'public', 'data', 'produtos.json')
+# Incrementar quando a transformação mudar, para invalidar os manifestos antigos
+MANIFEST_VERSION = 3
 
 def clean_currency_value(value: str) -> float:
     """Limpa valores monetários brasileiros e converte para float"""
     if pd.isna(value) or value == '' or not isinstance(value, str):
         return 0.0
     
-    # Remove R$, espaços, e converte vírgula para ponto
+    # Remove R$, espaços
     cleaned = re.sub(r'R\$\s*', '', str(value))
-    cleaned = cleaned.replace('.', '').replace(',', '.')
+
+    # Se contém vírgula, assume formato brasileiro (1.234,56); senão o ponto é
+    # o separador decimal, como nas planilhas dos fornecedores (R$ 15.90)
+    if ',' in cleaned:
+        cleaned = cleaned.replace('.', '').replace(',', '.')
     
     try:
         return float(cleaned)
@@ -36,41 +59,17 @@ def clean_percentage_value(value: str) -> float:
 def extract_category_from_description(description: str) -> str:
     """Extrai categoria baseada na descrição do produto"""
     if pd.isna(description) or description == '':
-        return 'Geral'
+        return default_classifier().default_category
     
-    desc_lower = description.lower()
-    
-    # Mapeamento de palavras-chave para categorias
-    category_keywords = {
-        'Comedouros e Bebedouros': ['comedouro', 'bebedouro', 'af', 'anti-formiga'],
-        'Brinquedos': ['ratinho', 'varinha', 'bola', 'brinquedo', 'rato'],
-        'Higiene': ['escova', 'tira pelo', 'luva', 'vapor', 'pente', 'pulga'],
-        'Acessórios para Gato': ['bandeja', 'pá', 'gato', 'kit', 'graminha', 'trilho'],
-        'Acessórios para Cão': ['xixi dog', 'sanitário', 'cão'],
-        'Transporte': ['caixa', 'transporte', 'mma'],
-        'Diversos': ['mamadeira', 'refil', 'cata caca', 'caneta', 'gravadora']
-    }
-    
-    for category, keywords in category_keywords.items():
-        if any(keyword in desc_lower for keyword in keywords):
-            return category
-    
-    return 'Geral'
+    # Regras em data/classification_rules.json (vence a primeira que casar)
+    return default_classifier().category(description)
 
 def determine_brand(description: str, ncm: str) -> str:
     """Determina a marca baseada na descrição e NCM"""
     if pd.isna(description):
-        return 'Pet Shop'
-    
-    # Algumas marcas conhecidas que podem aparecer
-    known_brands = ['ferplast', 'mma']
-    desc_lower = description.lower()
-    
-    for brand in known_brands:
-        if brand in desc_lower:
-            return brand.title()
+        return default_classifier().default_brand
     
-    return 'Pet Shop'
+    return default_classifier().brand(description)
 
 def estimate_stock(cost: float, margin: float) -> int:
     """Estima estoque baseado no custo e margem"""
@@ -95,186 +94,643 @@ def generate_slug(name: str) -> str:
     
     return slug or 'produto'
 
-def process_csv_to_products(csv_file_path: str) -> List[Dict[str, Any]]:
-    """Processa o arquivo CSV e retorna lista de produtos formatados"""
-    
-    print(f"Lendo arquivo CSV: {csv_file_path}")
-    
-    # Lê o CSV
-    df = pd.read_csv(csv_file_path, encoding='utf-8')
-    
-    print(f"Colunas encontradas: {list(df.columns)}")
-    print(f"Total de linhas: {len(df)}")
-    
-    products = []
+def is_product_row(row: Mapping[str, Any]) -> bool:
+    """Indica se a linha é um produto (e não cabeçalho de categoria ou vazia)"""
+    return not (pd.isna(row['id']) or
+                str(row['id']).strip() == '' or
+                pd.isna(row['description']) or
+                str(row['description']).strip() == '' or
+                str(row['description']).strip().isupper())  # Cabeçalhos são em maiúscula
+
+def row_to_product(row: Mapping[str, Any], product_id: int) -> Optional[Dict[str, Any]]:
+    """Converte uma linha da planilha em produto; retorna None se a linha for ignorada"""
+    if not is_product_row(row):
+        return None
+    return transform_row(row, product_id)
+
+def transform_row(row: Mapping[str, Any], product_id: int) -> Optional[Dict[str, Any]]:
+    """Transforma uma linha já reconhecida como produto; None se não tiver nome ou preço válido"""
+    # Extrai e limpa os dados
+    name = str(row['description']).strip()
+    if not name or name == 'nan':
+        return None
+
+    # Limpa quebras de linha do nome
+    name = re.sub(r'\s+', ' ', name.replace('\n', ' '))
+
+    unit_price = clean_currency_value(row['unit_price'])
+    promo_price = clean_currency_value(row['promo_price'])
+    cost = clean_currency_value(row['cost'])
+    margin = clean_percentage_value(row['margin'])
+
+    # Usa o menor preço entre unit_price e promo_price (se houver)
+    final_price = unit_price
+    if promo_price > 0 and promo_price < unit_price:
+        final_price = promo_price
+
+    # Pula produtos sem preço válido
+    if final_price <= 0:
+        return None
+
+    # Gera os campos derivados
+    # Categoria e marca saem de uma única passada pela descrição
+    category, brand = default_classifier().classify(name)
+    stock = estimate_stock(cost, margin)
+    slug = generate_slug(name)
+
+    return build_product(product_id, name, slug, unit_price, promo_price, final_price,
+                         cost, margin, category, brand, stock,
+                         str(row.get('cadastro', '')).lower() == 'ok')
+
+def build_product(product_id: int, name: str, slug: str, unit_price: float,
+                  promo_price: float, final_price: float, cost: float, margin: float,
+                  category: str, brand: str, stock: int, active: bool) -> Dict[str, Any]:
+    """Monta o produto no formato do catálogo a partir dos campos já calculados"""
+    return {
+        'id': product_id,
+        'name': name,
+        'slug': slug,
+        'price': round(final_price, 2),
+        'originalPrice': round(unit_price, 2) if promo_price > 0 and promo_price < unit_price else None,
+        'cost': round(cost, 2),
+        'margin': round(margin, 2),
+        'image': f'/images/products/{slug}.jpg',
+        'images': [
+            f'/images/products/{slug}.jpg',
+            f'/images/products/{slug}-2.jpg'
+        ],
+        'description': f'{name}. Produto de alta qualidade para seu pet.',
+        'shortDescription': name,
+        'category': category,
+        'brand': brand,
+        'stock': stock,
+        'inStock': stock > 0,
+        'featured': margin > 150,  # Produtos com alta margem são destaque
+        'active': active,
+        'weight': 0.5,  # Peso padrão em kg
+        'dimensions': {
+            'width': 10,
+            'height': 5,
+            'depth': 10
+        },
+        'tags': [
+            category.lower().replace(' ', '-'),
+            brand.lower(),
+            'pet',
+            'animal'
+        ],
+        'seo': {
+            'title': f'{name} - {brand}',
+            'description': f'Compre {name} na nossa loja. {category} de qualidade para seu pet.',
+            'keywords': [name.lower(), category.lower(), brand.lower(), 'pet']
+        },
+        'createdAt': '2025-01-01T00:00:00Z',
+        'updatedAt': '2025-01-01T00:00:00Z'
+    }
+
+def iter_products(rows: Iterable[Mapping[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Transforma linhas em produtos sob demanda, numerando os ids em sequência"""
     product_id = 1
-    
-    for index, row in df.iterrows():
-        # Pula linhas que são cabeçalhos de categoria ou vazias
-        if (pd.isna(row['id']) or 
-            str(row['id']).strip() == '' or 
-            pd.isna(row['description']) or 
-            str(row['description']).strip() == '' or
-            str(row['description']).strip().isupper()):  # Cabeçalhos são em maiúscula
-            continue
-        
-        # Extrai e limpa os dados
-        name = str(row['description']).strip()
-        if not name or name == 'nan':
+    for row in rows:
+        product = row_to_product(row, product_id)
+        if product is None:
             continue
-            
-        # Limpa quebras de linha do nome
-        name = re.sub(r'\s+', ' ', name.replace('\n', ' '))
-        
-        unit_price = clean_currency_value(row['unit_price'])
-        promo_price = clean_currency_value(row['promo_price'])
-        cost = clean_currency_value(row['cost'])
-        margin = clean_percentage_value(row['margin'])
-        
-        # Usa o menor preço entre unit_price e promo_price (se houver)
-        final_price = unit_price
-        if promo_price > 0 and promo_price < unit_price:
-            final_price = promo_price
-        
-        # Pula produtos sem preço válido
-        if final_price <= 0:
-            continue
-        
-        # Gera os campos derivados
-        category = extract_category_from_description(name)
-        brand = determine_brand(name, str(row.get('NCM', '')))
-        stock = estimate_stock(cost, margin)
-        slug = generate_slug(name)
-        
-        # Cria o produto
-        product = {
-            'id': product_id,
-            'name': name,
-            'slug': slug,
-            'price': round(final_price, 2),
-            'originalPrice': round(unit_price, 2) if promo_price > 0 and promo_price < unit_price else None,
-            'cost': round(cost, 2),
-            'margin': round(margin, 2),
-            'image': f'/images/products/{slug}.jpg',
-            'images': [
-                f'/images/products/{slug}.jpg',
-                f'/images/products/{slug}-2.jpg'
-            ],
-            'description': f'{name}. Produto de alta qualidade para seu pet.',
-            'shortDescription': name,
-            'category': category,
-            'brand': brand,
-            'stock': stock,
-            'inStock': stock > 0,
-            'featured': margin > 150,  # Produtos com alta margem são destaque
-            'active': str(row.get('cadastro', '')).lower() == 'ok',
-            'weight': 0.5,  # Peso padrão em kg
-            'dimensions': {
-                'width': 10,
-                'height': 5,
-                'depth': 10
-            },
-            'tags': [
-                category.lower().replace(' ', '-'),
-                brand.lower(),
-                'pet',
-                'animal'
-            ],
-            'seo': {
-                'title': f'{name} - {brand}',
-                'description': f'Compre {name} na nossa loja. {category} de qualidade para seu pet.',
-                'keywords': [name.lower(), category.lower(), brand.lower(), 'pet']
-            },
-            'createdAt': '2025-01-01T00:00:00Z',
-            'updatedAt': '2025-01-01T00:00:00Z'
-        }
-        
-        products.append(product)
+        logger.debug("Produto %d: %s - R$ %s", product_id, product['name'], product['price'])
         product_id += 1
-        
-        print(f"Produto {product_id-1}: {name} - R$ {final_price}")
-    
-    print(f"\nTotal de produtos processados: {len(products)}")
+        yield product
+
+def _parse_float(text: str) -> float:
+    try:
+        return float(text)
+    except (ValueError, TypeError):
+        return 0.0
+
+def clean_currency_series(values: pd.Series) -> pd.Series:
+    """Versão vetorizada de clean_currency_value"""
+    cleaned = values.str.replace(r'R\$\s*', '', regex=True)
+    comma = cleaned.str.contains(',', regex=False).fillna(False).astype(bool)
+    cleaned = cleaned.where(~comma, cleaned.str.replace('.', '', regex=False)
+                                           .str.replace(',', '.', regex=False))
+    # float() por elemento mantém o resultado idêntico ao caminho linha a linha
+    return cleaned.map(_parse_float, na_action='ignore').where(cleaned.notna(), 0.0).astype(float)
+
+def clean_percentage_series(values: pd.Series) -> pd.Series:
+    """Versão vetorizada de clean_percentage_value"""
+    cleaned = values.str.replace('%', '', regex=False).str.replace(',', '.', regex=False)
+    return cleaned.map(_parse_float, na_action='ignore').where(cleaned.notna(), 0.0).astype(float)
+
+def _text_series(df: pd.DataFrame, column: str) -> pd.Series:
+    if column not in df:
+        return pd.Series('', index=df.index, dtype=object)
+    values = df[column]
+    if not (pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)):
+        # clean_*_value só aceita strings; colunas numéricas viram 0.0
+        return pd.Series(np.nan, index=df.index, dtype=object)
+    return values.astype(object)
+
+def classify_series(lower: pd.Series, patterns: List[tuple], default: str) -> pd.Series:
+    """Primeira regra (em ordem de prioridade) cujo padrão aparece no texto"""
+    if not len(lower) or not patterns:
+        return pd.Series(default, index=lower.index, dtype=object)
+    # Cada descrição distinta é testada uma só vez
+    codes, uniques = pd.factorize(lower)
+    uniques = pd.Series(uniques, dtype=object)
+    conditions = [uniques.str.contains(pattern).to_numpy(dtype=bool) for _, pattern in patterns]
+    names = np.array([name for name, _ in patterns], dtype=object)
+    matched = np.select(conditions, names, np.array(default, dtype=object))
+    return pd.Series(matched[codes], index=lower.index, dtype=object)
+
+def process_dataframe_vectorized(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Mesma transformação de row_to_product, aplicada coluna a coluna"""
+    # dtype object mantém a semântica de str/re do Python (o dtype string do
+    # pandas pode usar regex do pyarrow, em que \w não casa acentos)
+    ids = df['id']
+    text = df['description'].fillna('').astype(str).astype(object).str.strip()
+    keep = (ids.notna() & (ids.fillna('').astype(str).astype(object).str.strip() != '') &
+            df['description'].notna() & (text != '') & (text != 'nan') &
+            ~text.str.isupper().fillna(False).astype(bool))
+    df = df[keep]
+    name = text[keep].str.replace('\n', ' ', regex=False).str.replace(r'\s+', ' ', regex=True)
+
+    unit_price = clean_currency_series(_text_series(df, 'unit_price'))
+    promo_price = clean_currency_series(_text_series(df, 'promo_price'))
+    cost = clean_currency_series(_text_series(df, 'cost'))
+    margin = clean_percentage_series(_text_series(df, 'margin'))
+
+    # Usa o menor preço entre unit_price e promo_price (se houver)
+    use_promo = (promo_price > 0) & (promo_price < unit_price)
+    final_price = unit_price.where(~use_promo, promo_price)
+
+    # Pula produtos sem preço válido
+    valid = final_price > 0
+    df, name = df[valid], name[valid]
+    unit_price, promo_price, final_price = unit_price[valid], promo_price[valid], final_price[valid]
+    cost, margin = cost[valid], margin[valid]
+
+    lower = name.str.lower()
+    classifier = default_classifier()
+    category = classify_series(lower, classifier.category_patterns, classifier.default_category)
+    brand = classify_series(lower, classifier.brand_patterns, classifier.default_brand)
+    stock = np.select([cost <= 2.0, cost <= 10.0, cost <= 30.0], [25, 15, 8], 3)
+    slug = (lower.str.replace(r'[^\w\s-]', '', regex=True)
+                 .str.replace(r'[-\s]+', '-', regex=True)
+                 .str.strip('-'))
+    slug = slug.where(slug != '', 'produto')
+    active = _text_series(df, 'cadastro').fillna('').astype(str).astype(object).str.lower() == 'ok'
+
+    columns = zip(name.tolist(), slug.tolist(), unit_price.tolist(), promo_price.tolist(),
+                  final_price.tolist(), cost.tolist(), margin.tolist(), category.tolist(),
+                  brand.tolist(), stock.tolist(), active.tolist())
+    return [build_product(product_id, *fields) for product_id, fields in enumerate(columns, start=1)]
+
+def process_csv_to_products(csv_file_path: str, engine: str = 'rows') -> List[Dict[str, Any]]:
+    """Processa o arquivo CSV e retorna lista de produtos formatados"""
+
+    logger.info("Lendo arquivo CSV: %s", csv_file_path)
+
+    # Lê o CSV com todas as células como texto (só a célula vazia vira NaN),
+    # como o csv.DictReader do modo --stream: colunas puramente numéricas não
+    # viram float e os dois modos produzem o mesmo catálogo
+    df = pd.read_csv(csv_file_path, encoding='utf-8', dtype=str,
+                     keep_default_na=False, na_values=[''])
+
+    logger.info("Colunas encontradas: %s", list(df.columns))
+    logger.info("Total de linhas: %d", len(df))
+
+    if engine == 'vectorized':
+        products = process_dataframe_vectorized(df)
+    else:
+        products = list(iter_products(row for _, row in df.iterrows()))
+
+    logger.info("Total de produtos processados: %d", len(products))
     return products
 
+def iter_csv_rows(csv_file_path: str) -> Iterator[Dict[str, Optional[str]]]:
+    """Lê o CSV linha a linha; células vazias viram None, como NaN no pandas"""
+    with open(csv_file_path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            yield {k: (v if v != '' else None) for k, v in row.items()}
+
 def save_products_json(products: List[Dict[str, Any]], output_file: str):
     """Salva os produtos em formato JSON"""
-    
-    print(f"Salvando {len(products)} produtos em {output_file}")
-    
+
+    logger.info("Salvando %d produtos em %s", len(products), output_file)
+
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(products, f, ensure_ascii=False, indent=2)
-    
-    print("Arquivo JSON salvo com sucesso!")
 
-def generate_summary(products: List[Dict[str, Any]]):
-    """Gera um resumo dos produtos processados"""
-    
-    total_products = len(products)
-    categories = {}
-    brands = {}
-    price_ranges = {'0-10': 0, '10-25': 0, '25-50': 0, '50+': 0}
-    
+    logger.info("Arquivo JSON salvo com sucesso!")
+
+def json_fragment(product: Dict[str, Any], indent: int = 2) -> str:
+    """Produto serializado como item de um array JSON indentado, igual ao json.dump"""
+    pad = ' ' * indent
+    return pad + json.dumps(product, ensure_ascii=False, indent=indent).replace('\n', '\n' + pad)
+
+def write_json_array(products: Iterable[Dict[str, Any]], out: TextIO, indent: Optional[int] = 2) -> int:
+    """Escreve um array JSON item a item, com a mesma saída de json.dump"""
+    count = 0
+    for product in products:
+        if indent is None:
+            item = json.dumps(product, ensure_ascii=False)
+            out.write(', ' + item if count else '[' + item)
+        else:
+            item = json_fragment(product, indent)
+            out.write(',\n' + item if count else '[\n' + item)
+        count += 1
+    if not count:
+        out.write('[]')
+    else:
+        out.write(']' if indent is None else '\n]')
+    return count
+
+def write_json_lines(products: Iterable[Dict[str, Any]], out: TextIO) -> int:
+    """Escreve um produto JSON por linha (JSON Lines)"""
+    count = 0
     for product in products:
+        out.write(json.dumps(product, ensure_ascii=False, separators=(',', ':')))
+        out.write('\n')
+        count += 1
+    return count
+
+def stream_csv_to_file(csv_file_path: str, output_file: str, fmt: str = 'json',
+                       summary: Optional['CatalogSummary'] = None,
+                       columnar: Iterable[ColumnarWriter] = ()) -> int:
+    """Converte o CSV em streaming, com memória constante independente do tamanho"""
+    products = iter_products(iter_csv_rows(csv_file_path))
+    if summary is not None:
+        products = summary.track(products)
+    for writer in columnar:
+        products = writer.track(products)
+    with open(output_file, 'w', encoding='utf-8') as out:
+        if fmt == 'jsonl':
+            count = write_json_lines(products, out)
+        else:
+            count = write_json_array(products, out)
+    logger.info("%d produtos gravados em %s", count, output_file)
+    return count
+
+def row_hash(row: Mapping[str, Any]) -> str:
+    """Hash do conteúdo da linha da planilha, usado para detectar alterações"""
+    payload = json.dumps([row.get(k) for k in sorted(row)], ensure_ascii=False, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+def rules_hash(path: str = DEFAULT_RULES) -> str:
+    """Hash das regras de classificação: se mudarem, todas as linhas são refeitas"""
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    """Lê o manifesto código do fornecedor → (hash, id); vazio se não existir ou estiver obsoleto"""
+    empty = {'version': MANIFEST_VERSION, 'rules': rules_hash(), 'next_id': 1, 'items': {}}
+    if not os.path.exists(path):
+        return empty
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION or manifest.get('rules') != empty['rules']:
+        logger.info("Manifesto %s obsoleto; reprocessando todas as linhas", path)
+        # Mantém os ids já atribuídos, mas invalida os hashes
+        for item in manifest.get('items', {}).values():
+            item['hash'] = None
+        return dict(empty, next_id=manifest.get('next_id', 1), items=manifest.get('items', {}))
+    return manifest
+
+def save_manifest(manifest: Dict[str, Any], path: str) -> None:
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, path)
+
+def default_manifest_path(output_file: str) -> str:
+    return os.path.splitext(output_file)[0] + '.manifest.json'
+
+class IncrementalResult:
+    """Catálogo resultante e o patch (adicionados, alterados, removidos) da reconstrução"""
+
+    def __init__(self):
+        # Produtos inalterados ficam como o trecho de JSON já gravado, sem decodificar
+        self.entries: List[Any] = []
+        self.added: List[Dict[str, Any]] = []
+        self.updated: List[Dict[str, Any]] = []
+        self.removed: List[int] = []
+        self.unchanged = 0
+        # Produtos no catálogo; sem alterações, entries fica vazio mas count não
+        self.count = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+    def products(self) -> Iterator[Dict[str, Any]]:
+        """Decodifica os produtos do catálogo sob demanda, um a um"""
+        for entry in self.entries:
+            yield json.loads(entry) if isinstance(entry, str) else entry
+
+    def patch(self) -> Dict[str, Any]:
+        return {'added': self.added, 'updated': self.updated, 'removed': self.removed}
+
+def read_json_fragments(path: str) -> Dict[int, str]:
+    """Separa o array gravado por write_json_array em trechos por id, sem decodificar o JSON.
+
+    Como strings JSON não contêm quebras de linha, cada produto começa em uma
+    linha ``  {`` e termina em ``  }``; arquivos em outro formato são relidos
+    com json.load.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.read().split('\n')
+    fragments: Dict[int, str] = {}
+    if lines[0] == '[]':
+        return fragments
+    if lines[0] != '[' or lines[-1] != ']':
+        with open(path, 'r', encoding='utf-8') as f:
+            return {product['id']: json_fragment(product) for product in json.load(f)}
+    start = 1
+    for i in range(1, len(lines) - 1):
+        if lines[i] in ('  }', '  },'):
+            product_id = int(lines[start + 1].split(':', 1)[1].strip(' ,'))
+            fragments[product_id] = '\n'.join(lines[start:i]) + '\n  }'
+            start = i + 1
+    return fragments
+
+def incremental_build(csv_file_path: str, output_file: str, manifest_file: Optional[str] = None,
+                      patch_file: Optional[str] = None,
+                      summary: Optional['CatalogSummary'] = None) -> IncrementalResult:
+    """Reconstrói o catálogo reprocessando só as linhas novas ou alteradas.
+
+    Cada produto ganha um id estável ligado ao código do fornecedor (coluna ``id``
+    da planilha), guardado no manifesto junto com o hash da linha. Códigos
+    repetidos continuam sendo produtos distintos, como na conversão completa: a
+    partir da segunda ocorrência a chave leva o número dela (``010210#2``).
+    Linhas com o mesmo hash reaproveitam o trecho já gravado em
+    ``output_file``; códigos que sumiram da planilha são removidos e seus ids
+    não são reutilizados. Sem
+    manifesto, os ids seguem a ordem das linhas, como na conversão completa, e a
+    saída é idêntica à de save_products_json.
+
+    Linhas sem preço válido também ficam no manifesto (sem id), para não serem
+    refeitas a cada execução. O manifesto guarda ainda categoria, marca e preço
+    de cada produto, com os quais ``summary`` é preenchido sem decodificar o
+    catálogo.
+    """
+    manifest_file = manifest_file or default_manifest_path(output_file)
+    manifest = load_manifest(manifest_file)
+    items = manifest['items']
+
+    # Primeira passada: só hashes, para saber se há algo a refazer
+    rows = []
+    seen = set()
+    occurrences: Dict[str, int] = {}
+    for row in iter_csv_rows(csv_file_path):
+        if not is_product_row(row):
+            continue
+        code = str(row['id']).strip()
+        occurrence = occurrences[code] = occurrences.get(code, 0) + 1
+        if occurrence > 1:
+            code = f'{code}#{occurrence}'
+        seen.add(code)
+        digest = row_hash(row)
+        item = items.get(code)
+        rows.append((code, digest, row, item is None or item['hash'] != digest))
+
+    result = IncrementalResult()
+    stale = [code for code in items if code not in seen]
+    if not stale and not any(changed for *_, changed in rows) and os.path.exists(output_file):
+        for code, *_ in rows:
+            item = items[code]
+            if item['id'] is not None:
+                result.count += 1
+                if summary is not None:
+                    summary.count(*item['summary'])
+        result.unchanged = result.count
+        logger.info("Nenhuma alteração; %s mantido", output_file)
+        if patch_file:
+            with open(patch_file, 'w', encoding='utf-8') as f:
+                json.dump(result.patch(), f, ensure_ascii=False, indent=2)
+        return result
+
+    previous = read_json_fragments(output_file) if items and os.path.exists(output_file) else {}
+    for code, digest, row, changed in rows:
+        item = items.get(code)
+        if not changed and item['id'] is None:
+            continue
+        if not changed and item['id'] in previous:
+            result.entries.append(previous[item['id']])
+            result.unchanged += 1
+            if summary is not None:
+                summary.count(*item['summary'])
+            continue
+
+        product_id = item['id'] if item is not None and item['id'] is not None else manifest['next_id']
+        product = row_to_product(row, product_id)
+        if product is None:
+            # Sem preço válido: não gera produto nem consome id, mas fica no
+            # manifesto para não ser refeita enquanto a linha não mudar
+            items[code] = {'hash': digest, 'id': None}
+            continue
+        if item is None or item['id'] is None:
+            manifest['next_id'] += 1
+        items[code] = {'hash': digest, 'id': product_id,
+                       'summary': [product['category'], product['brand'], product['price']]}
+        if summary is not None:
+            summary.add(product)
+        fragment = json_fragment(product)
+        if product_id not in previous:
+            result.added.append(product)
+        elif fragment != previous[product_id]:
+            result.updated.append(product)
+        else:
+            result.unchanged += 1
+        result.entries.append(fragment)
+
+    for code in stale:
+        del items[code]
+    kept = {item['id'] for item in items.values() if item['id'] is not None}
+    result.count = len(result.entries)
+    result.removed = sorted(product_id for product_id in previous if product_id not in kept)
+
+    logger.info("Incremental: %d novos, %d alterados, %d removidos, %d inalterados",
+                len(result.added), len(result.updated), len(result.removed), result.unchanged)
+    with open(output_file, 'w', encoding='utf-8') as out:
+        out.write('[\n' + ',\n'.join(result.entries) + '\n]' if result.entries else '[]')
+    if patch_file:
+        with open(patch_file, 'w', encoding='utf-8') as f:
+            json.dump(result.patch(), f, ensure_ascii=False, indent=2)
+    save_manifest(manifest, manifest_file)
+    return result
+
+class CatalogSummary:
+    """Contagens por categoria, marca e faixa de preço, acumuladas produto a produto"""
+
+    def __init__(self):
+        self.total = 0
+        self.categories: Dict[str, int] = {}
+        self.brands: Dict[str, int] = {}
+        self.price_ranges = {'0-10': 0, '10-25': 0, '25-50': 0, '50+': 0}
+
+    def add(self, product: Dict[str, Any]) -> None:
+        self.count(product['category'], product['brand'], product['price'])
+
+    def count(self, cat: str, brand: str, price: float) -> None:
+        """Conta um produto a partir só dos campos usados no resumo"""
+        self.total += 1
+
         # Contagem por categoria
-        cat = product['category']
-        categories[cat] = categories.get(cat, 0) + 1
-        
+        self.categories[cat] = self.categories.get(cat, 0) + 1
+
         # Contagem por marca
-        brand = product['brand']
-        brands[brand] = brands.get(brand, 0) + 1
-        
+        self.brands[brand] = self.brands.get(brand, 0) + 1
+
         # Contagem por faixa de preço
-        price = product['price']
         if price < 10:
-            price_ranges['0-10'] += 1
+            self.price_ranges['0-10'] += 1
         elif price < 25:
-            price_ranges['10-25'] += 1
+            self.price_ranges['10-25'] += 1
         elif price < 50:
-            price_ranges['25-50'] += 1
+            self.price_ranges['25-50'] += 1
         else:
-            price_ranges['50+'] += 1
-    
-    print("\n" + "="*50)
-    print("RESUMO DOS PRODUTOS PROCESSADOS")
-    print("="*50)
-    print(f"Total de produtos: {total_products}")
-    
-    print(f"\nCategorias:")
-    for cat, count in sorted(categories.items()):
-        print(f"  {cat}: {count}")
-    
-    print(f"\nMarcas:")
-    for brand, count in sorted(brands.items()):
-        print(f"  {brand}: {count}")
-    
-    print(f"\nFaixas de preço:")
-    for range_name, count in price_ranges.items():
-        print(f"  R$ {range_name}: {count}")
+            self.price_ranges['50+'] += 1
+
+    def track(self, products: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for product in products:
+            self.add(product)
+            yield product
+
+    def print(self) -> None:
+        print("\n" + "="*50)
+        print("RESUMO DOS PRODUTOS PROCESSADOS")
+        print("="*50)
+        print(f"Total de produtos: {self.total}")
+
+        print(f"\nCategorias:")
+        for cat, count in sorted(self.categories.items()):
+            print(f"  {cat}: {count}")
+
+        print(f"\nMarcas:")
+        for brand, count in sorted(self.brands.items()):
+            print(f"  {brand}: {count}")
+
+        print(f"\nFaixas de preço:")
+        for range_name, count in self.price_ranges.items():
+            print(f"  R$ {range_name}: {count}")
+
+def generate_summary(products: List[Dict[str, Any]]):
+    """Gera um resumo dos produtos processados"""
+    summary = CatalogSummary()
+    for product in products:
+        summary.add(product)
+    summary.print()
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Converte a planilha de produtos em JSON para o catálogo')
+    parser.add_argument('csv_file', nargs='?', default=DEFAULT_CSV)
+    parser.add_argument('output_file', nargs='?', default=DEFAULT_JSON)
+    parser.add_argument('--stream', action='store_true',
+                        help='processa linha a linha, com memória constante')
+    parser.add_argument('--format', choices=('json', 'jsonl'), default='json',
+                        help='formato de saída no modo --stream (padrão: json)')
+    parser.add_argument('--engine', choices=('rows', 'vectorized'), default='rows',
+                        help='transformação linha a linha ou vetorizada com pandas (padrão: rows)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='reprocessa só as linhas alteradas desde a última execução, com ids estáveis')
+    parser.add_argument('--manifest', metavar='CAMINHO',
+                        help='manifesto do modo --incremental (padrão: <saida>.manifest.json)')
+    parser.add_argument('--patch', metavar='CAMINHO',
+                        help='grava as diferenças do modo --incremental (added/updated/removed)')
+    parser.add_argument('--parquet', metavar='CAMINHO',
+                        help='também grava o catálogo em Parquet (requer pyarrow)')
+    parser.add_argument('--arrow', metavar='CAMINHO',
+                        help='também grava o catálogo em Arrow IPC (requer pyarrow)')
+    parser.add_argument('--partition-by', choices=PARTITION_COLUMNS,
+                        help='grava o Parquet como diretório particionado por esta coluna')
+    parser.add_argument('--compression', default='snappy',
+                        help='compressão: snappy, zstd, gzip, lz4, none (padrão: snappy; '
+                             'o Arrow IPC só comprime com zstd ou lz4)')
+    parser.add_argument('--no-summary', action='store_true', help='não imprime o resumo')
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help='-v mostra o progresso, -vv lista cada produto')
+    args = parser.parse_args(argv)
+    if args.partition_by and not args.parquet:
+        parser.error('--partition-by requer --parquet')
+    if args.incremental and args.stream:
+        parser.error('--incremental não pode ser combinado com --stream')
+    if (args.manifest or args.patch) and not args.incremental:
+        parser.error('--manifest e --patch requerem --incremental')
+    return args
+
+def columnar_outputs(args: argparse.Namespace) -> List[tuple]:
+    """Saídas colunares pedidas na linha de comando: (caminho, formato, partição, compressão)"""
+    compression = None if args.compression == 'none' else args.compression
+    outputs = []
+    if args.parquet:
+        outputs.append((args.parquet, 'parquet', args.partition_by, compression))
+    if args.arrow:
+        outputs.append((args.arrow, 'arrow', None, compression))
+    return outputs
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=[logging.WARNING, logging.INFO, logging.DEBUG][min(args.verbose, 2)],
+                        format='%(message)s')
+    csv_file, json_file = args.csv_file, args.output_file
 
-if __name__ == "__main__":
-    # Caminhos dos arquivos
-    csv_file = "/home/vinicius/Documentos/dev/marketplace/catalagos-produtos-v-1-2/catalago-fernado-pet/data/TABELA INJETADOS SHOPEE UTL.xlsx - produtos.csv"
-    json_file = "/home/vinicius/Documentos/dev/marketplace/catalagos-produtos-v-1-2/catalago-fernado-pet/public/data/produtos.json"
-    
     try:
-        # Processa o CSV
-        products = process_csv_to_products(csv_file)
-        
-        if not products:
+        summary = CatalogSummary()
+        outputs = columnar_outputs(args)
+        if args.incremental:
+            result = incremental_build(csv_file, json_file, args.manifest, args.patch, summary)
+            count = result.count
+            # Sem alterações as saídas colunares já gravadas continuam válidas
+            pending = [output for output in outputs
+                       if result.changed or not os.path.exists(output[0])]
+            if pending and result.count and not result.entries:
+                # Nada mudou no JSON, mas falta alguma saída colunar: relê o catálogo
+                result.entries = list(read_json_fragments(json_file).values())
+            writers = [ColumnarWriter(*output) for output in pending]
+            try:
+                # Uma única decodificação do catálogo alimenta todas as saídas
+                for product in result.products() if writers else ():
+                    for writer in writers:
+                        writer.write(product)
+            finally:
+                for writer in writers:
+                    writer.close()
+        elif args.stream:
+            writers = [ColumnarWriter(*output) for output in outputs]
+            try:
+                count = stream_csv_to_file(csv_file, json_file, args.format, summary, writers)
+            finally:
+                for writer in writers:
+                    writer.close()
+        else:
+            # Processa o CSV
+            products = process_csv_to_products(csv_file, args.engine)
+            count = len(products)
+            if products:
+                # Salva o JSON
+                save_products_json(products, json_file)
+                for output in outputs:
+                    save_products_columnar(products, *output)
+                for product in products:
+                    summary.add(product)
+
+        if not count:
             print("Nenhum produto foi processado. Verifique o arquivo CSV.")
-            exit(1)
-        
-        # Salva o JSON
-        save_products_json(products, json_file)
-        
+            return 1
+
         # Gera resumo
-        generate_summary(products)
-        
+        if not args.no_summary:
+            summary.print()
+
         print(f"\n✅ Processamento concluído com sucesso!")
         print(f"📁 Arquivo gerado: {json_file}")
-        
+        for output in outputs:
+            print(f"📁 Arquivo gerado: {output[0]}")
+        return 0
+
     except Exception as e:
         print(f"❌ Erro durante o processamento: {str(e)}")
         import traceback
         traceback.print_exc()
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
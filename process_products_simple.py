@@ -3,9 +3,13 @@
 
 import csv
 import json
+import os
 import re
 from typing import Dict, Any, List
 
+from catalog_classifier import default_classifier
+from catalog_columnar import save_products_columnar
+
 def clean_currency_value(value: str) -> float:
     """Limpa valores monetários brasileiros e converte para float"""
     if not value or value.strip() == '':
@@ -40,26 +44,10 @@ def clean_percentage_value(value: str) -> float:
 def extract_category_from_description(description: str) -> str:
     """Extrai categoria baseada na descrição do produto"""
     if not description or description.strip() == '':
-        return 'Geral'
-    
-    desc_lower = description.lower()
-    
-    # Mapeamento de palavras-chave para categorias
-    category_keywords = {
-        'Comedouros e Bebedouros': ['comedouro', 'bebedouro', 'af', 'anti-formiga'],
-        'Brinquedos': ['ratinho', 'varinha', 'bola', 'brinquedo', 'rato'],
-        'Higiene': ['escova', 'tira pelo', 'luva', 'vapor', 'pente', 'pulga'],
-        'Acessórios para Gato': ['bandeja', 'pá', 'gato', 'kit', 'graminha', 'trilho'],
-        'Acessórios para Cão': ['xixi dog', 'sanitário', 'cão'],
-        'Transporte': ['caixa', 'transporte', 'mma'],
-        'Diversos': ['mamadeira', 'refil', 'cata caca', 'caneta', 'gravadora']
-    }
+        return default_classifier().default_category
     
-    for category, keywords in category_keywords.items():
-        if any(keyword in desc_lower for keyword in keywords):
-            return category
-    
-    return 'Geral'
+    # Regras em data/classification_rules.json (vence a primeira que casar)
+    return default_classifier().category(description)
 
 def estimate_stock(cost: float) -> int:
     """Estima estoque baseado no custo"""
@@ -203,6 +191,16 @@ def save_products_json(products: List[Dict[str, Any]], output_file: str):
     
     print("Arquivo JSON salvo com sucesso!")
 
+def save_products_parquet(products: List[Dict[str, Any]], output_file: str) -> bool:
+    """Salva os produtos também em Parquet, se o pyarrow estiver instalado"""
+    try:
+        save_products_columnar(products, output_file)
+    except RuntimeError as e:
+        print(f"Parquet não gerado: {e}")
+        return False
+    print(f"Arquivo Parquet salvo em {output_file}")
+    return True
+
 def generate_summary(products: List[Dict[str, Any]]):
     """Gera um resumo dos produtos processados"""
     
@@ -254,6 +252,7 @@ if __name__ == "__main__":
         
         # Salva o JSON
         save_products_json(products, json_file)
+        save_products_parquet(products, os.path.splitext(json_file)[0] + '.parquet')
         
         # Gera resumo
         generate_summary(products)
@@ -1,20 +1,49 @@
-import asyncio
-from flask import Flask
-from backend.routes.products import bp as products_bp
+import os
+from quart import Quart, jsonify
+from backend.routes.products import bp as products_bp, service as product_service
+from backend.routes.metrics import bp as metrics_bp
+from backend.routes.imports import bp as imports_bp
+from backend.cache import configure_cache
+from backend.search import configure_search
+from backend.instrumentation import configure_instrumentation, instrument_app, instrument_sql
 from backend.db import init_db, close_db
+from backend.db_pool import PoolAcquireTimeout
+from backend.services.import_jobs import configure_import_jobs, import_jobs
 
 
 def create_app():
-    app = Flask(__name__)
+    app = Quart(__name__)
+    # Sheet uploads (POST /api/imports/) are the largest request bodies.
+    app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('IMPORT_MAX_MB', '100')) * 2**20
+    configure_cache()
+    configure_search()
+    configure_instrumentation()
+    configure_import_jobs()
     app.register_blueprint(products_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(imports_bp)
+    instrument_app(app)
 
-    @app.before_first_request
-    def init():
-        asyncio.run(init_db())
+    # Tortoise is bound to the server's event loop: initialize it once when
+    # the ASGI server starts serving and close it once on shutdown.
+    @app.before_serving
+    async def init():
+        await init_db()
+        instrument_sql()
+        await product_service.rebuild_search()
+        # Picks up rows written by other workers or the CLI importer
+        product_service.start_search_sync(float(os.getenv('SEARCH_SYNC_SECONDS', '30')))
+        import_jobs.start(product_service)
 
-    @app.teardown_appcontext
-    def shutdown(exc):
-        asyncio.run(close_db())
+    @app.after_serving
+    async def shutdown():
+        await import_jobs.stop()
+        await product_service.stop_search_sync()
+        await close_db()
+
+    @app.errorhandler(PoolAcquireTimeout)
+    async def pool_exhausted(exc):
+        return jsonify({'error': 'Database busy, try again'}), 503
 
     return app
 
@@ -0,0 +1,173 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional, Tuple
+
+
+@dataclass
+class CacheMetrics:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    def snapshot(self) -> dict:
+        data = asdict(self)
+        lookups = self.hits + self.misses
+        data["hit_ratio"] = self.hits / lookups if lookups else 0.0
+        return data
+
+
+class MemoryBackend:
+    """Bounded LRU of byte payloads with a per-entry TTL, local to the process."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self.metrics = CacheMetrics()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.metrics.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.metrics.evictions += 1
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Cache shared by all workers, stored in Redis (requires the redis package).
+
+    Clearing bumps a generation counter instead of deleting keys: entries
+    written under an older generation are treated as misses and age out with
+    their TTL.
+    """
+
+    def __init__(self, url: str, ttl: float = 30.0, prefix: str = "catalog:"):
+        try:
+            from redis import asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("CACHE_URL requires the redis package (pip install redis)") from exc
+        self._redis = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.metrics = CacheMetrics()
+
+    async def _generation(self) -> bytes:
+        return await self._redis.get(self.prefix + "generation") or b"0"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        generation, value = await self._redis.mget(self.prefix + "generation", self.prefix + key)
+        if value is None:
+            return None
+        stored, _, payload = value.partition(b"\n")
+        return payload if stored == (generation or b"0") else None
+
+    async def set(self, key: str, value: bytes) -> None:
+        generation = await self._generation()
+        await self._redis.set(self.prefix + key, generation + b"\n" + value, ex=max(1, int(self.ttl)))
+
+    async def clear(self) -> None:
+        await self._redis.incr(self.prefix + "generation")
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class ResponseCache:
+    """Serialized responses keyed by normalized request arguments.
+
+    Writes call invalidate(); a response computed while a write happened is
+    not stored (see ``generation``), so a cached page is never older than the
+    last invalidation seen by this process. With ``backend=None`` the cache is
+    disabled and every lookup misses.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.generation = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def configure(self, backend) -> None:
+        self.backend = backend
+        self.generation += 1
+
+    async def get(self, key: str) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        if self.backend is None:
+            return None
+        payload = await self.backend.get(key)
+        if payload is None:
+            self.backend.metrics.misses += 1
+            return None
+        self.backend.metrics.hits += 1
+        headers, _, body = payload.partition(b"\n")
+        return body, json.loads(headers)
+
+    async def set(self, key: str, body: bytes, headers: Dict[str, str], generation: int) -> None:
+        if self.backend is None or generation != self.generation:
+            return
+        await self.backend.set(key, json.dumps(headers).encode() + b"\n" + body)
+        self.backend.metrics.stores += 1
+
+    async def invalidate(self) -> None:
+        self.generation += 1
+        if self.backend is not None:
+            await self.backend.clear()
+            self.backend.metrics.invalidations += 1
+
+    def stats(self) -> Optional[dict]:
+        if self.backend is None:
+            return None
+        data = self.backend.metrics.snapshot()
+        data["backend"] = type(self.backend).__name__
+        data["entries"] = self.backend.size()
+        return data
+
+
+def backend_from_env():
+    """Cache backend configured by CACHE_URL, CACHE_MAX_ENTRIES and CACHE_TTL.
+
+    CACHE_MAX_ENTRIES=0 disables caching; CACHE_URL selects a shared Redis
+    backend instead of the per-process LRU.
+    """
+    ttl = float(os.getenv("CACHE_TTL", "30"))
+    max_entries = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+    if max_entries <= 0 or ttl <= 0:
+        return None
+    url = os.getenv("CACHE_URL")
+    if url:
+        return RedisBackend(url, ttl)
+    return MemoryBackend(max_entries, ttl)
+
+
+response_cache = ResponseCache()
+
+
+def configure_cache() -> ResponseCache:
+    response_cache.configure(backend_from_env())
+    return response_cache
@@ -1,9 +1,38 @@
 import os
-from tortoise import Tortoise
+from tortoise import Tortoise, connections
+from tortoise.backends.base.config_generator import expand_db_url
+from backend.migrations import apply_migrations
 
-async def init_db() -> None:
-    TORTOISE_ORM = {
-        "connections": {"models": os.getenv("DATABASE_URL", "postgres://postgres:postgres@db:5432/catalogo")},
+DEFAULT_DATABASE_URL = "postgres://postgres:postgres@db:5432/catalogo"
+
+
+def pool_settings() -> dict:
+    """asyncpg pool options read from the environment.
+
+    Each worker process keeps its own pool, so the server-side connection
+    count is at most ``workers * DB_POOL_MAX_SIZE``.
+    """
+    settings = {
+        "minsize": int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+        "maxsize": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        "acquire_timeout": float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "10")),
+        "max_inactive_connection_lifetime": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+    }
+    statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+    if statement_timeout:
+        settings["server_settings"] = {"statement_timeout": str(statement_timeout)}
+    return settings
+
+
+def build_config() -> dict:
+    connection = expand_db_url(os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL))
+    if connection["engine"] == "tortoise.backends.asyncpg":
+        connection["engine"] = "backend.db_pool"
+        # Options given explicitly in the URL query string take precedence.
+        for key, value in pool_settings().items():
+            connection["credentials"].setdefault(key, value)
+    return {
+        "connections": {"models": connection},
         "apps": {
             "models": {
                 "models": ["backend.models"],
@@ -11,8 +40,18 @@ async def init_db() -> None:
             }
         },
     }
-    await Tortoise.init(config=TORTOISE_ORM)
-    await Tortoise.generate_schemas()
+
+async def init_db() -> None:
+    # The schema is owned by backend/migrations: a startup with nothing
+    # pending costs one CREATE TABLE IF NOT EXISTS and one SELECT.
+    await Tortoise.init(config=build_config())
+    await apply_migrations()
 
 async def close_db() -> None:
     await Tortoise.close_connections()
+
+def pool_stats() -> dict | None:
+    pool = getattr(connections.get("models"), "_pool", None)
+    if pool is None or not hasattr(pool, "stats"):
+        return None
+    return pool.stats()
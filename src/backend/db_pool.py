@@ -0,0 +1,85 @@
+import asyncio
+import time
+from dataclasses import dataclass, asdict
+from tortoise.backends.asyncpg.client import AsyncpgDBClient
+from tortoise.exceptions import DBConnectionError
+
+
+class PoolAcquireTimeout(DBConnectionError):
+    pass
+
+
+@dataclass
+class PoolMetrics:
+    in_use: int = 0
+    waiting: int = 0
+    acquired: int = 0
+    timeouts: int = 0
+    acquire_seconds_total: float = 0.0
+    acquire_seconds_max: float = 0.0
+
+    def snapshot(self) -> dict:
+        data = asdict(self)
+        data["acquire_seconds_avg"] = (
+            self.acquire_seconds_total / self.acquired if self.acquired else 0.0
+        )
+        return data
+
+
+class MeteredPool:
+    """Wraps an asyncpg pool, enforcing the acquire timeout and recording usage."""
+
+    def __init__(self, pool, acquire_timeout: float | None = None):
+        self._pool = pool
+        self.acquire_timeout = acquire_timeout
+        self.metrics = PoolMetrics()
+
+    async def acquire(self, *, timeout: float | None = None):
+        self.metrics.waiting += 1
+        start = time.perf_counter()
+        try:
+            connection = await self._pool.acquire(timeout=timeout or self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.metrics.timeouts += 1
+            raise PoolAcquireTimeout(
+                f"Timed out after {timeout or self.acquire_timeout}s waiting for a database connection"
+            )
+        finally:
+            self.metrics.waiting -= 1
+        elapsed = time.perf_counter() - start
+        self.metrics.acquired += 1
+        self.metrics.in_use += 1
+        self.metrics.acquire_seconds_total += elapsed
+        self.metrics.acquire_seconds_max = max(self.metrics.acquire_seconds_max, elapsed)
+        return connection
+
+    async def release(self, connection, *, timeout: float | None = None) -> None:
+        try:
+            await self._pool.release(connection, timeout=timeout)
+        finally:
+            self.metrics.in_use -= 1
+
+    def stats(self) -> dict:
+        return {
+            "size": self._pool.get_size(),
+            "idle": self._pool.get_idle_size(),
+            "min_size": self._pool.get_min_size(),
+            "max_size": self._pool.get_max_size(),
+            **self.metrics.snapshot(),
+        }
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+
+class PooledAsyncpgClient(AsyncpgDBClient):
+    def __init__(self, acquire_timeout: float | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self.acquire_timeout = float(acquire_timeout) if acquire_timeout else None
+
+    async def create_pool(self, **kwargs) -> MeteredPool:
+        return MeteredPool(await super().create_pool(**kwargs), self.acquire_timeout)
+
+
+# Tortoise resolves ``engine`` to a module and instantiates its ``client_class``.
+client_class = PooledAsyncpgClient
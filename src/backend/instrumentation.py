@@ -0,0 +1,267 @@
+import cProfile
+import contextvars
+import functools
+import logging
+import os
+import random
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from quart import g, request
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+logger = logging.getLogger("backend.slow_sql")
+
+SQL_METHODS = ("execute_query", "execute_query_dict", "execute_insert", "execute_many", "execute_script")
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SLOW_QUERIES_KEPT = 100
+SQL_TEXT_LIMIT = 1000
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, label_values: Tuple[str, ...], value: float) -> None:
+        # [count per bucket..., +Inf count, sum]
+        series = self._series.setdefault(label_values, [0] * (len(self.buckets) + 1) + [0.0])
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self._series.items()):
+            labels = format_labels(self.labels, label_values)
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound:g}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series[-2]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {series[-2]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, label_values: Tuple[str, ...] = (), amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._values.items()):
+            labels = format_labels(self.labels, label_values)
+            lines.append(f"{self.name}{{{labels}}} {value:g}" if labels else f"{self.name} {value:g}")
+        return lines
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return ",".join(f'{n}="{v}"' for n, v in zip(names, escaped))
+
+
+@dataclass
+class RequestStats:
+    endpoint: str
+    queries: int = 0
+    sql_seconds: float = 0.0
+
+
+class Instrumentation:
+    """Request latency and SQL metrics for one process, plus the slow query log.
+
+    ``slow_query_seconds`` is the threshold above which a statement is logged
+    (``backend.slow_sql`` logger) and kept in ``slow_queries``.
+    ``profile_rate`` is the fraction of requests run under cProfile, with the
+    stats dumped to ``profile_dir``.
+    """
+
+    def __init__(self, slow_query_seconds: float = 0.2, profile_rate: float = 0.0,
+                 profile_dir: str = "/tmp/catalog-profiles"):
+        self.slow_query_seconds = slow_query_seconds
+        self.profile_rate = profile_rate
+        self.profile_dir = profile_dir
+        self.reset()
+
+    def reset(self) -> None:
+        self.slow_queries: deque = deque(maxlen=SLOW_QUERIES_KEPT)
+        self.request_seconds = Histogram(
+            "http_request_duration_seconds", "Time to produce a response, by route.",
+            ("method", "endpoint"), LATENCY_BUCKETS)
+        self.requests = Counter("http_requests_total", "Responses sent, by route and status.",
+                                ("method", "endpoint", "status"))
+        self.request_queries = Histogram(
+            "http_request_sql_queries", "SQL statements issued while handling a request.",
+            ("method", "endpoint"), QUERY_COUNT_BUCKETS)
+        self.request_sql_seconds = Histogram(
+            "http_request_sql_seconds", "Time spent in SQL statements while handling a request.",
+            ("method", "endpoint"), LATENCY_BUCKETS)
+        self.queries = Counter("sql_queries_total", "SQL statements issued through Tortoise.")
+        self.query_seconds = Counter("sql_query_seconds_total", "Time spent in SQL statements.")
+        self.slow = Counter("sql_slow_queries_total", "Statements slower than the slow query threshold.")
+        self._profiling = False
+
+    def record_query(self, sql: str, seconds: float) -> None:
+        self.queries.inc()
+        self.query_seconds.inc(amount=seconds)
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.sql_seconds += seconds
+        if seconds >= self.slow_query_seconds:
+            self.slow.inc()
+            endpoint = stats.endpoint if stats else None
+            sql = sql[:SQL_TEXT_LIMIT]
+            self.slow_queries.append({
+                "at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                "ms": round(seconds * 1000, 3),
+                "endpoint": endpoint,
+                "sql": sql,
+            })
+            logger.warning("slow query (%.1f ms, %s): %s", seconds * 1000, endpoint or "-", sql)
+
+    def record_request(self, method: str, stats: RequestStats, status: int, seconds: float) -> None:
+        labels = (method, stats.endpoint)
+        self.request_seconds.observe(labels, seconds)
+        self.requests.inc((method, stats.endpoint, str(status)))
+        self.request_queries.observe(labels, stats.queries)
+        self.request_sql_seconds.observe(labels, stats.sql_seconds)
+
+    def start_profile(self) -> Optional[cProfile.Profile]:
+        # One profiler at a time: cProfile sees the whole event loop thread, so
+        # the dump also contains whatever other requests ran meanwhile.
+        if self._profiling or not self.profile_rate or random.random() >= self.profile_rate:
+            return None
+        self._profiling = True
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def stop_profile(self, profile: cProfile.Profile) -> None:
+        profile.disable()
+        self._profiling = False
+
+    def dump_profile(self, profile: cProfile.Profile, method: str, endpoint: str) -> str:
+        self.stop_profile(profile)
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9]+", "_", endpoint).strip("_") or "root"
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        path = os.path.join(self.profile_dir, f"{stamp}-{method}-{name}.prof")
+        profile.dump_stats(path)
+        return path
+
+    def render(self) -> str:
+        lines = []
+        for metric in (self.request_seconds, self.requests, self.request_queries,
+                       self.request_sql_seconds, self.queries, self.query_seconds, self.slow):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "current_request", default=None)
+_in_statement: contextvars.ContextVar[bool] = contextvars.ContextVar("in_statement", default=False)
+
+instrumentation = Instrumentation()
+
+
+def _timed(method):
+    @functools.wraps(method)
+    async def wrapper(self, query, *args, **kwargs):
+        # Some clients implement one execute_* method with another: count once
+        if _in_statement.get():
+            return await method(self, query, *args, **kwargs)
+        token = _in_statement.set(True)
+        start = time.perf_counter()
+        try:
+            return await method(self, query, *args, **kwargs)
+        finally:
+            _in_statement.reset(token)
+            instrumentation.record_query(query, time.perf_counter() - start)
+
+    wrapper.instrumented = True
+    return wrapper
+
+
+def instrument_sql() -> None:
+    """Time every execute_* call of the Tortoise clients loaded so far (idempotent).
+
+    Call it after Tortoise.init, which imports the backend and its
+    transaction wrapper classes.
+    """
+    classes = [BaseDBAsyncClient]
+    while classes:
+        cls = classes.pop()
+        classes.extend(cls.__subclasses__())
+        for name in SQL_METHODS:
+            method = cls.__dict__.get(name)
+            if method is not None and not getattr(method, "instrumented", False):
+                setattr(cls, name, _timed(method))
+
+
+def configure_instrumentation() -> Instrumentation:
+    """Reset the metrics and apply SLOW_QUERY_MS, PROFILE_SAMPLE_RATE and PROFILE_DIR."""
+    instrumentation.slow_query_seconds = float(os.getenv("SLOW_QUERY_MS", "200")) / 1000
+    instrumentation.profile_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    instrumentation.profile_dir = os.getenv("PROFILE_DIR", "/tmp/catalog-profiles")
+    instrumentation.reset()
+    return instrumentation
+
+
+def instrument_app(app) -> None:
+    """Record latency, status and SQL usage of every request handled by ``app``."""
+
+    @app.before_request
+    async def start_request():
+        endpoint = request.url_rule.rule if request.url_rule else "<unmatched>"
+        g.request_stats = RequestStats(endpoint)
+        g.request_token = current_request.set(g.request_stats)
+        g.request_profile = instrumentation.start_profile()
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    async def finish_request(response):
+        stats = g.get("request_stats")
+        if stats is None:
+            return response
+        seconds = time.perf_counter() - g.request_start
+        current_request.reset(g.request_token)
+        g.request_token = None
+        if g.request_profile is not None:
+            path = instrumentation.dump_profile(g.request_profile, request.method, stats.endpoint)
+            g.request_profile = None
+            response.headers["X-Profile"] = os.path.basename(path)
+        instrumentation.record_request(request.method, stats, response.status_code, seconds)
+        # Streamed bodies are produced after this point and are not included.
+        response.headers["Server-Timing"] = (
+            f'sql;dur={stats.sql_seconds * 1000:.1f};desc="{stats.queries} queries", '
+            f"total;dur={seconds * 1000:.1f}"
+        )
+        return response
+
+    @app.teardown_request
+    async def abandon_request(exc):
+        # after_request is skipped when an exception escapes the handlers: release
+        # the profiler here or no later request would ever be sampled again.
+        if g.get("request_profile") is not None:
+            instrumentation.stop_profile(g.request_profile)
+            g.request_profile = None
+        if g.get("request_token") is not None:
+            current_request.reset(g.request_token)
+            g.request_token = None
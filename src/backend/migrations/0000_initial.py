@@ -0,0 +1,30 @@
+# Base catalog tables, as Tortoise.generate_schemas() used to create them on
+# every startup (sku is added by 0002). Databases created that way already
+# have these tables, so every statement is guarded with IF NOT EXISTS.
+ID = {
+    "sqlite": "INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL",
+    "postgres": "SERIAL NOT NULL PRIMARY KEY",
+}
+FLOAT = {"sqlite": "REAL", "postgres": "DOUBLE PRECISION"}
+TIMESTAMP = {"sqlite": "TIMESTAMP", "postgres": "TIMESTAMPTZ"}
+
+
+async def upgrade(connection, dialect: str) -> None:
+    for table in ("brands", "categories"):
+        await connection.execute_script(
+            f'CREATE TABLE IF NOT EXISTS "{table}" ('
+            f'"id" {ID[dialect]}, '
+            '"name" VARCHAR(100) NOT NULL)'
+        )
+    await connection.execute_script(
+        'CREATE TABLE IF NOT EXISTS "products" ('
+        f'"id" {ID[dialect]}, '
+        '"name" VARCHAR(200) NOT NULL, '
+        '"description" TEXT, '
+        f'"price" {FLOAT[dialect]} NOT NULL, '
+        '"stock" INT NOT NULL DEFAULT 0, '
+        f'"created_at" {TIMESTAMP[dialect]} NOT NULL DEFAULT CURRENT_TIMESTAMP, '
+        f'"updated_at" {TIMESTAMP[dialect]} NOT NULL DEFAULT CURRENT_TIMESTAMP, '
+        '"brand_id" INT NOT NULL REFERENCES "brands" ("id") ON DELETE CASCADE, '
+        '"category_id" INT NOT NULL REFERENCES "categories" ("id") ON DELETE CASCADE)'
+    )
@@ -0,0 +1,24 @@
+# Indexes backing the product listing filters and keyset sort orders, plus a
+# trigram index for the ``name__icontains`` search on Postgres. Tortoise
+# renders that filter as ``UPPER(CAST(name AS VARCHAR)) LIKE UPPER('%...%')``,
+# so the trigram index is built on that exact expression. SQLite has no
+# trigram support and keeps scanning for substring searches.
+from backend.migrations import create_index
+
+atomic = False
+
+INDEXES = {
+    "idx_products_category_price": "products (category_id, price, id)",
+    "idx_products_brand_price": "products (brand_id, price, id)",
+    "idx_products_price": "products (price, id)",
+    "idx_products_name": "products (name, id)",
+}
+
+
+async def upgrade(connection, dialect: str) -> None:
+    for name, target in INDEXES.items():
+        await create_index(connection, dialect, name, target)
+    if dialect == "postgres":
+        await connection.execute_script("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        await create_index(connection, dialect, "idx_products_name_trgm",
+                           "products USING gin (UPPER(CAST(name AS VARCHAR)) gin_trgm_ops)")
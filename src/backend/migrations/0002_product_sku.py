@@ -0,0 +1,15 @@
+# Supplier code used to match rows on re-import. The column may already exist
+# when the table was just created from the models, so both steps are guarded.
+from backend.migrations import create_index
+
+atomic = False
+
+
+async def upgrade(connection, dialect: str) -> None:
+    if dialect == "sqlite":
+        columns = await connection.execute_query_dict("PRAGMA table_info(products)")
+        if "sku" not in {c["name"] for c in columns}:
+            await connection.execute_script("ALTER TABLE products ADD COLUMN sku VARCHAR(64)")
+    else:
+        await connection.execute_script("ALTER TABLE products ADD COLUMN IF NOT EXISTS sku VARCHAR(64)")
+    await create_index(connection, dialect, "uid_products_sku", "products (sku)", unique=True)
@@ -0,0 +1,9 @@
+# Backs the search index sync, which polls every few seconds for rows with
+# ``updated_at >= since`` in id order; without it each poll scans the table.
+from backend.migrations import create_index
+
+atomic = False
+
+
+async def upgrade(connection, dialect: str) -> None:
+    await create_index(connection, dialect, "idx_products_updated_at", "products (updated_at, id)")
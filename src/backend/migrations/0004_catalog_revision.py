@@ -0,0 +1,12 @@
+# Counter behind the catalog version (ETags and the cached version). The
+# service bumps it after every committed write, so it also moves on hard
+# deletes, which MAX(updated_at) and COUNT(id) can miss when a delete and an
+# insert land in the same tick.
+async def upgrade(connection, dialect: str) -> None:
+    await connection.execute_script(
+        "CREATE TABLE IF NOT EXISTS catalog_revision ("
+        "id INT NOT NULL PRIMARY KEY, "
+        "revision BIGINT NOT NULL DEFAULT 0)"
+    )
+    await connection.execute_script(
+        "INSERT INTO catalog_revision (id, revision) VALUES (1, 0) ON CONFLICT (id) DO NOTHING")
@@ -0,0 +1,69 @@
+import importlib
+import pkgutil
+import re
+from typing import List
+from tortoise import connections
+from tortoise.transactions import in_transaction
+
+# Each migration is a module named ``NNNN_description`` exposing
+# ``async def upgrade(connection, dialect)``. Modules that must run outside a
+# transaction (e.g. CREATE INDEX CONCURRENTLY) set ``atomic = False``. The
+# schema itself comes from 0000_initial onwards: model changes need a new
+# migration, since tables are no longer generated from the models.
+VERSION_RE = re.compile(r'^\d{4}_\w+$')
+
+
+def discover() -> List[str]:
+    return sorted(m.name for m in pkgutil.iter_modules(__path__) if VERSION_RE.match(m.name))
+
+
+async def create_index(connection, dialect: str, name: str, target: str, unique: bool = False) -> None:
+    """CREATE INDEX IF NOT EXISTS, built CONCURRENTLY on Postgres.
+
+    A concurrent build that fails partway leaves an INVALID index under the
+    same name, which IF NOT EXISTS would skip on every later run, so such a
+    leftover is dropped first.
+    """
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    if dialect != "postgres":
+        await connection.execute_script(f"CREATE {kind} IF NOT EXISTS {name} ON {target}")
+        return
+    invalid = await connection.execute_query_dict(
+        f"SELECT 1 FROM pg_index WHERE indexrelid = to_regclass('{name}') AND NOT indisvalid")
+    if invalid:
+        await connection.execute_script(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    await connection.execute_script(f"CREATE {kind} CONCURRENTLY IF NOT EXISTS {name} ON {target}")
+
+
+async def applied_versions(connection) -> set:
+    await connection.execute_script(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version VARCHAR(255) PRIMARY KEY, "
+        "applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    )
+    rows = await connection.execute_query_dict("SELECT version FROM schema_migrations")
+    return {row["version"] for row in rows}
+
+
+async def apply_migrations(connection_name: str = "models") -> List[str]:
+    connection = connections.get(connection_name)
+    dialect = connection.capabilities.dialect
+    done = await applied_versions(connection)
+    applied = []
+    for version in discover():
+        if version in done:
+            continue
+        module = importlib.import_module(f"{__name__}.{version}")
+        # Workers starting together may race to apply the same version; the
+        # migrations are idempotent, so the loser just skips the record.
+        record = (f"INSERT INTO schema_migrations (version) VALUES ('{version}') "
+                  "ON CONFLICT (version) DO NOTHING")
+        if getattr(module, "atomic", True):
+            async with in_transaction(connection_name) as tx:
+                await module.upgrade(tx, dialect)
+                await tx.execute_script(record)
+        else:
+            await module.upgrade(connection, dialect)
+            await connection.execute_script(record)
+        applied.append(version)
+    return applied
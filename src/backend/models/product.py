@@ -5,6 +5,8 @@ from .brand import Brand
 
 class Product(Model):
     id = fields.IntField(pk=True)
+    # Supplier code (e.g. "010210", "CÓD. 0000"); unique index in migration 0002.
+    sku = fields.CharField(max_length=64, null=True)
     name = fields.CharField(max_length=200)
     description = fields.TextField(null=True)
     category: fields.ForeignKeyRelation["Category"] = fields.ForeignKeyField(
@@ -19,6 +21,7 @@ class Product(Model):
     updated_at = fields.DatetimeField(auto_now=True)
 
     class Meta:
+        # Indexes are managed by backend/migrations (0001 listing/search, 0002 sku).
         table = "products"
         app = "models"
         default_connection = "models"
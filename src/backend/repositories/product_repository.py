@@ -1,6 +1,52 @@
-from dataclasses import dataclass
-from typing import List, Optional, Dict
-from backend.models import Product
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Iterable, List, Optional, Dict, Tuple, Type
+from tortoise import timezone
+from tortoise.expressions import Q, RawSQL
+from tortoise.functions import Count, Max
+from tortoise.models import Model
+from backend.models import Brand, Category, Product
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Sort options offered by the Vue catalog (SortField) plus the id default.
+SORT_KEYS = {
+    'id': 'id',
+    'name': 'name',
+    'price': 'price',
+    'category': 'category__name',
+    'brand': 'brand__name',
+}
+
+# Query arguments list() filters on (see _filtered).
+FILTER_KEYS = ('name', 'category_id', 'brand_id')
+
+# Price facet buckets: (label, lower bound inclusive, upper bound exclusive).
+PRICE_BUCKETS = (
+    ('0-10', 0, 10),
+    ('10-25', 10, 25),
+    ('25-50', 25, 50),
+    ('50+', 50, None),
+)
+
+# Columns projected for API responses; keys are the response field names.
+# Category and brand names come from joins in the same statement, so listing
+# a page never issues one query per product per relation.
+PRODUCT_FIELDS = {
+    'id': 'id',
+    'sku': 'sku',
+    'name': 'name',
+    'description': 'description',
+    'category_id': 'category_id',
+    'category': 'category__name',
+    'brand_id': 'brand_id',
+    'brand': 'brand__name',
+    'price': 'price',
+    'stock': 'stock',
+}
 
 @dataclass
 class ProductIn:
@@ -10,6 +56,24 @@ class ProductIn:
     brand_id: int | None = None
     price: float = 0.0
     stock: int = 0
+    sku: str | None = None
+
+@dataclass
+class ProductPage:
+    items: List[Dict[str, Any]] = field(default_factory=list)
+    next_cursor: str | None = None
+
+def encode_cursor(sort_value: Any, product_id: int) -> str:
+    raw = json.dumps([sort_value, product_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, product_id = json.loads(base64.urlsafe_b64decode(padded))
+        return sort_value, int(product_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError('Invalid cursor') from exc
 
 class ProductRepository:
     async def create(self, data: ProductIn) -> Product:
@@ -19,14 +83,142 @@ class ProductRepository:
     async def get(self, product_id: int) -> Optional[Product]:
         return await Product.get_or_none(id=product_id)
 
+    async def get_row(self, product_id: int) -> Optional[Dict[str, Any]]:
+        return await Product.filter(id=product_id).first().values(**PRODUCT_FIELDS)
+
+    async def get_rows(self, ids: List[int], with_updated_at: bool = False) -> List[Dict[str, Any]]:
+        """Projected rows for ``ids`` in the given order, skipping missing ones."""
+        if not ids:
+            return []
+        fields = dict(PRODUCT_FIELDS, updated_at='updated_at') if with_updated_at else PRODUCT_FIELDS
+        rows = {row['id']: row for row in await Product.filter(id__in=ids).values(**fields)}
+        return [rows[i] for i in ids if i in rows]
+
+    async def version(self) -> Tuple[Optional[datetime], int]:
+        """Latest ``updated_at`` and the catalog revision, in one query.
+
+        The revision (migration 0004) is bumped after every write, deletes
+        included; the MAX is an index lookup on idx_products_updated_at.
+        """
+        query = Product.annotate(last_modified=Max('updated_at'), revision=RawSQL(
+            '(SELECT revision FROM catalog_revision WHERE id = 1)'))
+        row = await query.first().values('last_modified', 'revision')
+        return row['last_modified'], row['revision']
+
+    async def bump_revision(self, using_db=None) -> None:
+        db = using_db or Product._meta.db
+        await db.execute_script('UPDATE catalog_revision SET revision = revision + 1 WHERE id = 1')
+
     async def update(self, product: Product, data: ProductIn) -> Product:
-        for field, value in data.__dict__.items():
+        for name, value in data.__dict__.items():
             if value is not None:
-                setattr(product, field, value)
+                setattr(product, name, value)
         await product.save()
         return product
 
-    async def list(self, filters: Dict[str, str]) -> List[Product]:
+    async def bulk_create(self, items: List[ProductIn], using_db=None,
+                          ids: List[int] | None = None) -> None:
+        """Multi-row INSERT; ``ids`` (see reserve_ids) are written as given."""
+        products = [Product(**{k: v for k, v in item.__dict__.items() if v is not None}) for item in items]
+        if ids is not None:
+            for product, product_id in zip(products, ids):
+                product.id = product_id
+        await Product.bulk_create(products, using_db=using_db)
+
+    async def reserve_ids(self, count: int, using_db) -> List[int]:
+        """Allocate ``count`` product ids up front, since bulk inserts return none.
+
+        On Postgres they come from the id sequence; on SQLite the transaction
+        holds the database write lock, so the ids after MAX(id) stay free.
+        """
+        if not count:
+            return []
+        if using_db.capabilities.dialect == 'postgres':
+            rows = await using_db.execute_query_dict(
+                "SELECT nextval(pg_get_serial_sequence('products', 'id')) AS id "
+                "FROM generate_series(1, $1)", [count])
+            return [row['id'] for row in rows]
+        rows = await using_db.execute_query_dict('SELECT COALESCE(MAX(id), 0) AS id FROM products')
+        return list(range(rows[0]['id'] + 1, rows[0]['id'] + 1 + count))
+
+    async def existing_ids(self, model: Type[Model], ids: Iterable[int], using_db=None) -> set:
+        ids = set(ids)
+        if not ids:
+            return set()
+        return set(await model.filter(id__in=ids).using_db(using_db).values_list('id', flat=True))
+
+    async def adjust_stock(self, product_id: int, delta: int, using_db=None) -> Optional[int]:
+        """Add ``delta`` to the stock in one conditional UPDATE, never below zero.
+
+        Returns the new stock, or None when the product does not exist or has
+        less than ``-delta`` in stock. Concurrent calls cannot lose updates
+        because the row is never read and written back.
+        """
+        db = using_db or Product._meta.db
+        mark = '$' if db.capabilities.dialect == 'postgres' else '?'
+        rows = await db.execute_query_dict(
+            f'UPDATE products SET stock = stock + {mark}1, updated_at = {mark}2 '
+            f'WHERE id = {mark}3 AND stock + {mark}1 >= 0 RETURNING stock',
+            [delta, timezone.now(), product_id])
+        return rows[0]['stock'] if rows else None
+
+    async def exists(self, product_id: int, using_db=None) -> bool:
+        return await Product.filter(id=product_id).using_db(using_db).exists()
+
+    async def bulk_update(self, changes: Dict[int, Dict[str, Any]], using_db=None) -> set:
+        """Apply per-product field changes with one CASE-based UPDATE per batch.
+
+        Returns the ids that exist; changes for other ids are ignored.
+        """
+        products = await Product.filter(id__in=list(changes)).using_db(using_db)
+        if not products:
+            return set()
+        fields = {'updated_at'}
+        now = timezone.now()
+        for product in products:
+            for name, value in changes[product.id].items():
+                setattr(product, name, value)
+                fields.add(name)
+            product.updated_at = now
+        await Product.bulk_update(products, sorted(fields), batch_size=MAX_PAGE_SIZE, using_db=using_db)
+        return {product.id for product in products}
+
+    async def find_by_skus(self, skus: List[str], fields: Iterable[str],
+                           using_db=None) -> Dict[str, Dict[str, Any]]:
+        rows = await Product.filter(sku__in=skus).using_db(using_db).values('sku', *fields)
+        return {row['sku']: row for row in rows}
+
+    async def upsert(self, items: List[ProductIn], update_fields: Iterable[str],
+                     using_db=None) -> None:
+        """INSERT ... ON CONFLICT (sku) DO UPDATE for the given fields."""
+        if not items:
+            return
+        await Product.bulk_create(
+            [Product(**{k: v for k, v in item.__dict__.items() if v is not None}) for item in items],
+            on_conflict=['sku'],
+            update_fields=[*update_fields, 'updated_at'],
+            using_db=using_db,
+        )
+
+    async def _resolve_names(self, model: Type[Model], names: Iterable[str],
+                             using_db=None) -> Tuple[Dict[str, int], int]:
+        names = set(names)
+        ids = dict(await model.filter(name__in=names).using_db(using_db).values_list('name', 'id'))
+        missing = sorted(names - ids.keys())
+        if missing:
+            await model.bulk_create([model(name=name) for name in missing], using_db=using_db)
+            ids.update(await model.filter(name__in=missing).using_db(using_db).values_list('name', 'id'))
+        return ids, len(missing)
+
+    async def resolve_categories(self, names: Iterable[str], using_db=None) -> Tuple[Dict[str, int], int]:
+        """Map category names to ids, creating the missing ones in one batch."""
+        return await self._resolve_names(Category, names, using_db)
+
+    async def resolve_brands(self, names: Iterable[str], using_db=None) -> Tuple[Dict[str, int], int]:
+        """Map brand names to ids, creating the missing ones in one batch."""
+        return await self._resolve_names(Brand, names, using_db)
+
+    def _filtered(self, filters: Dict[str, str]):
         qs = Product.all()
         if 'name' in filters:
             qs = qs.filter(name__icontains=filters['name'])
@@ -34,4 +226,117 @@ class ProductRepository:
             qs = qs.filter(category_id=filters['category_id'])
         if 'brand_id' in filters:
             qs = qs.filter(brand_id=filters['brand_id'])
-        return await qs
+        return qs
+
+    async def facets(self, filters: Dict[str, str]) -> Dict[str, Any]:
+        """Category, brand and price-bucket counts for ``filters``, aggregated in SQL.
+
+        The category and brand counts ignore their own filter, so a selected
+        category still shows how many products the other categories have.
+        """
+        def without(key: str) -> Dict[str, str]:
+            return {k: v for k, v in filters.items() if k != key}
+
+        async def counts(key: str, relation: str) -> List[Dict[str, Any]]:
+            query = (self._filtered(without(key))
+                     .group_by(key, f'{relation}__name')
+                     .annotate(count=Count('id'))
+                     .order_by(f'{relation}__name')
+                     .values(key, 'count', name=f'{relation}__name'))
+            return [{'id': row[key], 'name': row['name'], 'count': row['count']} for row in await query]
+
+        buckets = {}
+        for i, (_, low, high) in enumerate(PRICE_BUCKETS):
+            condition = Q(price__gte=low) if high is None else Q(price__gte=low, price__lt=high)
+            buckets[f'bucket_{i}'] = Count('id', _filter=condition)
+        query = self._filtered(filters).annotate(total=Count('id'), **buckets)
+        row = await query.first().values('total', *buckets)
+        return {
+            'total': row['total'],
+            'categories': await counts('category_id', 'category'),
+            'brands': await counts('brand_id', 'brand'),
+            'price_ranges': [
+                {'range': label, 'min': low, 'max': high, 'count': row[f'bucket_{i}']}
+                for i, (label, low, high) in enumerate(PRICE_BUCKETS)
+            ],
+        }
+
+    def page_query(self, filters: Dict[str, str], limit: int | str = PAGE_SIZE,
+                   cursor: str | None = None, sort: str = 'id',
+                   order: str = 'asc') -> Tuple[Any, int]:
+        """Build the projected keyset query behind list().
+
+        Rows are ordered by ``(sort key, id)`` and the cursor carries the last
+        row's pair, so each page is an index range scan regardless of depth.
+        Returns the query (fetching one extra row) and the clamped limit.
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Invalid sort field: {sort}")
+        if order not in ('asc', 'desc'):
+            raise ValueError(f"Invalid sort order: {order}")
+        try:
+            limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid limit: {limit}") from exc
+
+        key = SORT_KEYS[sort]
+        op, prefix = ('gt', '') if order == 'asc' else ('lt', '-')
+        qs = self._filtered(filters)
+        if cursor:
+            value, last_id = decode_cursor(cursor)
+            if key == 'id':
+                qs = qs.filter(**{f'id__{op}': last_id})
+            else:
+                qs = qs.filter(Q(**{f'{key}__{op}': value}) |
+                               Q(**{key: value, f'id__{op}': last_id}))
+        ordering = [f'{prefix}{key}'] if key == 'id' else [f'{prefix}{key}', f'{prefix}id']
+        return qs.order_by(*ordering).limit(limit + 1).values(sort_key=key, **PRODUCT_FIELDS), limit
+
+    async def list(self, filters: Dict[str, str], **page_args) -> ProductPage:
+        """Return one keyset page of projected product rows (see page_query)."""
+        query, limit = self.page_query(filters, **page_args)
+        rows = await query
+        page = ProductPage(items=rows[:limit])
+        if len(rows) > limit:
+            last = page.items[-1]
+            page.next_cursor = encode_cursor(last['sort_key'], last['id'])
+        for row in page.items:
+            del row['sort_key']
+        return page
+
+    async def iter_pages(self, filters: Dict[str, str], batch_size: int = MAX_PAGE_SIZE,
+                         sort: str = 'id', order: str = 'asc') -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield every matching row, one keyset page of ``batch_size`` at a time."""
+        cursor = None
+        while True:
+            page = await self.list(filters, limit=batch_size, cursor=cursor, sort=sort, order=order)
+            yield page.items
+            if not page.next_cursor:
+                return
+            cursor = page.next_cursor
+
+    async def iter_changed(self, since: datetime | None,
+                           batch_size: int = MAX_PAGE_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield rows updated at or after ``since`` (every row when None).
+
+        Every row comes in id order; changed rows come in (updated_at, id)
+        order so the scan walks idx_products_updated_at instead of the table.
+        Rows carry their ``updated_at`` too, for the search index sync.
+        """
+        fields = dict(PRODUCT_FIELDS, updated_at='updated_at')
+        qs = Product.all() if since is None else Product.filter(updated_at__gte=since)
+        order = ('id',) if since is None else ('updated_at', 'id')
+        last = None
+        while True:
+            page = qs
+            if last is not None and since is None:
+                page = qs.filter(id__gt=last['id'])
+            elif last is not None:
+                page = qs.filter(Q(updated_at__gt=last['updated_at'])
+                                 | Q(updated_at=last['updated_at'], id__gt=last['id']))
+            rows = await page.order_by(*order).limit(batch_size).values(**fields)
+            if rows:
+                yield rows
+            if len(rows) < batch_size:
+                return
+            last = rows[-1]
@@ -0,0 +1,44 @@
+import os
+from quart import Blueprint, request, jsonify
+from backend.services.import_jobs import SHEET_EXTENSIONS, QueueFull, import_jobs
+
+bp = Blueprint('imports', __name__, url_prefix='/api/imports')
+
+@bp.post('/')
+async def create_import():
+    """Queue an uploaded sheet (multipart field ``file``) for a background import."""
+    files = await request.files
+    upload = files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({'error': 'Expected a multipart "file" field'}), 400
+    if os.path.splitext(upload.filename)[1].lower() not in SHEET_EXTENSIONS:
+        return jsonify({'error': f"Expected one of: {', '.join(SHEET_EXTENSIONS)}"}), 400
+    upsert = request.args.get('upsert', '').lower() in ('1', 'true')
+    path = import_jobs.upload_path(upload.filename)
+    await upload.save(path)
+    try:
+        job = import_jobs.submit(path, upload.filename, upsert=upsert)
+    except QueueFull as exc:
+        os.remove(path)
+        return jsonify({'error': str(exc)}), 503
+    return jsonify(job.snapshot()), 202, {'Location': f'/api/imports/{job.id}'}
+
+@bp.get('/')
+async def list_imports():
+    return jsonify([job.snapshot() for job in import_jobs.list()])
+
+@bp.get('/<job_id>')
+async def get_import(job_id: str):
+    job = import_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify(job.snapshot())
+
+@bp.delete('/<job_id>')
+async def cancel_import(job_id: str):
+    job = import_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Not found'}), 404
+    if job.status in ('done', 'failed'):
+        return jsonify({'error': f'Import already {job.status}'}), 409
+    return jsonify(job.snapshot()), 202
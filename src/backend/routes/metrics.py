@@ -0,0 +1,36 @@
+from quart import Blueprint, Response, jsonify
+from backend.cache import response_cache
+from backend.db import pool_stats
+from backend.instrumentation import instrumentation
+from backend.search import search_index
+
+bp = Blueprint('metrics', __name__, url_prefix='/api/metrics')
+
+@bp.get('/pool')
+async def pool():
+    stats = pool_stats()
+    if stats is None:
+        return jsonify({'error': 'No connection pool in use'}), 404
+    return jsonify(stats)
+
+@bp.get('/cache')
+async def cache():
+    stats = response_cache.stats()
+    if stats is None:
+        return jsonify({'error': 'Response cache disabled'}), 404
+    return jsonify(stats)
+
+@bp.get('/search')
+async def search():
+    if not search_index.enabled:
+        return jsonify({'error': 'Search index disabled'}), 404
+    return jsonify(search_index.stats())
+
+@bp.get('/prometheus')
+async def prometheus():
+    return Response(instrumentation.render(), mimetype='text/plain; version=0.0.4')
+
+@bp.get('/slow-queries')
+async def slow_queries():
+    return jsonify({'threshold_ms': instrumentation.slow_query_seconds * 1000,
+                    'queries': list(instrumentation.slow_queries)})
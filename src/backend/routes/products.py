@@ -1,40 +1,263 @@
-import asyncio
-from flask import Blueprint, request, jsonify
-from backend.repositories.product_repository import ProductRepository, ProductIn
-from backend.services.product_service import ProductService
+import hashlib
+from datetime import timezone
+from urllib.parse import urlencode
+from quart import Blueprint, Response, request, jsonify
+from backend.cache import response_cache
+from backend.search import search_index
+from backend.repositories.product_repository import FILTER_KEYS, PAGE_SIZE, ProductRepository, ProductIn
+from backend.services.product_service import CatalogVersion, MAX_BATCH_ITEMS, ProductService
+from backend.utils.serialization import json_array_chunks, ndjson_chunks
 
 bp = Blueprint('products', __name__, url_prefix='/api/products')
+PAGE_ARGS = ('limit', 'cursor', 'sort', 'order')
+EXPORT_ARGS = ('sort', 'order', 'format')
+NDJSON = 'application/x-ndjson'
+PAGE_DEFAULTS = {'limit': str(PAGE_SIZE), 'sort': 'id', 'order': 'asc'}
 repo = ProductRepository()
-service = ProductService(repo)
-
-def to_dict(p):
-    return {
-        "id": p.id,
-        "name": p.name,
-        "description": p.description,
-        "category": p.category,
-        "brand": p.brand,
-        "price": p.price,
-        "stock": p.stock,
-    }
+service = ProductService(repo, response_cache, search_index)
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+def known_filters(filters: dict) -> dict:
+    args = {k: filters[k] for k in FILTER_KEYS if k in filters}
+    if 'name' in args:
+        args['name'] = args['name'].lower()  # icontains
+    return args
+
+def list_cache_key(filters: dict, page_args: dict) -> str:
+    # Only arguments the repository reads are part of the key, with defaults
+    # filled in, so '?' and '?limit=50&sort=id' share an entry and unknown
+    # parameters (cache busters) do not fragment the cache.
+    args = known_filters(filters)
+    args.update(PAGE_DEFAULTS)
+    args.update(page_args)
+    return 'products:list:' + urlencode(sorted(args.items()))
+
+def validators(version: CatalogVersion, scope: str) -> dict:
+    last_modified = version.last_modified
+    if last_modified is not None:
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        last_modified = last_modified.replace(microsecond=0)
+    return {'etag': version.etag(scope), 'last_modified': last_modified}
+
+async def catalog_validators(scope: str) -> dict | None:
+    """ETag/Last-Modified from the catalog version; None when no cache is configured.
+
+    Without a response cache the version is not cached either, so checking it
+    would add an aggregate query to every read. Those responses are validated
+    by a hash of their body instead (see revalidated).
+    """
+    if not response_cache.enabled:
+        return None
+    return validators(await service.version(), scope)
+
+def is_not_modified(etag: str, last_modified) -> bool:
+    # If-None-Match wins over If-Modified-Since when both are sent (RFC 9110).
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    since = request.if_modified_since
+    return since is not None and last_modified is not None and last_modified <= since
+
+def conditional(response: Response, etag: str, last_modified) -> Response:
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Clients and the CDN may store responses but must revalidate them.
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def not_modified(etag: str, last_modified) -> Response:
+    return conditional(Response(status=304), etag, last_modified)
+
+async def revalidated(response: Response, tags: dict | None) -> Response:
+    """Add the validators to a freshly built response; without catalog ones, hash the body."""
+    if tags is None:
+        tags = {'etag': hashlib.sha1(await response.get_data()).hexdigest(), 'last_modified': None}
+        if is_not_modified(**tags):
+            return not_modified(**tags)
+    return conditional(response, **tags)
 
 @bp.post('/')
-def create_product():
-    data = request.get_json() or {}
+async def create_product():
+    data = await request.get_json() or {}
     product_in = ProductIn(**data)
-    product = asyncio.run(service.create(product_in))
-    return jsonify(to_dict(product)), 201
+    product = await service.create(product_in)
+    return jsonify(await service.get(product.id)), 201
+
+async def batch_payload():
+    items = await request.get_json(silent=True)
+    if not isinstance(items, list):
+        return None, (jsonify({'error': 'Expected a JSON array of products'}), 400)
+    if len(items) > MAX_BATCH_ITEMS:
+        return None, (jsonify({'error': f'At most {MAX_BATCH_ITEMS} items per batch'}), 413)
+    return items, None
+
+def batch_response(results: list, applied: str, label: str | None = None):
+    done = sum(1 for r in results if r['status'] == applied)
+    return jsonify({label or applied: done, 'failed': len(results) - done, 'results': results})
+
+@bp.post('/batch')
+async def create_products_batch():
+    items, error = await batch_payload()
+    if error:
+        return error
+    return batch_response(await service.create_many(items), 'created')
+
+@bp.patch('/batch')
+async def update_products_batch():
+    items, error = await batch_payload()
+    if error:
+        return error
+    return batch_response(await service.update_many(items), 'updated')
+
+@bp.post('/<int:pid>/stock')
+async def adjust_stock(pid: int):
+    data = await request.get_json(silent=True) or {}
+    delta = data.get('delta')
+    if isinstance(delta, bool) or not isinstance(delta, int):
+        return jsonify({'error': 'Expected an integer delta'}), 400
+    result = await service.adjust_stock(pid, delta)
+    if result['status'] == 'not_found':
+        return jsonify({'error': 'Not found'}), 404
+    if result['status'] == 'insufficient_stock':
+        return jsonify({'error': 'Insufficient stock'}), 409
+    return jsonify({'id': pid, 'stock': result['stock']})
+
+@bp.post('/stock')
+async def adjust_stock_batch():
+    items, error = await batch_payload()
+    if error:
+        return error
+    atomic = request.args.get('atomic', '').lower() in ('1', 'true')
+    results = await service.adjust_stock_many(items, atomic=atomic)
+    response = batch_response(results, 'ok', 'adjusted')
+    if atomic and any(r['status'] != 'ok' for r in results):
+        return response, 409
+    return response
+
+@bp.get('/<int:pid>')
+async def get_product(pid: int):
+    tags = await catalog_validators(f'products:{pid}')
+    if tags and is_not_modified(**tags):
+        return not_modified(**tags)
+    product = await service.get(pid)
+    if not product:
+        return jsonify({'error': 'Not found'}), 404
+    return await revalidated(jsonify(product), tags)
 
 @bp.put('/<int:pid>')
-def update_product(pid: int):
-    data = request.get_json() or {}
+async def update_product(pid: int):
+    data = await request.get_json() or {}
     product_in = ProductIn(**data)
-    product = asyncio.run(service.update(pid, product_in))
+    product = await service.update(pid, product_in)
     if not product:
         return jsonify({'error': 'Not found'}), 404
-    return jsonify(to_dict(product))
+    return jsonify(await service.get(pid))
 
 @bp.get('/')
-def list_products():
-    products = asyncio.run(service.list(request.args.to_dict()))
-    return jsonify([to_dict(p) for p in products])
+async def list_products():
+    filters = request.args.to_dict()
+    page_args = {k: filters.pop(k) for k in PAGE_ARGS if k in filters}
+    key = list_cache_key(filters, page_args)
+    tags = await catalog_validators(key)
+    if tags and is_not_modified(**tags):
+        return not_modified(**tags)
+    cached = await response_cache.get(key)
+    if cached is not None:
+        body, headers = cached
+        response = Response(body, mimetype='application/json', headers={**headers, 'X-Cache': 'HIT'})
+        return conditional(response, **tags)
+
+    generation = response_cache.generation
+    try:
+        page = await service.list(filters, **page_args)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    headers = {'X-Next-Cursor': page.next_cursor} if page.next_cursor else {}
+    response = jsonify(page.items)
+    response.headers.update(headers)
+    await response_cache.set(key, await response.get_data(), headers, generation)
+    if response_cache.enabled:
+        response.headers['X-Cache'] = 'MISS'
+    return await revalidated(response, tags)
+
+@bp.get('/facets')
+async def product_facets():
+    filters = known_filters(request.args.to_dict())
+    key = 'products:facets:' + urlencode(sorted(filters.items()))
+    tags = await catalog_validators(key)
+    if tags and is_not_modified(**tags):
+        return not_modified(**tags)
+    cached = await response_cache.get(key)
+    if cached is not None:
+        response = Response(cached[0], mimetype='application/json', headers={'X-Cache': 'HIT'})
+        return conditional(response, **tags)
+
+    generation = response_cache.generation
+    try:
+        facets = await service.facets(filters)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    response = jsonify(facets)
+    await response_cache.set(key, await response.get_data(), {}, generation)
+    if response_cache.enabled:
+        response.headers['X-Cache'] = 'MISS'
+    return await revalidated(response, tags)
+
+def search_args(default_limit: int):
+    query = request.args.get('q', '').strip()
+    if not query:
+        return None, (jsonify({'error': 'Missing q'}), 400)
+    try:
+        limit = max(1, min(int(request.args.get('limit', default_limit)), MAX_SEARCH_LIMIT))
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError:
+        return None, (jsonify({'error': 'Invalid limit or offset'}), 400)
+    if not service.search_enabled:
+        return None, (jsonify({'error': 'Search index disabled'}), 404)
+    return (query, limit, offset), None
+
+@bp.get('/search')
+async def search_products():
+    """Products matching every word of ``q`` (accents ignored, last word as a prefix), best first."""
+    args, error = search_args(SEARCH_LIMIT)
+    if error:
+        return error
+    total, rows = await service.search(*args)
+    response = jsonify(rows)
+    response.headers['X-Total-Count'] = str(total)
+    return response
+
+@bp.get('/suggest')
+async def suggest_terms():
+    args, error = search_args(10)
+    if error:
+        return error
+    query, limit, _ = args
+    return jsonify(await service.suggest(query, limit))
+
+@bp.get('/export')
+async def export_products():
+    """Every matching product, streamed in keyset batches as a JSON array or NDJSON."""
+    filters = request.args.to_dict()
+    args = {k: filters.pop(k) for k in EXPORT_ARGS if k in filters}
+    fmt = args.pop('format', None) or ('ndjson' if request.accept_mimetypes.best == NDJSON else 'json')
+    if fmt not in ('json', 'ndjson'):
+        return jsonify({'error': f'Invalid format: {fmt}'}), 400
+
+    pages = service.export(filters, **args)
+    # Fetch the first batch before answering so bad arguments still get a 400.
+    try:
+        first = await anext(pages, [])
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    async def batches():
+        yield first
+        async for rows in pages:
+            yield rows
+
+    if fmt == 'ndjson':
+        return Response(ndjson_chunks(batches()), mimetype=NDJSON)
+    return Response(json_array_chunks(batches()), mimetype='application/json')
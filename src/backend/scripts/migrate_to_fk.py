@@ -1,16 +1,154 @@
+"""Fill products.category_id/brand_id from the legacy text columns.
+
+Category and brand names are read with one DISTINCT query each and the
+missing rows are created in bulk. Products are then updated with set-based
+UPDATEs over id ranges, one transaction per batch; the last migrated id is
+stored in ``fk_migration_progress`` in the same transaction, so an
+interrupted run continues where it stopped.
+
+Usage (from src/):
+    python -m backend.scripts.migrate_to_fk --batch-size 10000
+    python -m backend.scripts.migrate_to_fk --restart
+"""
+
+import argparse
 import asyncio
+import sys
+import time
+from typing import List, Optional
+from tortoise import connections
+from tortoise.transactions import in_transaction
 from backend.db import init_db, close_db
-from backend.models import Product, Category, Brand
+from backend.repositories.product_repository import ProductRepository
+
+# Same fallbacks as backend.utils.importer for rows without a name
+DEFAULT_CATEGORY = "Geral"
+DEFAULT_BRAND = "Pet Shop"
+BATCH_SIZE = 10000
+CHECKPOINT = "category_brand"
+LEGACY_COLUMNS = ("category", "brand")
+
+
+def placeholders(dialect: str, count: int) -> List[str]:
+    if dialect == "postgres":
+        return [f"${i}" for i in range(1, count + 1)]
+    return ["?"] * count
+
+
+def legacy_name(column: str, placeholder: str) -> str:
+    return f"COALESCE(NULLIF(TRIM(products.{column}), ''), {placeholder})"
+
+
+async def legacy_columns_present(connection, dialect: str) -> bool:
+    if dialect == "sqlite":
+        rows = await connection.execute_query_dict("PRAGMA table_info(products)")
+    else:
+        rows = await connection.execute_query_dict(
+            "SELECT column_name AS name FROM information_schema.columns WHERE table_name = 'products'"
+        )
+    return set(LEGACY_COLUMNS) <= {row["name"] for row in rows}
+
+
+async def distinct_names(connection, dialect: str, column: str, default: str) -> List[str]:
+    (p,) = placeholders(dialect, 1)
+    rows = await connection.execute_query_dict(
+        f"SELECT DISTINCT {legacy_name(column, p)} AS name FROM products", [default]
+    )
+    return [row["name"] for row in rows]
+
+
+async def load_checkpoint(connection) -> int:
+    await connection.execute_script(
+        "CREATE TABLE IF NOT EXISTS fk_migration_progress ("
+        "name VARCHAR(64) PRIMARY KEY, last_id INTEGER NOT NULL)"
+    )
+    rows = await connection.execute_query_dict(
+        f"SELECT last_id FROM fk_migration_progress WHERE name = '{CHECKPOINT}'"
+    )
+    return rows[0]["last_id"] if rows else 0
 
-async def migrate() -> None:
+
+async def save_checkpoint(connection, dialect: str, last_id: int) -> None:
+    (p,) = placeholders(dialect, 1)
+    await connection.execute_query(
+        f"INSERT INTO fk_migration_progress (name, last_id) VALUES ('{CHECKPOINT}', {p}) "
+        "ON CONFLICT (name) DO UPDATE SET last_id = excluded.last_id",
+        [last_id],
+    )
+
+
+async def reset_checkpoint(connection) -> None:
+    await load_checkpoint(connection)
+    await connection.execute_script(f"DELETE FROM fk_migration_progress WHERE name = '{CHECKPOINT}'")
+
+
+def update_sql(dialect: str) -> str:
+    category, brand, low, high = placeholders(dialect, 4)
+    # MIN(id) keeps the result deterministic if a name was created twice
+    return (
+        "UPDATE products SET "
+        f"category_id = (SELECT MIN(id) FROM categories WHERE name = {legacy_name('category', category)}), "
+        f"brand_id = (SELECT MIN(id) FROM brands WHERE name = {legacy_name('brand', brand)}) "
+        f"WHERE id > {low} AND id <= {high}"
+    )
+
+
+async def migrate(batch_size: int = BATCH_SIZE, restart: bool = False,
+                  connection_name: str = "models", out=sys.stderr) -> Optional[int]:
+    """Run (or resume) the migration; returns the number of products updated."""
+    connection = connections.get(connection_name)
+    dialect = connection.capabilities.dialect
+    if not await legacy_columns_present(connection, dialect):
+        print("products has no legacy category/brand columns, nothing to migrate", file=out)
+        return None
+
+    repo = ProductRepository()
+    _, created_categories = await repo.resolve_categories(
+        await distinct_names(connection, dialect, "category", DEFAULT_CATEGORY), using_db=connection)
+    _, created_brands = await repo.resolve_brands(
+        await distinct_names(connection, dialect, "brand", DEFAULT_BRAND), using_db=connection)
+    print(f"created {created_categories} categories, {created_brands} brands", file=out)
+
+    if restart:
+        await reset_checkpoint(connection)
+    last_id = await load_checkpoint(connection)
+    rows = await connection.execute_query_dict("SELECT MAX(id) AS max_id FROM products")
+    max_id = rows[0]["max_id"] or 0
+    if last_id:
+        print(f"resuming after id {last_id}", file=out)
+
+    sql = update_sql(dialect)
+    updated = 0
+    start = time.perf_counter()
+    while last_id < max_id:
+        high = min(last_id + batch_size, max_id)
+        async with in_transaction(connection_name) as tx:
+            count, _ = await tx.execute_query(sql, [DEFAULT_CATEGORY, DEFAULT_BRAND, last_id, high])
+            await save_checkpoint(tx, dialect, high)
+        last_id = high
+        updated += count
+        elapsed = time.perf_counter() - start
+        print(f"\rid {last_id}/{max_id}: {updated} products ({updated / elapsed:.0f} rows/s)",
+              end="", file=out, flush=True)
+    elapsed = time.perf_counter() - start
+    rate = updated / elapsed if elapsed else 0.0
+    print(f"\nupdated {updated} products in {elapsed:.2f}s ({rate:.0f} rows/s)", file=out)
+    return updated
+
+
+async def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Fill product category/brand FKs from the legacy columns")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"product ids per transaction (default: {BATCH_SIZE})")
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore the saved checkpoint and start from the first product")
+    args = parser.parse_args(argv)
     await init_db()
-    async for prod in Product.all():
-        cat, _ = await Category.get_or_create(name=getattr(prod, "category", ""))
-        brand, _ = await Brand.get_or_create(name=getattr(prod, "brand", ""))
-        prod.category = cat
-        prod.brand = brand
-        await prod.save()
-    await close_db()
+    try:
+        await migrate(args.batch_size, args.restart)
+    finally:
+        await close_db()
+
 
 if __name__ == "__main__":
-    asyncio.run(migrate())
+    asyncio.run(main())
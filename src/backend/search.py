@@ -0,0 +1,180 @@
+import bisect
+import functools
+import heapq
+import math
+import os
+import re
+import unicodedata
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+# Relative weight of a term found in each indexed product field.
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "category": 1.5,
+    "brand": 1.5,
+    "description": 1.0,
+}
+# The last query word is also matched as a prefix ("rac" -> "racao"), at a
+# lower score than an exact term and over at most this many expansions.
+PREFIX_FACTOR = 0.5
+MAX_EXPANSIONS = 64
+# Completions kept per prefix once computed; suggest() limits are capped to it.
+MAX_SUGGESTIONS = 100
+
+WORD_RE = re.compile(r"\w+")
+
+
+@functools.lru_cache(maxsize=65536)
+def fold(text: str) -> str:
+    """Lowercase ``text`` and strip accents: "CÃES" -> "caes"."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def words(text: Optional[str]) -> List[Tuple[str, str]]:
+    """(folded term, lowercase surface form) for each word of ``text``."""
+    return [(fold(w), w) for w in WORD_RE.findall((text or "").lower())]
+
+
+class SearchIndex:
+    """Accent-folded inverted index over product name, description, category and brand.
+
+    Postings map each term to ``{product id: field weight}``; a sorted term
+    list answers prefix lookups with bisect, and the ranked completions of
+    each prefix are memoized until a term under it changes. Documents are replaced one at a
+    time with ``add`` as products change, or all at once with ``build``.
+    Results are product ids; rows are loaded from the database by the caller
+    so prices and stock are never stale.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.clear()
+
+    def clear(self) -> None:
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._documents: Dict[int, Dict[str, float]] = {}
+        self._display: Dict[str, str] = {}
+        self._terms: List[str] = []
+        self._suggestions: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def _index(self, row: Dict[str, Any]) -> Dict[str, float]:
+        terms: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for term, surface in words(row.get(field)):
+                terms[term] = terms.get(term, 0.0) + weight
+                self._display.setdefault(term, surface)
+        for term, weight in terms.items():
+            self._postings.setdefault(term, {})[row["id"]] = weight
+        self._documents[row["id"]] = terms
+        return terms
+
+    def _forget_prefixes(self, term: str) -> None:
+        # The term's document count changed, so every prefix ranking it is stale
+        for end in range(1, len(term) + 1):
+            self._suggestions.pop(term[:end], None)
+
+    def add(self, row: Dict[str, Any]) -> None:
+        """Index (or re-index) one product row with id, name, description, category and brand."""
+        self.remove(row["id"])
+        for term in self._index(row):
+            self._forget_prefixes(term)
+            i = bisect.bisect_left(self._terms, term)
+            if i == len(self._terms) or self._terms[i] != term:
+                self._terms.insert(i, term)
+
+    def remove(self, product_id: int) -> None:
+        for term in self._documents.pop(product_id, ()):
+            self._forget_prefixes(term)
+            postings = self._postings[term]
+            del postings[product_id]
+            if not postings:
+                del self._postings[term]
+                del self._display[term]
+                del self._terms[bisect.bisect_left(self._terms, term)]
+
+    async def build(self, pages: AsyncIterator[List[Dict[str, Any]]]) -> int:
+        """Replace the whole index with the rows from ``pages``; returns the product count.
+
+        The new index is swapped in once every page was read, so searches
+        keep using the old one in the meantime.
+        """
+        fresh = SearchIndex(self.enabled)
+        async for rows in pages:
+            for row in rows:
+                fresh._index(row)
+        self._postings, self._documents, self._display = fresh._postings, fresh._documents, fresh._display
+        self._terms = sorted(self._postings)
+        self._suggestions = {}
+        return len(self._documents)
+
+    def _prefixed(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self._terms, prefix)
+        end = bisect.bisect_left(self._terms, prefix + "\uffff", start)
+        return self._terms[start:end]
+
+    def _idf(self, term: str) -> float:
+        df = len(self._postings[term])
+        return math.log(1 + (len(self._documents) - df + 0.5) / (df + 0.5))
+
+    def _scores(self, term: str, prefix: bool) -> Dict[int, float]:
+        candidates = [(term, 1.0)] if term in self._postings else []
+        if prefix:
+            expansions = [t for t in self._prefixed(term) if t != term]
+            if len(expansions) > MAX_EXPANSIONS:
+                expansions = heapq.nlargest(MAX_EXPANSIONS, expansions, key=lambda t: len(self._postings[t]))
+            candidates += [(t, PREFIX_FACTOR) for t in expansions]
+        scores: Dict[int, float] = {}
+        for candidate, factor in candidates:
+            idf = self._idf(candidate) * factor
+            for product_id, weight in self._postings[candidate].items():
+                score = weight * idf
+                if score > scores.get(product_id, 0.0):
+                    scores[product_id] = score
+        return scores
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Tuple[int, List[int]]:
+        """Ids of the products matching every word of ``query``, best first.
+
+        Returns the total number of matches and the ids of the requested slice.
+        """
+        terms = list(dict.fromkeys(term for term, _ in words(query)))
+        if not terms:
+            return 0, []
+        per_term = [self._scores(term, prefix=i == len(terms) - 1) for i, term in enumerate(terms)]
+        per_term.sort(key=len)
+        totals = dict(per_term[0])
+        for scores in per_term[1:]:
+            totals = {pid: score + scores[pid] for pid, score in totals.items() if pid in scores}
+        ranked = heapq.nsmallest(offset + limit, totals, key=lambda pid: (-totals[pid], pid))
+        return len(totals), ranked[offset:]
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Completions of the last word of ``prefix``, most common first."""
+        found = words(prefix)
+        if not found:
+            return []
+        prefix = found[-1][0]
+        best = self._suggestions.get(prefix)
+        if best is None:
+            best = heapq.nsmallest(MAX_SUGGESTIONS, self._prefixed(prefix),
+                                   key=lambda t: (-len(self._postings[t]), t))
+            if best:  # prefixes of indexed terms only, so the memo stays bounded
+                self._suggestions[prefix] = best
+        return [{"text": self._display[t], "count": len(self._postings[t])} for t in best[:limit]]
+
+    def stats(self) -> dict:
+        return {"products": len(self._documents), "terms": len(self._terms)}
+
+
+search_index = SearchIndex()
+
+
+def configure_search() -> SearchIndex:
+    """Enable or disable the index from SEARCH_INDEX (``0`` disables) and empty it."""
+    search_index.enabled = os.getenv("SEARCH_INDEX", "1") != "0"
+    search_index.clear()
+    return search_index
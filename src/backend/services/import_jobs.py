@@ -0,0 +1,200 @@
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+from backend.services.product_service import ImportReport, ProductService
+
+IMPORT_CHUNK_SIZE = 5000
+MAX_ERRORS = 20
+# Finished jobs kept for status queries; older ones are forgotten.
+MAX_FINISHED_JOBS = 100
+
+SHEET_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+FINISHED = ('done', 'failed', 'cancelled')
+
+class QueueFull(Exception):
+    """Raised by ImportJobs.submit when the configured number of jobs is already waiting."""
+
+@dataclass
+class ImportJob:
+    id: str
+    filename: str
+    path: str
+    upsert: bool = False
+    status: str = 'queued'
+    total: int | None = None
+    processed: int = 0
+    report: ImportReport = field(default_factory=ImportReport)
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    cancel_requested: bool = False
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        rate = self.processed / elapsed if elapsed else 0.0
+        remaining = (self.total or 0) - self.processed
+        eta = remaining / rate if rate and self.status == 'running' else None
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'mode': 'upsert' if self.upsert else 'insert',
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed,
+            'progress': self.processed / self.total if self.total else None,
+            'created': self.report.created,
+            'updated': self.report.updated,
+            'unchanged': self.report.unchanged,
+            'skipped': self.report.skipped,
+            'categories_created': self.report.categories_created,
+            'brands_created': self.report.brands_created,
+            'rows_per_second': round(rate, 1),
+            'elapsed_seconds': round(elapsed, 3),
+            'eta_seconds': round(eta, 1) if eta is not None else None,
+            'errors': self.errors,
+        }
+
+class ImportJobs:
+    """Queue of sheet imports run by a fixed number of background workers.
+
+    Each job is read off the event loop (pandas in a thread) and written in
+    chunks of ``chunk_size`` rows, one transaction per chunk, so catalog reads
+    get the database between chunks and cancellation takes effect at the next
+    chunk boundary. Rows of the chunks already committed stay imported; with
+    ``upsert`` the same sheet can simply be submitted again. At most
+    ``workers`` imports run at once and ``queue_size`` wait.
+    """
+
+    def __init__(self, workers: int = 1, queue_size: int = 10,
+                 chunk_size: int = IMPORT_CHUNK_SIZE, upload_dir: str | None = None):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.chunk_size = chunk_size
+        self.upload_dir = upload_dir or os.path.join(tempfile.gettempdir(), 'catalog-imports')
+        self.service: ProductService | None = None
+        self._jobs: 'OrderedDict[str, ImportJob]' = OrderedDict()
+        self._queue: asyncio.Queue | None = None
+        self._tasks: List[asyncio.Task] = []
+
+    def upload_path(self, filename: str) -> str:
+        os.makedirs(self.upload_dir, exist_ok=True)
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(self.upload_dir, f'{uuid.uuid4().hex}{extension}')
+
+    def submit(self, path: str, filename: str, upsert: bool = False) -> ImportJob:
+        """Queue the sheet at ``path`` (owned by the job from now on)."""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if sum(1 for job in self._jobs.values() if job.status == 'queued') >= self.queue_size:
+            raise QueueFull(f'{self.queue_size} imports are already waiting')
+        job = ImportJob(uuid.uuid4().hex, filename, path, upsert)
+        self._jobs[job.id] = job
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> ImportJob | None:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[ImportJob]:
+        return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> ImportJob | None:
+        job = self._jobs.get(job_id)
+        if job is not None and job.status not in FINISHED:
+            job.cancel_requested = True
+            if job.status == 'queued':
+                self._finish(job, 'cancelled')
+        return job
+
+    def start(self, service: ProductService) -> None:
+        self.service = service
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job in list(self._jobs.values()):
+            if job.status not in FINISHED:
+                self._finish(job, 'cancelled')
+        # Queues are bound to the event loop that served them.
+        self._queue = None
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            if job.status != 'queued':
+                continue
+            try:
+                await self.run(job)
+            except asyncio.CancelledError:
+                self._finish(job, 'cancelled')
+                raise
+
+    def _finish(self, job: ImportJob, status: str) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        if os.path.exists(job.path):
+            os.remove(job.path)
+        finished = [j.id for j in self._jobs.values() if j.status in FINISHED]
+        for job_id in finished[:-MAX_FINISHED_JOBS]:
+            del self._jobs[job_id]
+
+    def _error(self, job: ImportJob, rows: str, exc: Exception) -> None:
+        if len(job.errors) < MAX_ERRORS:
+            job.errors.append({'rows': rows, 'error': str(exc) or type(exc).__name__})
+
+    async def run(self, job: ImportJob) -> None:
+        from backend.utils.importer import load_sheet
+
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            records, fields = await asyncio.to_thread(load_sheet, job.path)
+        except Exception as exc:
+            self._error(job, 'all', exc)
+            self._finish(job, 'failed')
+            return
+        job.total = len(records)
+        failed = 0
+        for offset in range(0, len(records), self.chunk_size):
+            if job.cancel_requested:
+                self._finish(job, 'cancelled')
+                return
+            chunk = records[offset:offset + self.chunk_size]
+            try:
+                if job.upsert:
+                    report = await self.service.upsert_products(chunk, fields=fields)
+                else:
+                    report = await self.service.import_products(chunk)
+            except Exception as exc:
+                failed += len(chunk)
+                self._error(job, f'{offset + 1}-{offset + len(chunk)}', exc)
+            else:
+                for name in ('created', 'updated', 'unchanged', 'skipped',
+                             'categories_created', 'brands_created'):
+                    setattr(job.report, name, getattr(job.report, name) + getattr(report, name))
+            job.processed += len(chunk)
+            # Let queued requests use the database before the next chunk.
+            await asyncio.sleep(0)
+        self._finish(job, 'failed' if records and failed == len(records) else 'done')
+
+import_jobs = ImportJobs()
+
+def configure_import_jobs() -> ImportJobs:
+    """Apply IMPORT_WORKERS, IMPORT_QUEUE_SIZE, IMPORT_CHUNK_SIZE and IMPORT_DIR."""
+    import_jobs.workers = max(1, int(os.getenv('IMPORT_WORKERS', '1')))
+    import_jobs.queue_size = int(os.getenv('IMPORT_QUEUE_SIZE', '10'))
+    import_jobs.chunk_size = max(1, int(os.getenv('IMPORT_CHUNK_SIZE', str(IMPORT_CHUNK_SIZE))))
+    import_jobs.upload_dir = os.getenv('IMPORT_DIR') or import_jobs.upload_dir
+    return import_jobs
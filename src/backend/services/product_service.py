@@ -1,19 +1,468 @@
-from typing import List, Dict
-from backend.models import Product
-from backend.repositories.product_repository import ProductRepository, ProductIn
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Tuple
+from tortoise import timezone as tz
+from tortoise.transactions import in_transaction
+from backend.cache import ResponseCache
+from backend.models import Brand, Category, Product
+from backend.repositories.product_repository import MAX_PAGE_SIZE, ProductRepository, ProductIn, ProductPage
+from backend.search import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+MAX_BATCH_ITEMS = 5000
+# updated_at is stamped before commit, so each search sync also re-reads the
+# rows stamped this long before the previous one.
+SEARCH_SYNC_OVERLAP = timedelta(seconds=60)
+# Patched fields that change what the search index holds for a product.
+SEARCH_FIELDS = frozenset({'name', 'description', 'category_id', 'brand_id'})
+
+# Accepted JSON types per ProductIn field for batch payloads, and whether null is allowed.
+FIELD_TYPES = {
+    'name': ((str,), False),
+    'description': ((str,), True),
+    'category_id': ((int,), False),
+    'brand_id': ((int,), False),
+    'price': ((int, float), False),
+    'stock': ((int,), False),
+    'sku': ((str,), True),
+}
+CREATE_REQUIRED = ('name', 'category_id', 'brand_id')
+
+class StockConflict(Exception):
+    """Raised inside an atomic stock batch to roll it back."""
+
+# Record keys an upsert compares and rewrites, with the product column they map to.
+UPSERT_FIELDS = {
+    'name': 'name',
+    'description': 'description',
+    'price': 'price',
+    'stock': 'stock',
+    'category': 'category_id',
+    'brand': 'brand_id',
+}
+
+VERSION_CACHE_KEY = 'products:version'
+
+@dataclass
+class CatalogVersion:
+    last_modified: datetime | None
+    revision: int
+
+    def etag(self, scope: str) -> str:
+        """Strong validator for a response of ``scope`` at this catalog version."""
+        stamp = self.last_modified.isoformat() if self.last_modified else ''
+        return hashlib.sha1(f'{scope}|{stamp}|{self.revision}'.encode()).hexdigest()
+
+def field_errors(data: Any, required: Iterable[str] = ()) -> str | None:
+    """Why ``data`` is not a valid set of ProductIn fields, or None."""
+    if not isinstance(data, dict):
+        return 'Expected an object'
+    unknown = sorted(set(data) - set(FIELD_TYPES))
+    if unknown:
+        return f"Unknown fields: {', '.join(unknown)}"
+    missing = [f for f in required if data.get(f) is None]
+    if missing:
+        return f"Missing fields: {', '.join(missing)}"
+    for name, value in data.items():
+        types, nullable = FIELD_TYPES[name]
+        if value is None and nullable:
+            continue
+        if isinstance(value, bool) or not isinstance(value, types):
+            return f'Invalid value for {name}'
+    return None
+
+def item_result(index: int, status: str, **extra) -> Dict[str, Any]:
+    return {'index': index, 'status': status, **extra}
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+    categories_created: int = 0
+    brands_created: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        processed = self.created + self.updated + self.unchanged + self.skipped
+        return processed / self.seconds if self.seconds else 0.0
 
 class ProductService:
-    def __init__(self, repo: ProductRepository):
+    def __init__(self, repo: ProductRepository, cache: ResponseCache | None = None,
+                 search: SearchIndex | None = None):
         self.repo = repo
+        self.cache = cache
+        self.search_index = search
+        # When the last sync (or rebuild) started, and the updated_at of the
+        # rows it indexed inside the overlap window
+        self.search_synced: datetime | None = None
+        self._search_stamps: Dict[int, datetime] = {}
+        self._search_task: asyncio.Task | None = None
+
+    async def _invalidate(self) -> None:
+        # Called after every write that changed the catalog, once committed.
+        # Bumping after the commit means a response read before it can only
+        # be tagged with the previous revision, never with the new one.
+        await self.repo.bump_revision()
+        if self.cache is not None:
+            await self.cache.invalidate()
+
+    async def version(self) -> CatalogVersion:
+        """Current catalog version, kept in the response cache until the next write."""
+        cached = await self.cache.get(VERSION_CACHE_KEY) if self.cache else None
+        if cached is not None:
+            data = json.loads(cached[0])
+            stamp = data['last_modified']
+            return CatalogVersion(stamp and datetime.fromtimestamp(stamp, timezone.utc), data['revision'])
+        generation = self.cache.generation if self.cache else 0
+        version = CatalogVersion(*await self.repo.version())
+        if self.cache:
+            stamp = version.last_modified.timestamp() if version.last_modified else None
+            body = json.dumps({'last_modified': stamp, 'revision': version.revision}).encode()
+            await self.cache.set(VERSION_CACHE_KEY, body, {}, generation)
+        return version
+
+    @property
+    def search_enabled(self) -> bool:
+        return self.search_index is not None and self.search_index.enabled
+
+    async def rebuild_search(self) -> int | None:
+        """Index every product from scratch; returns the count, or None when search is disabled."""
+        if not self.search_enabled:
+            return None
+        self.search_synced, self._search_stamps = tz.now(), {}
+        return await self.search_index.build(self.repo.iter_changed(None))
+
+    async def _index(self, ids: Iterable[int]) -> None:
+        # Called by the write paths once committed; ids that no longer exist are skipped.
+        if not self.search_enabled:
+            return
+        ids = list(ids)
+        syncing = self._search_task is not None
+        for offset in range(0, len(ids), MAX_PAGE_SIZE):
+            for row in await self.repo.get_rows(ids[offset:offset + MAX_PAGE_SIZE], with_updated_at=True):
+                self.search_index.add(row)
+                if syncing:
+                    # So the next sync does not index the row again
+                    self._search_stamps[row['id']] = row['updated_at']
+
+    async def sync_search(self) -> int:
+        """Index the rows other processes (workers, the CLI importer) wrote since the last sync.
+
+        Writes made through this service are indexed as they commit; this
+        catches the rest. Rows stamped up to SEARCH_SYNC_OVERLAP before the
+        previous sync are read again, skipping those already indexed at the
+        same updated_at, so a transaction that commits late is still seen.
+        Returns how many rows were (re)indexed.
+        """
+        if not self.search_enabled or self.search_synced is None:
+            return 0
+        started = tz.now()
+        since = self.search_synced - SEARCH_SYNC_OVERLAP
+        stamps = {pid: stamp for pid, stamp in self._search_stamps.items() if stamp >= since}
+        count = 0
+        async for rows in self.repo.iter_changed(since):
+            for row in rows:
+                if stamps.get(row['id']) != row['updated_at']:
+                    self.search_index.add(row)
+                    stamps[row['id']] = row['updated_at']
+                    count += 1
+        self.search_synced, self._search_stamps = started, stamps
+        return count
+
+    def start_search_sync(self, interval: float) -> None:
+        """Run sync_search every ``interval`` seconds in the background (0 disables it)."""
+        if self.search_enabled and interval > 0:
+            self._search_task = asyncio.create_task(self._search_sync_loop(interval))
+
+    async def stop_search_sync(self) -> None:
+        if self._search_task is not None:
+            self._search_task.cancel()
+            await asyncio.gather(self._search_task, return_exceptions=True)
+            self._search_task = None
+
+    async def _search_sync_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sync_search()
+            except Exception:
+                logger.exception('search index sync failed')
+
+    async def search(self, query: str, limit: int = 20, offset: int = 0) -> Tuple[int, List[Dict[str, Any]]]:
+        """Ranked full-text matches: the total count and the rows of the requested slice."""
+        total, ids = self.search_index.search(query, limit, offset)
+        return total, await self.repo.get_rows(ids)
+
+    async def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        return self.search_index.suggest(prefix, limit)
+
+    async def get(self, product_id: int) -> Dict[str, Any] | None:
+        return await self.repo.get_row(product_id)
 
     async def create(self, data: ProductIn) -> Product:
-        return await self.repo.create(data)
+        product = await self.repo.create(data)
+        await self._invalidate()
+        await self._index([product.id])
+        return product
 
     async def update(self, product_id: int, data: ProductIn) -> Product | None:
         product = await self.repo.get(product_id)
         if not product:
             return None
-        return await self.repo.update(product, data)
+        product = await self.repo.update(product, data)
+        await self._invalidate()
+        await self._index([product.id])
+        return product
+
+    async def list(self, filters: Dict[str, str], **page_args) -> ProductPage:
+        return await self.repo.list(filters, **page_args)
+
+    async def create_many(self, payloads: List[Any]) -> List[Dict[str, Any]]:
+        """Validate and insert products in one transaction with a multi-row INSERT.
+
+        Returns one result per payload, in order: ``created`` with the new id,
+        or ``error`` for payloads that were rejected (and not inserted).
+        """
+        results: List[Dict[str, Any] | None] = [None] * len(payloads)
+        valid: Dict[int, ProductIn] = {}
+        skus = set()
+        for index, data in enumerate(payloads):
+            error = field_errors(data, CREATE_REQUIRED)
+            if error is None and data.get('sku'):
+                error = 'Duplicate sku in batch' if data['sku'] in skus else None
+                skus.add(data['sku'])
+            if error:
+                results[index] = item_result(index, 'error', error=error)
+            else:
+                valid[index] = ProductIn(**data)
+
+        async with in_transaction() as tx:
+            categories = await self.repo.existing_ids(Category, {p.category_id for p in valid.values()}, tx)
+            brands = await self.repo.existing_ids(Brand, {p.brand_id for p in valid.values()}, tx)
+            taken = await self.repo.find_by_skus([p.sku for p in valid.values() if p.sku], [], tx)
+            for index, item in list(valid.items()):
+                error = ('Unknown category_id' if item.category_id not in categories else
+                         'Unknown brand_id' if item.brand_id not in brands else
+                         'sku already exists' if item.sku in taken else None)
+                if error:
+                    results[index] = item_result(index, 'error', error=error)
+                    del valid[index]
+            ids = await self.repo.reserve_ids(len(valid), tx)
+            await self.repo.bulk_create(list(valid.values()), using_db=tx, ids=ids)
+        for index, product_id in zip(valid, ids):
+            results[index] = item_result(index, 'created', id=product_id)
+        if valid:
+            await self._invalidate()
+            await self._index(ids)
+        return results
+
+    async def update_many(self, patches: List[Any]) -> List[Dict[str, Any]]:
+        """Apply partial updates (``{"id": ..., field: value}``) in one transaction.
+
+        Only the fields present in each patch are written, with CASE-based bulk
+        UPDATEs instead of a read-modify-save per product. Results are
+        ``updated``, ``not_found`` or ``error``, one per patch.
+        """
+        results: List[Dict[str, Any] | None] = [None] * len(patches)
+        changes: Dict[int, Dict[str, Any]] = {}
+        index_of: Dict[int, int] = {}
+        skus = set()
+        for index, data in enumerate(patches):
+            product_id = data.get('id') if isinstance(data, dict) else None
+            fields = {k: v for k, v in data.items() if k != 'id'} if isinstance(data, dict) else data
+            error = field_errors(fields)
+            if error is None and (isinstance(product_id, bool) or not isinstance(product_id, int)):
+                error = 'Missing or invalid id'
+            elif error is None and not fields:
+                error = 'No fields to update'
+            elif error is None and product_id in changes:
+                error = 'Duplicate id in batch'
+            elif error is None and fields.get('sku'):
+                error = 'Duplicate sku in batch' if fields['sku'] in skus else None
+                skus.add(fields['sku'])
+            if error:
+                results[index] = item_result(index, 'error', error=error)
+            else:
+                changes[product_id] = fields
+                index_of[product_id] = index
+
+        async with in_transaction() as tx:
+            categories = await self.repo.existing_ids(
+                Category, {c['category_id'] for c in changes.values() if 'category_id' in c}, tx)
+            brands = await self.repo.existing_ids(
+                Brand, {c['brand_id'] for c in changes.values() if 'brand_id' in c}, tx)
+            requested = [c['sku'] for c in changes.values() if c.get('sku')]
+            taken = await self.repo.find_by_skus(requested, ['id'], tx) if requested else {}
+            for product_id, fields in list(changes.items()):
+                if 'category_id' in fields and fields['category_id'] not in categories:
+                    error = 'Unknown category_id'
+                elif 'brand_id' in fields and fields['brand_id'] not in brands:
+                    error = 'Unknown brand_id'
+                elif fields.get('sku') in taken and taken[fields['sku']]['id'] != product_id:
+                    error = 'sku already exists'
+                else:
+                    continue
+                results[index_of[product_id]] = item_result(index_of[product_id], 'error', error=error)
+                del changes[product_id]
+            updated = await self.repo.bulk_update(changes, using_db=tx) if changes else set()
+        for product_id in changes:
+            status = 'updated' if product_id in updated else 'not_found'
+            results[index_of[product_id]] = item_result(index_of[product_id], status, id=product_id)
+        if updated:
+            await self._invalidate()
+            await self._index(pid for pid in updated if SEARCH_FIELDS & changes[pid].keys())
+        return results
+
+    async def adjust_stock(self, product_id: int, delta: int, using_db=None) -> Dict[str, Any]:
+        """Apply a stock delta atomically; status is ``ok``, ``not_found`` or ``insufficient_stock``."""
+        stock = await self.repo.adjust_stock(product_id, delta, using_db=using_db)
+        if stock is not None:
+            if using_db is None:
+                await self._invalidate()
+            return {'id': product_id, 'status': 'ok', 'stock': stock}
+        # Only the failure path needs to know why the guarded UPDATE matched nothing.
+        found = await self.repo.exists(product_id, using_db=using_db)
+        return {'id': product_id, 'status': 'insufficient_stock' if found else 'not_found'}
+
+    async def adjust_stock_many(self, items: List[Any], atomic: bool = False) -> List[Dict[str, Any]]:
+        """Apply ``[{"id": ..., "delta": ...}]`` in one transaction, in order.
+
+        With ``atomic`` a single failing item rolls back the whole batch and the
+        applied items are reported as ``rolled_back``.
+        """
+        results: List[Dict[str, Any]] = []
+        try:
+            async with in_transaction() as tx:
+                for index, item in enumerate(items):
+                    product_id = item.get('id') if isinstance(item, dict) else None
+                    delta = item.get('delta') if isinstance(item, dict) else None
+                    if any(isinstance(v, bool) or not isinstance(v, int) for v in (product_id, delta)):
+                        result = {'id': product_id, 'status': 'error', 'error': 'Expected integer id and delta'}
+                    else:
+                        result = await self.adjust_stock(product_id, delta, using_db=tx)
+                    results.append(item_result(index, **result))
+                if atomic and any(r['status'] != 'ok' for r in results):
+                    raise StockConflict()
+        except StockConflict:
+            for result in results:
+                if result['status'] == 'ok':
+                    result['status'] = 'rolled_back'
+                    del result['stock']
+            return results
+        if any(r['status'] == 'ok' for r in results):
+            await self._invalidate()
+        return results
+
+    async def facets(self, filters: Dict[str, str]) -> Dict[str, Any]:
+        return await self.repo.facets(filters)
+
+    def export(self, filters: Dict[str, str], **sort_args) -> AsyncIterator[List[Dict[str, Any]]]:
+        """All matching rows in bounded batches, for streamed responses."""
+        return self.repo.iter_pages(filters, **sort_args)
+
+    async def import_products(self, records: List[Dict[str, Any]],
+                              batch_size: int = IMPORT_BATCH_SIZE,
+                              progress: Callable[[int, int], None] | None = None) -> ImportReport:
+        """Insert product records in batches inside a single transaction.
+
+        Each record has ``name``, ``description``, ``category``, ``brand``,
+        ``price`` and ``stock``; category and brand are names resolved to ids
+        up front. ``progress`` is called with ``(done, total)`` after each batch.
+        """
+        report = ImportReport()
+        start = time.perf_counter()
+        total = len(records)
+        created_ids: List[int] = []
+        async with in_transaction() as tx:
+            categories, report.categories_created = await self.repo.resolve_categories(
+                {r['category'] for r in records}, using_db=tx)
+            brands, report.brands_created = await self.repo.resolve_brands(
+                {r['brand'] for r in records}, using_db=tx)
+            for offset in range(0, total, batch_size):
+                batch = [
+                    ProductIn(name=r['name'], description=r['description'],
+                              category_id=categories[r['category']],
+                              brand_id=brands[r['brand']],
+                              price=r['price'], stock=r['stock'], sku=r.get('sku'))
+                    for r in records[offset:offset + batch_size]
+                ]
+                # Explicit ids only to index the new rows afterwards
+                ids = await self.repo.reserve_ids(len(batch), tx) if self.search_enabled else None
+                await self.repo.bulk_create(batch, using_db=tx, ids=ids)
+                created_ids.extend(ids or ())
+                report.created += len(batch)
+                if progress:
+                    progress(report.created, total)
+        if report.created:
+            await self._invalidate()
+            await self._index(created_ids)
+        report.seconds = time.perf_counter() - start
+        return report
+
+    async def upsert_products(self, records: List[Dict[str, Any]],
+                              fields: Iterable[str] = tuple(UPSERT_FIELDS),
+                              batch_size: int = IMPORT_BATCH_SIZE,
+                              progress: Callable[[int, int], None] | None = None) -> ImportReport:
+        """Insert or update records keyed on their ``sku``.
 
-    async def list(self, filters: Dict[str, str]) -> List[Product]:
-        return await self.repo.list(filters)
+        Only ``fields`` (keys of UPSERT_FIELDS the source actually provides)
+        are compared against the stored row; rows where none of them changed
+        are not written at all. Records without a sku are skipped. When a sku
+        repeats, the last record wins.
+        """
+        report = ImportReport()
+        start = time.perf_counter()
+        columns = [UPSERT_FIELDS[f] for f in UPSERT_FIELDS if f in set(fields)]
+        by_sku: Dict[str, Dict[str, Any]] = {}
+        for record in records:
+            if record.get('sku'):
+                by_sku[record['sku']] = record
+            else:
+                report.skipped += 1
+        items = list(by_sku.values())
+        written: List[str] = []
+        async with in_transaction() as tx:
+            categories, report.categories_created = await self.repo.resolve_categories(
+                {r['category'] for r in items}, using_db=tx)
+            brands, report.brands_created = await self.repo.resolve_brands(
+                {r['brand'] for r in items}, using_db=tx)
+            for offset in range(0, len(items), batch_size):
+                batch = items[offset:offset + batch_size]
+                existing = await self.repo.find_by_skus([r['sku'] for r in batch], columns, using_db=tx)
+                writes = []
+                for r in batch:
+                    item = ProductIn(sku=r['sku'], name=r['name'], description=r['description'],
+                                     category_id=categories[r['category']],
+                                     brand_id=brands[r['brand']],
+                                     price=r['price'], stock=r['stock'])
+                    current = existing.get(r['sku'])
+                    if current is None:
+                        report.created += 1
+                    elif any(current[c] != getattr(item, c) for c in columns):
+                        report.updated += 1
+                    else:
+                        report.unchanged += 1
+                        continue
+                    writes.append(item)
+                await self.repo.upsert(writes, columns, using_db=tx)
+                written.extend(item.sku for item in writes)
+                if progress:
+                    progress(offset + len(batch), len(items))
+        if report.created or report.updated:
+            await self._invalidate()
+            if self.search_enabled:
+                for offset in range(0, len(written), MAX_PAGE_SIZE):
+                    rows = await self.repo.find_by_skus(written[offset:offset + MAX_PAGE_SIZE], ['id'])
+                    await self._index(row['id'] for row in rows.values())
+        report.seconds = time.perf_counter() - start
+        return report
@@ -0,0 +1,247 @@
+import json
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import process_products  # noqa: E402
+
+SHEET = """id,NCM,description,cadastro,status,promo_price,unit_price,tax,net_after_commission,cost,lucro,margin,product
+BRINQUEDOS,,,,,,,,,,,,
+010210,3926.90.90,Comedouro gato AF - 150 mL,ok,,R$ 8.55,R$ 9.50,,,1.05,,122,
+010211,3926.90.90,Bola maciça,ok,,,R$ 12.00,,,2.5,,80,
+010212,3926.90.90,Ratinho NA,NA,,,R$ 4.90,,,,,,
+010213,3926.90.90,Caixa transporte MMA,ok,,,sem preço,,,30,,50,
+"""
+
+
+def write_sheet(tmp_path, text=SHEET, name='produtos.csv'):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_stream_and_batch_modes_write_the_same_catalog(tmp_path):
+    sheet = write_sheet(tmp_path)
+    batch, stream = str(tmp_path / 'batch.json'), str(tmp_path / 'stream.json')
+
+    process_products.save_products_json(process_products.process_csv_to_products(sheet), batch)
+    process_products.stream_csv_to_file(sheet, stream)
+
+    with open(batch, encoding='utf-8') as a, open(stream, encoding='utf-8') as b:
+        assert a.read() == b.read()
+    vectorized = process_products.process_csv_to_products(sheet, engine='vectorized')
+    assert vectorized == process_products.process_csv_to_products(sheet)
+    assert [p['name'] for p in vectorized] == ['Comedouro gato AF - 150 mL', 'Bola maciça', 'Ratinho NA']
+
+
+def catalog(count):
+    # Categorias e marcas novas aparecem em lotes posteriores
+    categories = ['Brinquedos', 'Higiene', 'Transporte', 'Brinquedos', 'Diversos']
+    brands = ['Pet Shop', 'Pet Shop', 'Ferplast', 'Mma', 'Ferplast']
+    return [process_products.build_product(
+        i, f'Produto {i}', f'produto-{i}', 10.0 + i, 9.0 + i if i % 2 else 0.0, 9.0 + i if i % 2 else 10.0 + i,
+        1.5 * i, 100.0 + i, categories[(i - 1) % 5], brands[(i - 1) % 5], 25, i % 3 != 0)
+        for i in range(1, count + 1)]
+
+
+def assert_round_trip(table, products):
+    rows = sorted(table.to_pylist(), key=lambda row: row['id'])
+    assert len(rows) == len(products)
+    for row, product in zip(rows, products):
+        for key in ('id', 'name', 'price', 'originalPrice', 'category', 'brand', 'active',
+                    'images', 'tags', 'dimensions', 'seo'):
+            assert row[key] == product[key], key
+        assert row['createdAt'].isoformat() == '2025-01-01T00:00:00+00:00'
+
+
+def test_parquet_round_trip_in_small_row_groups(tmp_path):
+    pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    from catalog_columnar import ColumnarWriter, read_products_columnar
+    products = catalog(7)
+    path = str(tmp_path / 'produtos.parquet')
+
+    with ColumnarWriter(path, batch_size=2) as writer:
+        for product in products:
+            writer.write(product)
+
+    assert pq.ParquetFile(path).num_row_groups == 4
+    table = read_products_columnar(path)
+    assert str(table.schema.field('category').type) == 'dictionary<values=string, indices=int32, ordered=0>'
+    assert_round_trip(table, products)
+
+
+def test_partitioned_parquet_round_trip(tmp_path):
+    pytest.importorskip('pyarrow')
+    from catalog_columnar import ColumnarWriter, read_products_columnar
+    products = catalog(7)
+    path = str(tmp_path / 'produtos')
+
+    with ColumnarWriter(path, partition_by='category', batch_size=2) as writer:
+        for product in products:
+            writer.write(product)
+
+    assert sorted(os.listdir(path)) == ['category=Brinquedos', 'category=Diversos',
+                                        'category=Higiene', 'category=Transporte']
+    assert_round_trip(read_products_columnar(path), products)
+    brinquedos = read_products_columnar(os.path.join(path, 'category=Brinquedos', 'part-0.parquet'))
+    assert brinquedos.column('id').to_pylist() == [1, 4, 6]
+
+
+def test_arrow_ipc_round_trip_with_dictionary_deltas(tmp_path):
+    pytest.importorskip('pyarrow')
+    from catalog_columnar import ColumnarWriter, read_products_columnar
+    products = catalog(7)
+    path = str(tmp_path / 'produtos.arrow')
+
+    with ColumnarWriter(path, fmt='arrow', compression='zstd', batch_size=2) as writer:
+        for product in products:
+            writer.write(product)
+
+    table = read_products_columnar(path, fmt='arrow')
+    assert table.column('category').num_chunks == 4
+    assert_round_trip(table, products)
+
+
+def test_columnar_writer_writes_an_empty_catalog(tmp_path):
+    pytest.importorskip('pyarrow')
+    from catalog_columnar import read_products_columnar, save_products_columnar
+    path = str(tmp_path / 'vazio.parquet')
+
+    assert save_products_columnar([], path) == 0
+    assert read_products_columnar(path).num_rows == 0
+
+
+def test_simple_converter_writes_parquet_next_to_the_json(tmp_path):
+    pytest.importorskip('pyarrow')
+    import process_products_simple
+    from catalog_columnar import read_products_columnar
+    products = process_products_simple.process_csv_to_products(write_sheet(tmp_path))
+    path = str(tmp_path / 'produtos.parquet')
+    assert products
+
+    assert process_products_simple.save_products_parquet(products, path)
+    assert_round_trip(read_products_columnar(path), products)
+
+
+def test_incremental_rerun_without_changes_keeps_the_outputs(tmp_path, capsys):
+    pytest.importorskip('pyarrow')
+    from catalog_columnar import read_products_columnar
+    sheet = write_sheet(tmp_path)
+    output, parquet = str(tmp_path / 'produtos.json'), str(tmp_path / 'produtos.parquet')
+    argv = [sheet, output, '--incremental', '--parquet', parquet]
+
+    assert process_products.main(argv) == 0
+    first = capsys.readouterr().out
+    with open(output, encoding='utf-8') as f:
+        catalog_json = f.read()
+    parquet_mtime = os.stat(parquet).st_mtime_ns
+
+    # A linha sem preço fica no manifesto e não impede o caminho sem alterações
+    result = process_products.incremental_build(sheet, output)
+    assert (result.changed, result.entries, result.count) == (False, [], 3)
+
+    assert process_products.main(argv) == 0
+    assert capsys.readouterr().out == first
+    with open(output, encoding='utf-8') as f:
+        assert f.read() == catalog_json
+    assert os.stat(parquet).st_mtime_ns == parquet_mtime
+    assert read_products_columnar(parquet).num_rows == 3
+
+
+def test_incremental_build_keeps_ids_and_reports_the_patch(tmp_path):
+    output = str(tmp_path / 'produtos.json')
+    process_products.incremental_build(write_sheet(tmp_path), output)
+    edited = (SHEET.replace('R$ 12.00', 'R$ 13.00')
+                   .replace('010210,', '010299,')
+                   .replace('sem preço', 'R$ 40.00'))
+
+    summary = process_products.CatalogSummary()
+    result = process_products.incremental_build(write_sheet(tmp_path, edited), output, summary=summary)
+
+    assert [(p['id'], p['name']) for p in result.added] == [(4, 'Comedouro gato AF - 150 mL'),
+                                                            (5, 'Caixa transporte MMA')]
+    assert [(p['id'], p['name']) for p in result.updated] == [(2, 'Bola maciça')]
+    assert result.removed == [1]
+    assert result.count == summary.total == 4
+    with open(output, encoding='utf-8') as f:
+        assert [p['id'] for p in json.load(f)] == [4, 2, 3, 5]
+
+
+
+def test_incremental_build_matches_the_full_build_with_repeated_codes(tmp_path):
+    sheet = write_sheet(tmp_path, SHEET + '010211,3926.90.90,Bola maciça grande,ok,,,R$ 15.00,,,3,,80,\n')
+    full, output = str(tmp_path / 'full.json'), str(tmp_path / 'produtos.json')
+    process_products.save_products_json(process_products.process_csv_to_products(sheet), full)
+    with open(full, encoding='utf-8') as f:
+        expected = f.read()
+
+    for rerun in range(3):
+        if rerun == 1:
+            os.remove(output)  # reprocessa tudo a partir do manifesto
+        result = process_products.incremental_build(sheet, output)
+        assert result.count == 4
+        with open(output, encoding='utf-8') as f:
+            assert f.read() == expected
+
+ACESSORIOS = """CÓD. INTERNO,PRODUTO,CÓD. DE BARRAS,NCM,PRODUTO,CUSTO,VENDA SHOPEE LOJA UTL,MARGEM EM %
+COLEIRA DE NYLON COM FORRO DE EVA PARA CÃES,,,,,,,
+CÓD. 0000,,7897175020000,5206.32.00,COLEIRA NYLON 15MM Nº0,R$ 2.30,R$ 15.90,238%
+CÓD.0009,,7897175020000,5206.32.00,COLEIRA NYLON 15MM Nº0 (repetida),R$ 2.30,"R$ 1.015,90",238%
+CÓD. 0001,,7897175010001,5206.32.00,BOLA MACIÇA FERPLAST,R$ 12.00,"R$ 1.234,50",120%
+"""
+
+
+def test_multi_sheet_converter_parses_prices_and_keeps_order(tmp_path):
+    import process_catalogs
+    paths = [write_sheet(tmp_path, ACESSORIOS, 'acessorios.csv'), write_sheet(tmp_path)]
+    layouts = process_catalogs.load_layouts()
+
+    products, stats = process_catalogs.process_files(paths, layouts, workers=2, chunk_size=1, max_pending=2)
+
+    assert [(p['id'], p['name'], p['price'], p['cost']) for p in products[:2]] == [
+        (1, 'COLEIRA NYLON 15MM Nº0', 15.9, 2.3),
+        (2, 'BOLA MACIÇA FERPLAST', 1234.5, 12.0),
+    ]
+    assert [p['name'] for p in products[2:]] == ['Comedouro gato AF - 150 mL', 'Bola maciça', 'Ratinho NA']
+    assert [(s.layout, s.rows, s.products, s.duplicates) for s in stats] == [
+        ('acessorios', 4, 2, 1), ('injetados', 5, 3, 0)]
+    single, _ = process_catalogs.process_files(paths, layouts, workers=1, chunk_size=1000)
+    assert single == products
+
+
+def test_multi_sheet_converter_scopes_supplier_codes_by_layout(tmp_path):
+    import process_catalogs
+    acessorios = ACESSORIOS.splitlines()[0] + '\n010210,,,5206.32.00,GUIA RETRÁTIL,R$ 20.00,R$ 49.90,149%\n'
+    paths = [write_sheet(tmp_path), write_sheet(tmp_path, acessorios, 'acessorios.csv'),
+             write_sheet(tmp_path, name='injetados-2.csv')]
+
+    products, stats = process_catalogs.process_files(paths, process_catalogs.load_layouts(), workers=1)
+
+    # 010210 is a different product for each supplier, but the same one in a second injetados sheet
+    assert [p['name'] for p in products] == [
+        'Comedouro gato AF - 150 mL', 'Bola maciça', 'Ratinho NA', 'GUIA RETRÁTIL']
+    assert [s.duplicates for s in stats] == [0, 0, 3]
+
+def test_multi_sheet_converter_closes_sheets_on_unknown_layout_or_early_stop(tmp_path, monkeypatch):
+    import process_catalogs
+    handles = []
+
+    def tracking_open(*args, **kwargs):
+        handles.append(open(*args, **kwargs))
+        return handles[-1]
+
+    monkeypatch.setattr(process_catalogs, 'open', tracking_open, raising=False)
+    layouts = process_catalogs.load_layouts()
+    paths = [write_sheet(tmp_path), write_sheet(tmp_path, 'coluna\nx\n', 'outra.csv')]
+
+    with pytest.raises(ValueError, match='Layout de planilha desconhecido'):
+        process_catalogs.process_files(paths, layouts, workers=1, chunk_size=1)
+    chunks = process_catalogs.iter_chunks(paths[:1], layouts, chunk_size=1)
+    next(chunks)
+    chunks.close()
+    assert handles and all(f.closed for f in handles)
@@ -0,0 +1,53 @@
+import asyncio
+import pytest
+from backend.db import build_config
+from backend.db_pool import MeteredPool, PoolAcquireTimeout
+
+
+class FakePool:
+    def __init__(self, size: int):
+        self.free = asyncio.Semaphore(size)
+
+    async def acquire(self, timeout=None):
+        await asyncio.wait_for(self.free.acquire(), timeout)
+        return object()
+
+    async def release(self, connection, timeout=None):
+        self.free.release()
+
+
+def test_build_config_applies_pool_env(monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', 'postgres://u:p@db:5432/catalogo?maxsize=4')
+    monkeypatch.setenv('DB_POOL_MIN_SIZE', '2')
+    monkeypatch.setenv('DB_POOL_MAX_SIZE', '20')
+    monkeypatch.setenv('DB_STATEMENT_TIMEOUT_MS', '5000')
+    connection = build_config()['connections']['models']
+    assert connection['engine'] == 'backend.db_pool'
+    credentials = connection['credentials']
+    assert credentials['minsize'] == 2
+    assert credentials['maxsize'] == '4'
+    assert credentials['server_settings'] == {'statement_timeout': '5000'}
+
+
+def test_build_config_leaves_sqlite_alone(monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', 'sqlite://:memory:')
+    connection = build_config()['connections']['models']
+    assert connection['engine'] == 'tortoise.backends.sqlite'
+    assert 'maxsize' not in connection['credentials']
+
+
+@pytest.mark.asyncio
+async def test_metered_pool_tracks_usage_and_times_out():
+    pool = MeteredPool(FakePool(1), acquire_timeout=0.01)
+    conn = await pool.acquire()
+    assert pool.metrics.in_use == 1
+
+    with pytest.raises(PoolAcquireTimeout):
+        await pool.acquire()
+    assert pool.metrics.timeouts == 1
+    assert pool.metrics.waiting == 0
+
+    await pool.release(conn)
+    snapshot = pool.metrics.snapshot()
+    assert snapshot['in_use'] == 0
+    assert snapshot['acquired'] == 1
@@ -0,0 +1,73 @@
+import pytest
+from backend.db import init_db, close_db
+from backend.models import Brand, Category, Product
+from backend.repositories.product_repository import ProductRepository
+from backend.services.product_service import ProductService
+from backend.utils.importer import import_excel
+
+SHEET = """name,description,category,brand,price,stock
+Bola,Bola de borracha,Brinquedos,Ferplast,9.9,10
+Ratinho,,Brinquedos,,4.5,
+,sem nome,Brinquedos,Ferplast,1,1
+Comedouro,Comedouro AF,Comedouros,Ferplast,12,3
+"""
+
+
+@pytest.mark.asyncio
+async def test_import_resolves_names_and_inserts_in_batches(monkeypatch, tmp_path):
+    monkeypatch.setenv('DATABASE_URL', 'sqlite://:memory:')
+    await init_db()
+    try:
+        await Category.create(name='Brinquedos')
+        path = tmp_path / 'produtos.csv'
+        path.write_text(SHEET, encoding='utf-8')
+        progress = []
+
+        report = await import_excel(str(path), ProductService(ProductRepository()),
+                                    batch_size=2, progress=lambda done, total: progress.append(done))
+
+        assert report.created == 3
+        assert report.categories_created == 1
+        assert report.brands_created == 2
+        assert progress == [2, 3]
+        assert await Category.filter(name='Brinquedos').count() == 1
+        ratinho = await Product.get(name='Ratinho').prefetch_related('brand')
+        assert ratinho.brand.name == 'Pet Shop'
+        assert ratinho.description is None
+        assert ratinho.stock == 0
+        assert await Brand.all().count() == 2
+    finally:
+        await close_db()
+
+
+INJETADOS = """id,NCM,description,cadastro,status,promo_price,unit_price
+COMEDOURO / BEBEDOURO ANTI-FORMIGA,,,,,,
+010210,3926.90.90,COMEDOURO GATO AF - 150 mL,ok,,R$ 8.55,R$ 9.50
+010211,3926.90.90,COMEDOURO AF N°1 - 300 mL,ok,,R$ 10.71,R$ 11.90
+,3926.90.90,SEM CODIGO,ok,,,R$ 1.00
+"""
+
+
+@pytest.mark.asyncio
+async def test_upsert_writes_only_changed_rows(monkeypatch, tmp_path):
+    monkeypatch.setenv('DATABASE_URL', 'sqlite://:memory:')
+    await init_db()
+    try:
+        service = ProductService(ProductRepository())
+        path = tmp_path / 'injetados.csv'
+        path.write_text(INJETADOS, encoding='utf-8')
+
+        report = await import_excel(str(path), service, upsert=True)
+        assert (report.created, report.updated, report.unchanged, report.skipped) == (2, 0, 0, 1)
+
+        # stock is not in the supplier sheet, so a re-import must keep it
+        await Product.filter(sku='010211').update(stock=7)
+        path.write_text(INJETADOS.replace('R$ 9.50', 'R$ 9.90'), encoding='utf-8')
+        report = await import_excel(str(path), service, upsert=True)
+        assert (report.created, report.updated, report.unchanged) == (0, 1, 1)
+
+        assert await Product.all().count() == 2
+        assert (await Product.get(sku='010210')).price == 9.9
+        assert (await Product.get(sku='010211')).stock == 7
+    finally:
+        await close_db()
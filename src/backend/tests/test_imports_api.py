@@ -0,0 +1,73 @@
+import asyncio
+import io
+import pytest
+from quart.datastructures import FileStorage
+from backend.app import create_app
+from backend.models import Product
+from backend.services.import_jobs import ImportJobs, QueueFull
+
+CSV = ('sku,name,description,category,brand,price,stock\n'
+       + ''.join(f'S{i},Produto {i},,Brinquedos,Chalesco,{i}.5,{i}\n' for i in range(7)))
+
+
+def sheet(name='catalogo.csv', body=CSV):
+    return {'file': FileStorage(io.BytesIO(body.encode()), filename=name)}
+
+
+async def wait_finished(client, job_id):
+    for _ in range(200):
+        job = await (await client.get(f'/api/imports/{job_id}')).get_json()
+        if job['status'] not in ('queued', 'running'):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f'import still {job["status"]}')
+
+
+@pytest.mark.asyncio
+async def test_upload_runs_in_background_chunks(monkeypatch, tmp_path):
+    monkeypatch.setenv('DATABASE_URL', 'sqlite://:memory:')
+    monkeypatch.setenv('IMPORT_CHUNK_SIZE', '3')
+    monkeypatch.setenv('IMPORT_DIR', str(tmp_path))
+    app = create_app()
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        resp = await client.post('/api/imports/', files=sheet())
+        assert resp.status_code == 202
+        job_id = (await resp.get_json())['id']
+        assert resp.headers['Location'] == f'/api/imports/{job_id}'
+
+        job = await wait_finished(client, job_id)
+        assert job['status'] == 'done'
+        assert (job['total'], job['processed'], job['created']) == (7, 7, 7)
+        assert job['progress'] == 1 and job['rows_per_second'] > 0 and job['errors'] == []
+        assert await Product.all().count() == 7
+        assert list(tmp_path.iterdir()) == []
+        resp = await client.get('/api/products/search?q=produto')
+        assert resp.headers['X-Total-Count'] == '7'
+
+        resp = await client.post('/api/imports/?upsert=true', files=sheet())
+        job = await wait_finished(client, (await resp.get_json())['id'])
+        assert (job['mode'], job['unchanged'], job['created']) == ('upsert', 7, 0)
+        assert [j['id'] for j in await (await client.get('/api/imports/')).get_json()][1] == job_id
+
+        resp = await client.post('/api/imports/', files=sheet('notas.txt'))
+        assert resp.status_code == 400
+        resp = await client.post('/api/imports/', files=sheet('vazio.csv', 'coluna\nx\n'))
+        job = await wait_finished(client, (await resp.get_json())['id'])
+        assert job['status'] == 'failed' and 'Unknown sheet layout' in job['errors'][0]['error']
+        assert (await client.delete(f"/api/imports/{job['id']}")).status_code == 409
+        assert (await client.get('/api/imports/missing')).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_queued_jobs_can_be_cancelled_and_the_queue_is_bounded(tmp_path):
+    jobs = ImportJobs(queue_size=2, upload_dir=str(tmp_path))
+    first = jobs.submit(str(tmp_path / 'a.csv'), 'a.csv')
+    jobs.submit(str(tmp_path / 'b.csv'), 'b.csv')
+    with pytest.raises(QueueFull):
+        jobs.submit(str(tmp_path / 'c.csv'), 'c.csv')
+
+    assert jobs.cancel(first.id).status == 'cancelled'
+    assert first.snapshot()['eta_seconds'] is None
+    await jobs.stop()
+    assert {job.status for job in jobs.list()} == {'cancelled'}
@@ -0,0 +1,53 @@
+import io
+import pytest
+from tortoise import connections
+from backend.db import init_db, close_db
+from backend.models import Brand, Category, Product
+from backend.scripts.migrate_to_fk import migrate
+
+
+async def legacy_product(name, category, brand, placeholder):
+    product = await Product.create(name=name, price=1.0,
+                                   category_id=placeholder[0].id, brand_id=placeholder[1].id)
+    await connections.get('models').execute_query(
+        'UPDATE products SET category = ?, brand = ? WHERE id = ?', [category, brand, product.id])
+    return product
+
+
+@pytest.mark.asyncio
+async def test_migrate_to_fk_batches_and_resumes(monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', 'sqlite://:memory:')
+    await init_db()
+    try:
+        connection = connections.get('models')
+        out = io.StringIO()
+        assert await migrate(out=out) is None
+
+        await connection.execute_script(
+            'ALTER TABLE products ADD COLUMN category TEXT; ALTER TABLE products ADD COLUMN brand TEXT')
+        placeholder = (await Category.create(name='Racoes'), await Brand.create(name='Premier'))
+        legacy = [('Ração', 'Racoes', 'Premier'), ('Coleira', 'Acessórios', 'Pet Shop'),
+                  ('Bolinha', ' Brinquedos ', 'Chalesco'), ('Sem nome', '', None),
+                  ('Petisco', 'Racoes', 'Chalesco')]
+        products = [await legacy_product(*row, placeholder) for row in legacy]
+
+        assert await migrate(batch_size=2, out=out) == 5
+        assert 'rows/s' in out.getvalue()
+        names = {p.name: (p.category.name, p.brand.name)
+                 for p in await Product.all().prefetch_related('category', 'brand')}
+        assert names == {'Ração': ('Racoes', 'Premier'), 'Coleira': ('Acessórios', 'Pet Shop'),
+                         'Bolinha': ('Brinquedos', 'Chalesco'), 'Sem nome': ('Geral', 'Pet Shop'),
+                         'Petisco': ('Racoes', 'Chalesco')}
+        assert await Category.filter(name='Racoes').count() == 1
+
+        # Only products added after the checkpoint are touched on the next run
+        await connection.execute_query('UPDATE products SET brand = ? WHERE id = ?',
+                                       ['Outra', products[0].id])
+        await legacy_product('Areia', 'Higiene', 'Outra', placeholder)
+        assert await migrate(batch_size=2, out=out) == 1
+        assert (await Product.get(id=products[0].id).prefetch_related('brand')).brand.name == 'Premier'
+
+        assert await migrate(batch_size=2, restart=True, out=out) == 6
+        assert (await Product.get(id=products[0].id).prefetch_related('brand')).brand.name == 'Outra'
+    finally:
+        await close_db()
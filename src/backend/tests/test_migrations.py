@@ -0,0 +1,44 @@
+import pytest
+from tortoise import connections
+from backend.db import init_db, close_db
+from backend.migrations import apply_migrations, create_index, discover
+
+
+class FakePostgres:
+    def __init__(self, invalid: set):
+        self.invalid = invalid
+        self.scripts = []
+
+    async def execute_query_dict(self, sql):
+        return [{'?column?': 1}] if any(f"'{name}'" in sql for name in self.invalid) else []
+
+    async def execute_script(self, sql):
+        self.scripts.append(sql)
+
+
+@pytest.mark.asyncio
+async def test_migrations_apply_once(monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', 'sqlite://:memory:')
+    await init_db()
+    try:
+        connection = connections.get('models')
+        rows = await connection.execute_query_dict('SELECT version FROM schema_migrations')
+        assert [r['version'] for r in rows] == discover()
+        indexes = await connection.execute_query_dict(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'products'")
+        assert {'idx_products_category_price', 'idx_products_updated_at'} <= {r['name'] for r in indexes}
+        assert await apply_migrations() == []
+    finally:
+        await close_db()
+
+
+@pytest.mark.asyncio
+async def test_create_index_rebuilds_an_invalid_concurrent_index():
+    connection = FakePostgres(invalid={'idx_broken'})
+    await create_index(connection, 'postgres', 'idx_broken', 'products (price, id)')
+    await create_index(connection, 'postgres', 'idx_fine', 'products (name, id)')
+    assert connection.scripts == [
+        'DROP INDEX CONCURRENTLY IF EXISTS idx_broken',
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_broken ON products (price, id)',
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_fine ON products (name, id)',
+    ]
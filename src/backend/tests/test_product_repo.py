@@ -1,8 +1,10 @@
 import os
 import pytest
 import asyncio
+from datetime import timedelta
+from tortoise import timezone
 from backend.repositories.product_repository import ProductRepository, ProductIn
-from backend.models import Category, Brand
+from backend.models import Category, Brand, Product
 from backend.db import init_db, close_db
 
 @pytest.fixture(scope='module', autouse=True)
@@ -21,5 +23,58 @@ async def test_create_and_list():
                                           category_id=category.id,
                                           brand_id=brand.id))
     assert product.id is not None
-    items = await repo.list({})
-    assert len(items) == 1
+    page = await repo.list({})
+    assert len(page.items) == 1
+    assert page.next_cursor is None
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('sort,order', [('id', 'asc'), ('price', 'desc'), ('brand', 'asc'), ('name', 'desc')])
+async def test_keyset_pages_cover_catalog_in_order(sort, order):
+    repo = ProductRepository()
+    category = await Category.create(name=f'Paged {sort} {order}')
+    brands = [await Brand.create(name=n) for n in ('Zeta', 'Alfa', 'Mma')]
+    for i in range(23):
+        await repo.create(ProductIn(name=f'Produto {i % 7}', price=float(i % 5),
+                                    category_id=category.id,
+                                    brand_id=brands[i % 3].id))
+    filters = {'category_id': str(category.id)}
+
+    seen, cursor = [], None
+    while True:
+        page = await repo.list(filters, limit=4, cursor=cursor, sort=sort, order=order)
+        seen.extend(page.items)
+        cursor = page.next_cursor
+        if not cursor:
+            break
+
+    sort_value = {
+        'id': lambda r: r['id'],
+        'price': lambda r: r['price'],
+        'brand': lambda r: r['brand'],
+        'name': lambda r: r['name'],
+    }[sort]
+    expected = sorted(seen, key=lambda r: (sort_value(r), r['id']), reverse=order == 'desc')
+    assert len(seen) == 23
+    assert [r['id'] for r in seen] == [r['id'] for r in expected]
+
+@pytest.mark.asyncio
+async def test_list_rejects_bad_arguments():
+    repo = ProductRepository()
+    with pytest.raises(ValueError):
+        await repo.list({}, sort='stock')
+    with pytest.raises(ValueError):
+        await repo.list({}, cursor='not-a-cursor')
+
+@pytest.mark.asyncio
+async def test_iter_changed_pages_through_ties_in_updated_at_order():
+    repo = ProductRepository()
+    category = await Category.create(name='Changed')
+    brand = await Brand.create(name='Changed')
+    ids = [(await repo.create(ProductIn(name=f'Mudou {i}', price=1.0, category_id=category.id,
+                                        brand_id=brand.id))).id for i in range(5)]
+    later = timezone.now() + timedelta(days=1)
+    await Product.filter(id__in=ids[:2]).update(updated_at=later + timedelta(hours=1))
+    await Product.filter(id__in=ids[2:]).update(updated_at=later)
+
+    pages = [[row['id'] for row in rows] async for rows in repo.iter_changed(later, batch_size=2)]
+    assert pages == [ids[2:4], [ids[4], ids[0]], [ids[1]]]
@@ -0,0 +1,449 @@
+import asyncio
+import json
+import logging
+import pytest
+from backend.app import create_app
+from backend.routes.products import service as product_service
+from backend.instrumentation import instrumentation
+from backend.models import Category, Brand, Product
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', 'sqlite://:memory:')
+    return create_app()
+
+
+@pytest.mark.asyncio
+async def test_create_update_and_list(app):
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        category = await Category.create(name='Cat')
+        brand = await Brand.create(name='Brand')
+
+        resp = await client.post('/api/products/', json={
+            'name': 'Teste', 'price': 5.0,
+            'category_id': category.id, 'brand_id': brand.id,
+        })
+        assert resp.status_code == 201
+        created = await resp.get_json()
+
+        resp = await client.put(f"/api/products/{created['id']}", json={'name': 'Teste', 'stock': 3})
+        assert (await resp.get_json())['stock'] == 3
+
+        resp = await client.get('/api/products/')
+        assert [p['id'] for p in await resp.get_json()] == [created['id']]
+
+        resp = await client.put('/api/products/999', json={'name': 'x'})
+        assert resp.status_code == 404
+
+
+class QueryCounter(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.queries = []
+
+    def emit(self, record):
+        if record.args:
+            self.queries.append(record.getMessage())
+
+
+@pytest.fixture
+def sql_queries():
+    logger = logging.getLogger('tortoise.db_client')
+    counter = QueryCounter()
+    level = logger.level
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(counter)
+    yield counter.queries
+    logger.removeHandler(counter)
+    logger.setLevel(level)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('page_size', [1, 25])
+async def test_list_and_detail_resolve_names_in_one_query(app, sql_queries, page_size):
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        brand = await Brand.create(name='Ferplast')
+        for i in range(page_size):
+            category = await Category.create(name=f'Cat {i}')
+            await Product.create(name=f'P{i}', price=1.0, category_id=category.id, brand_id=brand.id)
+
+        sql_queries.clear()
+        resp = await client.get(f'/api/products/?limit={page_size}&sort=category')
+        items = await resp.get_json()
+        # The page itself and the catalog version behind the ETag, cached from now on.
+        assert len(sql_queries) == 2
+        assert 'MAX(' in sql_queries[0]
+        assert len(items) == page_size
+        assert items[0]['category'] == 'Cat 0'
+        assert items[0]['brand'] == 'Ferplast'
+        assert items[0]['brand_id'] == brand.id
+
+        sql_queries.clear()
+        resp = await client.get(f"/api/products/{items[0]['id']}")
+        assert (await resp.get_json())['category'] == 'Cat 0'
+        assert len(sql_queries) == 1
+
+        resp = await client.get('/api/products/999')
+        assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_list_is_cached_until_a_write(app, sql_queries):
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        category = await Category.create(name='Cat')
+        brand = await Brand.create(name='Brand')
+        product = await Product.create(name='Bola', price=1.0, category_id=category.id, brand_id=brand.id)
+
+        resp = await client.get('/api/products/?name=BOLA')
+        assert resp.headers['X-Cache'] == 'MISS'
+        sql_queries.clear()
+        resp = await client.get('/api/products/?name=bola&limit=50&_=123')
+        assert resp.headers['X-Cache'] == 'HIT'
+        assert [p['name'] for p in await resp.get_json()] == ['Bola']
+        assert sql_queries == []
+
+        await client.put(f'/api/products/{product.id}', json={'name': 'Bola azul'})
+        resp = await client.get('/api/products/?name=bola')
+        assert resp.headers['X-Cache'] == 'MISS'
+        assert [p['name'] for p in await resp.get_json()] == ['Bola azul']
+
+        stats = await (await client.get('/api/metrics/cache')).get_json()
+        # The catalog version behind the ETags is cached alongside the pages.
+        assert (stats['hits'], stats['misses'], stats['invalidations']) == (2, 4, 1)
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_answers_304_until_the_catalog_changes(app, sql_queries):
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        category = await Category.create(name='Cat')
+        brand = await Brand.create(name='Brand')
+        product = await Product.create(name='Bola', price=1.0, category_id=category.id, brand_id=brand.id)
+
+        for url in ('/api/products/?sort=price', f'/api/products/{product.id}'):
+            resp = await client.get(url)
+            etag, last_modified = resp.headers['ETag'], resp.headers['Last-Modified']
+            assert resp.headers['Cache-Control'] == 'no-cache'
+
+            sql_queries.clear()
+            resp = await client.get(url, headers={'If-None-Match': etag})
+            assert resp.status_code == 304
+            assert resp.headers['ETag'] == etag
+            assert sql_queries == []
+            resp = await client.get(url, headers={'If-Modified-Since': last_modified})
+            assert resp.status_code == 304
+
+        list_etag = (await client.get('/api/products/?sort=price')).headers['ETag']
+        assert list_etag != (await client.get('/api/products/')).headers['ETag']
+        await client.put(f'/api/products/{product.id}', json={'name': 'Bola', 'price': 2.0})
+        resp = await client.get('/api/products/?sort=price', headers={'If-None-Match': list_etag})
+        assert resp.status_code == 200
+        assert (await resp.get_json())[0]['price'] == 2.0
+
+
+@pytest.mark.asyncio
+async def test_catalog_version_moves_when_a_delete_and_an_insert_share_a_tick(app):
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        category = await Category.create(name='Cat')
+        brand = await Brand.create(name='Brand')
+        first = await Product.create(name='Bola', price=1.0, category_id=category.id, brand_id=brand.id)
+        last = await Product.create(name='Osso', price=2.0, category_id=category.id, brand_id=brand.id)
+        etag = (await client.get('/api/products/')).headers['ETag']
+
+        await Product.filter(id=first.id).delete()
+        resp = await client.post('/api/products/', json={
+            'name': 'Coleira', 'price': 3.0, 'category_id': category.id, 'brand_id': brand.id})
+        # Same MAX(updated_at) and COUNT(id) as before; only the revision moved.
+        await Product.filter(id=(await resp.get_json())['id']).update(updated_at=last.updated_at)
+        resp = await client.get('/api/products/', headers={'If-None-Match': etag})
+        assert resp.status_code == 200
+        assert [p['name'] for p in await resp.get_json()] == ['Osso', 'Coleira']
+
+
+@pytest.mark.asyncio
+async def test_without_cache_reads_skip_the_version_query(monkeypatch, sql_queries):
+    monkeypatch.setenv('DATABASE_URL', 'sqlite://:memory:')
+    monkeypatch.setenv('CACHE_MAX_ENTRIES', '0')
+    app = create_app()
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        category = await Category.create(name='Cat')
+        brand = await Brand.create(name='Brand')
+        product = await Product.create(name='Bola', price=1.0, category_id=category.id, brand_id=brand.id)
+
+        # Only the queries of the response itself; facets runs three aggregates.
+        for url, queries in (('/api/products/?sort=price', 1), (f'/api/products/{product.id}', 1),
+                             ('/api/products/facets', 3)):
+            sql_queries.clear()
+            resp = await client.get(url)
+            assert len(sql_queries) == queries
+            assert not any('MAX(' in q for q in sql_queries)
+            assert 'Last-Modified' not in resp.headers
+            # The ETag is a hash of the body, so an unchanged response is still a 304.
+            resp = await client.get(url, headers={'If-None-Match': resp.headers['ETag']})
+            assert resp.status_code == 304
+
+        etag = (await client.get('/api/products/?sort=price')).headers['ETag']
+        await client.put(f'/api/products/{product.id}', json={'name': 'Bola', 'price': 2.0})
+        resp = await client.get('/api/products/?sort=price', headers={'If-None-Match': etag})
+        assert resp.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_export_streams_every_product(app, monkeypatch):
+    monkeypatch.setattr('backend.repositories.product_repository.MAX_PAGE_SIZE', 2)
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        category = await Category.create(name='Cat')
+        brand = await Brand.create(name='Brand')
+        for i in range(5):
+            await Product.create(name=f'P{i}', price=float(5 - i), category_id=category.id, brand_id=brand.id)
+
+        resp = await client.get('/api/products/export?sort=price')
+        assert resp.mimetype == 'application/json'
+        items = await resp.get_json()
+        assert [p['name'] for p in items] == ['P4', 'P3', 'P2', 'P1', 'P0']
+        assert items[0]['category'] == 'Cat'
+
+        resp = await client.get('/api/products/export', headers={'Accept': 'application/x-ndjson'})
+        lines = (await resp.get_data(as_text=True)).splitlines()
+        assert [json.loads(line)['name'] for line in lines] == ['P0', 'P1', 'P2', 'P3', 'P4']
+
+        resp = await client.get('/api/products/export?name=nothing')
+        assert await resp.get_json() == []
+        resp = await client.get('/api/products/export?sort=bogus')
+        assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_batch_create_and_patch(app, sql_queries):
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        category = await Category.create(name='Cat')
+        brand = await Brand.create(name='Brand')
+        base = {'category_id': category.id, 'brand_id': brand.id}
+
+        resp = await client.post('/api/products/batch', json=[
+            {'name': 'A', 'price': 1.5, 'sku': 'A1', **base},
+            {'name': 'B', 'price': 'free', **base},
+            {'name': 'C', 'sku': 'A1', **base},
+            {'name': 'D', 'category_id': 999, 'brand_id': brand.id},
+            {'name': 'E', 'stock': 4, **base},
+        ])
+        body = await resp.get_json()
+        assert (body['created'], body['failed']) == (2, 3)
+        assert [r['status'] for r in body['results']] == ['created', 'error', 'error', 'error', 'created']
+        assert body['results'][3]['error'] == 'Unknown category_id'
+        a_id, e_id = body['results'][0]['id'], body['results'][4]['id']
+        assert (await Product.get(id=e_id)).stock == 4
+
+        sql_queries.clear()
+        resp = await client.patch('/api/products/batch', json=[
+            {'id': a_id, 'price': 2.0},
+            {'id': e_id, 'stock': 9, 'name': 'E2'},
+            {'id': 12345, 'stock': 1},
+            {'id': a_id, 'stock': 1},
+        ])
+        body = await resp.get_json()
+        assert [r['status'] for r in body['results']] == ['updated', 'updated', 'not_found', 'error']
+        # One SELECT for the rows plus a single bulk UPDATE, however many items, and
+        # after the commit one SELECT of the renamed row for the search index.
+        assert len([q for q in sql_queries if q.startswith(('SELECT "', 'UPDATE'))]) == 3
+        a, e = await Product.get(id=a_id), await Product.get(id=e_id)
+        assert (a.price, a.stock, a.name) == (2.0, 0, 'A')
+        assert (e.stock, e.name) == (9, 'E2')
+
+        # A sku taken by another product (or by another patch) fails only that item.
+        resp = await client.patch('/api/products/batch', json=[
+            {'id': a_id, 'name': 'ok'},
+            {'id': e_id, 'sku': 'A1'},
+            {'id': a_id + 100, 'sku': 'B1'},
+            {'id': a_id + 101, 'sku': 'B1'},
+            {'id': a_id + 102, 'sku': 'A1'},
+        ])
+        assert resp.status_code == 200
+        body = await resp.get_json()
+        assert [r['status'] for r in body['results']] == ['updated', 'error', 'not_found', 'error', 'error']
+        assert [r.get('error') for r in body['results']][1:] == [
+            'sku already exists', None, 'Duplicate sku in batch', 'Duplicate sku in batch']
+        resp = await client.patch('/api/products/batch', json=[{'id': a_id, 'sku': 'A1'}])
+        assert (await resp.get_json())['updated'] == 1
+
+        resp = await client.post('/api/products/batch', json={'name': 'x'})
+        assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_stock_adjustments(app):
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        category = await Category.create(name='Cat')
+        brand = await Brand.create(name='Brand')
+        a = await Product.create(name='A', price=1.0, stock=5, category_id=category.id, brand_id=brand.id)
+        b = await Product.create(name='B', price=1.0, stock=1, category_id=category.id, brand_id=brand.id)
+
+        resp = await client.post(f'/api/products/{a.id}/stock', json={'delta': -2})
+        assert await resp.get_json() == {'id': a.id, 'stock': 3}
+        resp = await client.post(f'/api/products/{a.id}/stock', json={'delta': -4})
+        assert resp.status_code == 409
+        resp = await client.post('/api/products/999/stock', json={'delta': 1})
+        assert resp.status_code == 404
+
+        resp = await client.post('/api/products/stock?atomic=true', json=[
+            {'id': a.id, 'delta': -1}, {'id': b.id, 'delta': -2},
+        ])
+        assert resp.status_code == 409
+        assert [r['status'] for r in (await resp.get_json())['results']] == ['rolled_back', 'insufficient_stock']
+        assert (await Product.get(id=a.id)).stock == 3
+
+        resp = await client.post('/api/products/stock', json=[
+            {'id': a.id, 'delta': -1}, {'id': b.id, 'delta': -2}, {'id': b.id, 'delta': 'x'},
+        ])
+        body = await resp.get_json()
+        assert (body['adjusted'], body['failed']) == (1, 2)
+        assert (await Product.get(id=a.id)).stock == 2
+
+
+@pytest.mark.asyncio
+async def test_parallel_stock_decrements_never_oversell(app):
+    from backend.routes.products import service
+    async with app.test_app():
+        category = await Category.create(name='Cat')
+        brand = await Brand.create(name='Brand')
+        product = await Product.create(name='A', price=1.0, stock=1500,
+                                       category_id=category.id, brand_id=brand.id)
+
+        results = await asyncio.gather(*(service.adjust_stock(product.id, -1) for _ in range(2000)))
+        statuses = [r['status'] for r in results]
+        assert statuses.count('ok') == 1500
+        assert statuses.count('insufficient_stock') == 500
+        assert (await Product.get(id=product.id)).stock == 0
+
+
+@pytest.mark.asyncio
+async def test_facets_count_in_sql_and_follow_writes(app, sql_queries):
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        toys, food = await Category.create(name='Brinquedos'), await Category.create(name='Rações')
+        brand = await Brand.create(name='Ferplast')
+        for name, price, category in [('Bola', 5.0, toys), ('Bola G', 12.0, toys),
+                                      ('Ração', 60.0, food), ('Bolacha', 30.0, food)]:
+            await Product.create(name=name, price=price, category_id=category.id, brand_id=brand.id)
+
+        sql_queries.clear()
+        resp = await client.get(f'/api/products/facets?name=bol&category_id={toys.id}')
+        facets = await resp.get_json()
+        assert len([q for q in sql_queries if 'MAX(' not in q]) == 3
+        assert facets['total'] == 2
+        # The category facet ignores the category filter itself.
+        assert [(c['name'], c['count']) for c in facets['categories']] == [('Brinquedos', 2), ('Rações', 1)]
+        assert facets['brands'] == [{'id': brand.id, 'name': 'Ferplast', 'count': 2}]
+        assert [b['count'] for b in facets['price_ranges']] == [1, 1, 0, 0]
+
+        resp = await client.get(f'/api/products/facets?name=BOL&category_id={toys.id}')
+        assert resp.headers['X-Cache'] == 'HIT'
+        await client.post('/api/products/', json={'name': 'Bolinha', 'price': 99.0,
+                                                  'category_id': toys.id, 'brand_id': brand.id})
+        resp = await client.get(f'/api/products/facets?name=bol&category_id={toys.id}')
+        assert resp.headers['X-Cache'] == 'MISS'
+        assert [b['count'] for b in (await resp.get_json())['price_ranges']] == [1, 1, 0, 1]
+
+        for query in ('category_id=abc', 'brand_id=1.5'):
+            resp = await client.get(f'/api/products/facets?{query}')
+            assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_folds_accents_and_follows_writes(app):
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        dogs, acc = await Category.create(name='RAÇÃO CÃES'), await Category.create(name='ACESSÓRIOS')
+        brand = await Brand.create(name='Premier')
+        # Indexed by the service as each write commits
+        resp = await client.post('/api/products/batch', json=[
+            {'name': 'Comedouro Inox', 'description': 'Para cães de porte médio', 'price': 20.0,
+             'category_id': acc.id, 'brand_id': brand.id},
+            {'name': 'Ração Cães Adultos', 'price': 90.0, 'category_id': dogs.id, 'brand_id': brand.id},
+        ])
+        bowl, food = [r['id'] for r in (await resp.get_json())['results']]
+        # Written behind the service's back, like another worker would: found by the sync
+        await Product.create(name='Arranhador', price=50.0, category_id=acc.id, brand_id=brand.id)
+        assert await product_service.sync_search() == 1
+        assert await product_service.sync_search() == 0
+
+        resp = await client.get('/api/products/search?q=caes')
+        assert resp.headers['X-Total-Count'] == '2'
+        # A match in the name and category outranks one in the description
+        assert [p['id'] for p in await resp.get_json()] == [food, bowl]
+
+        resp = await client.get('/api/products/search?q=RACAO%20ca')
+        assert [p['name'] for p in await resp.get_json()] == ['Ração Cães Adultos']
+
+        resp = await client.get('/api/products/suggest?q=ac')
+        assert await resp.get_json() == [{'text': 'acessórios', 'count': 2}]
+
+        await client.put(f'/api/products/{bowl}', json={'name': 'Comedouro Acessível'})
+        resp = await client.get('/api/products/suggest?q=ace')
+        assert await resp.get_json() == [{'text': 'acessórios', 'count': 2},
+                                         {'text': 'acessível', 'count': 1}]
+        resp = await client.get('/api/products/search?q=inox')
+        assert resp.headers['X-Total-Count'] == '0'
+
+        assert (await client.get('/api/products/search')).status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_request_metrics_slow_queries_and_profiles(monkeypatch, tmp_path):
+    monkeypatch.setenv('DATABASE_URL', 'sqlite://:memory:')
+    monkeypatch.setenv('SLOW_QUERY_MS', '0')
+    monkeypatch.setenv('PROFILE_SAMPLE_RATE', '1')
+    monkeypatch.setenv('PROFILE_DIR', str(tmp_path))
+    app = create_app()
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        category, brand = await Category.create(name='Cat'), await Brand.create(name='Brand')
+        product = await Product.create(name='Bola', price=5.0, category_id=category.id, brand_id=brand.id)
+
+        resp = await client.get(f'/api/products/{product.id}')
+        assert resp.status_code == 200
+        assert resp.headers['Server-Timing'].startswith('sql;dur=')
+        assert (tmp_path / resp.headers['X-Profile']).exists()
+        await client.get('/api/products/999')
+
+        text = await (await client.get('/api/metrics/prometheus')).get_data(as_text=True)
+        assert 'http_request_duration_seconds_count{method="GET",endpoint="/api/products/<int:pid>"} 2' in text
+        assert 'http_requests_total{method="GET",endpoint="/api/products/<int:pid>",status="404"} 1' in text
+        # Catalog version + product row on the first request, served from the cache on the second
+        assert 'http_request_sql_queries_sum{method="GET",endpoint="/api/products/<int:pid>"} 3' in text
+
+        slow = await (await client.get('/api/metrics/slow-queries')).get_json()
+        assert slow['threshold_ms'] == 0
+        assert any(q['endpoint'] == '/api/products/<int:pid>' and 'SELECT' in q['sql']
+                   for q in slow['queries'])
+
+
+@pytest.mark.asyncio
+async def test_a_request_that_raises_releases_the_profiler(monkeypatch, tmp_path):
+    monkeypatch.setenv('DATABASE_URL', 'sqlite://:memory:')
+    monkeypatch.setenv('PROFILE_SAMPLE_RATE', '1')
+    monkeypatch.setenv('PROFILE_DIR', str(tmp_path))
+    app = create_app()
+    # The error escapes handle_request (the server answers 500), so after_request is skipped
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+
+    @app.get('/boom')
+    async def boom():
+        raise RuntimeError('boom')
+
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        assert (await client.get('/boom')).status_code == 500
+        assert instrumentation._profiling is False
+
+        resp = await client.get('/api/products/999')
+        assert resp.status_code == 404 and 'X-Profile' in resp.headers
@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+
+# Generous budgets so slow CI machines pass; the measured values are attached
+# to the test report (``--junitxml``) to follow the trend between commits.
+IMPORT_BUDGET = 3.0
+FIRST_RESPONSE_BUDGET = 5.0
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'redis')
+
+SCRIPT = '''
+import asyncio, json, sys, time
+start = time.perf_counter()
+import backend.app
+imported = time.perf_counter()
+
+async def first_response():
+    app = backend.app.create_app()
+    async with app.test_app() as test_app:
+        return (await test_app.test_client().get('/api/products/')).status_code
+
+status = asyncio.run(first_response())
+print(json.dumps({
+    'import_seconds': imported - start,
+    'first_response_seconds': time.perf_counter() - start,
+    'status': status,
+    'heavy_modules': [m for m in %r if m in sys.modules],
+}))
+''' % (HEAVY_MODULES,)
+
+
+def test_cold_start_is_fast_and_skips_heavy_imports(record_property):
+    src = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = {**os.environ, 'DATABASE_URL': 'sqlite://:memory:', 'PYTHONPATH': src}
+    # A fresh interpreter, so modules imported by other tests do not hide the cost
+    out = subprocess.run([sys.executable, '-c', SCRIPT], env=env, cwd=src,
+                         capture_output=True, text=True, timeout=60, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    record_property('import_seconds', round(result['import_seconds'], 3))
+    record_property('first_response_seconds', round(result['first_response_seconds'], 3))
+
+    assert result['status'] == 200
+    assert result['heavy_modules'] == []
+    assert result['import_seconds'] < IMPORT_BUDGET
+    assert result['first_response_seconds'] < FIRST_RESPONSE_BUDGET
@@ -1,16 +1,123 @@
-import pandas as pd
-from backend.services.product_service import ProductService
-from backend.repositories.product_repository import ProductIn
-
-async def import_excel(path: str, service: ProductService) -> None:
-    df = pd.read_excel(path)
-    for _, row in df.iterrows():
-        product = ProductIn(
-            name=row.get('name'),
-            description=row.get('description'),
-            category=row.get('category'),
-            brand=row.get('brand'),
-            price=float(row.get('price', 0)),
-            stock=int(row.get('stock', 0)),
-        )
-        await service.create(product)
+import asyncio
+import sys
+from typing import TYPE_CHECKING, Dict, List, Tuple
+from backend.services.product_service import ProductService, ImportReport, IMPORT_BATCH_SIZE
+from backend.repositories.product_repository import ProductRepository
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_CATEGORY = 'Geral'
+DEFAULT_BRAND = 'Pet Shop'
+
+# Record field -> sheet column, per known layout. Detection picks the first
+# layout whose marker column is present, so the generic layout goes last.
+LAYOUTS = {
+    'acessorios': ('CÓD. INTERNO', {
+        'sku': 'CÓD. INTERNO',
+        'name': 'PRODUTO.1',  # the sheet has two PRODUTO columns; the second holds the name
+        'price': 'VENDA SHOPEE LOJA UTL',
+    }),
+    'injetados': ('unit_price', {
+        'sku': 'id',
+        'name': 'description',
+        'price': 'unit_price',
+    }),
+    'catalog': ('name', {
+        'sku': 'sku',
+        'name': 'name',
+        'description': 'description',
+        'category': 'category',
+        'brand': 'brand',
+        'price': 'price',
+        'stock': 'stock',
+    }),
+}
+
+def read_sheet(path: str) -> 'pd.DataFrame':
+    # pandas takes longer to import than the rest of the backend; only the
+    # import paths pay for it.
+    import pandas as pd
+    if path.lower().endswith('.csv'):
+        return pd.read_csv(path, dtype=str)
+    return pd.read_excel(path, dtype=str)
+
+def detect_layout(df: 'pd.DataFrame') -> Dict[str, str]:
+    for marker, layout in LAYOUTS.values():
+        if marker in df:
+            return layout
+    raise ValueError(f'Unknown sheet layout, columns: {list(df.columns)}')
+
+def sheet_records(df: 'pd.DataFrame') -> Tuple[List[dict], List[str]]:
+    """Normalize a product sheet column-wise into import records.
+
+    Returns the records and the record fields the sheet actually provides;
+    the others are filled with defaults.
+    """
+    import pandas as pd
+    layout = detect_layout(df)
+
+    def text(field: str, default=None) -> 'pd.Series':
+        if layout.get(field) not in df:
+            return pd.Series(default, index=df.index, dtype=object)
+        values = df[layout[field]].astype(object).str.strip()
+        return values.where(values.notna() & (values != ''), default)
+
+    def number(field: str) -> 'pd.Series':
+        values = text(field)
+        # "R$ 1.234,56" (comma decimal) and "R$ 15.90" / "9.9" (dot decimal)
+        values = values.str.replace(r'R\$\s*', '', regex=True)
+        comma = values.str.contains(',', na=False, regex=False)
+        values = values.where(~comma, values.str.replace('.', '', regex=False)
+                                            .str.replace(',', '.', regex=False))
+        return pd.to_numeric(values, errors='coerce').fillna(0)
+
+    records = pd.DataFrame({
+        # "CÓD. 0000" and "CÓD.0000" both appear for the same kind of code
+        'sku': text('sku').str.replace(r'\s+', '', regex=True),
+        'name': text('name'),
+        'description': text('description'),
+        'category': text('category', DEFAULT_CATEGORY),
+        'brand': text('brand', DEFAULT_BRAND),
+        'price': number('price').astype(float),
+        'stock': number('stock').astype(int),
+    })
+    records = records[records['name'].notna()].astype(object)
+    records = records.where(records.notna(), None)
+    fields = [f for f, column in layout.items() if f != 'sku' and column in df]
+    return records.to_dict('records'), fields
+
+def load_sheet(path: str) -> Tuple[List[dict], List[str]]:
+    return sheet_records(read_sheet(path))
+
+async def import_excel(path: str, service: ProductService,
+                       batch_size: int = IMPORT_BATCH_SIZE, progress=None,
+                       upsert: bool = False) -> ImportReport:
+    """Import a sheet; with ``upsert`` rows are matched on their supplier code."""
+    records, fields = load_sheet(path)
+    if upsert:
+        return await service.upsert_products(records, fields=fields,
+                                             batch_size=batch_size, progress=progress)
+    return await service.import_products(records, batch_size=batch_size, progress=progress)
+
+def print_progress(done: int, total: int) -> None:
+    print(f'\r{done}/{total} products', end='', file=sys.stderr, flush=True)
+
+async def main(path: str, upsert: bool = False) -> None:
+    from backend.cache import configure_cache
+    from backend.db import init_db, close_db
+    await init_db()
+    try:
+        # With a shared CACHE_URL backend this also invalidates the servers' cache
+        service = ProductService(ProductRepository(), configure_cache())
+        report = await import_excel(path, service,
+                                    progress=print_progress, upsert=upsert)
+    finally:
+        await close_db()
+    print(f'\nInserted {report.created}, updated {report.updated}, '
+          f'unchanged {report.unchanged}, skipped {report.skipped} '
+          f'({report.categories_created} new categories, {report.brands_created} new brands) '
+          f'in {report.seconds:.2f}s, {report.rows_per_second:.0f} rows/s', file=sys.stderr)
+
+if __name__ == '__main__':
+    asyncio.run(main(sys.argv[-1], upsert='--upsert' in sys.argv[1:-1]))
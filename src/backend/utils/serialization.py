@@ -0,0 +1,35 @@
+import json
+from typing import Any, AsyncIterator, Dict, List
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard library encoder
+    orjson = None
+
+Rows = AsyncIterator[List[Dict[str, Any]]]
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+async def json_array_chunks(pages: Rows) -> AsyncIterator[bytes]:
+    """Encode batches of rows as one JSON array, a chunk per batch."""
+    first = True
+    yield b'['
+    async for rows in pages:
+        if not rows:
+            continue
+        chunk = b','.join(dumps(row) for row in rows)
+        yield chunk if first else b',' + chunk
+        first = False
+    yield b']'
+
+
+async def ndjson_chunks(pages: Rows) -> AsyncIterator[bytes]:
+    """Encode batches of rows as newline-delimited JSON, a chunk per batch."""
+    async for rows in pages:
+        if rows:
+            yield b'\n'.join(dumps(row) for row in rows) + b'\n'